@@ -0,0 +1,168 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+from contextlib import contextmanager
+try:
+    import fcntl
+except ImportError:
+    # No POSIX file locks (Windows): only threads of one process are serialized
+    fcntl = None
+
+
+@contextmanager
+def exclusive_file(path, thread_lock):
+    """Hold thread_lock and an exclusive file lock on ``<path>.lock``.
+
+    Read-modify-write cycles of shared JSON files happen under this, so workers
+    in other processes sharing the folder never lose each other's updates.
+    """
+    with thread_lock:
+        if fcntl is None:
+            yield
+            return
+        with open(f"{path}.lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class ArtifactStore:
+    """Content-addressed blob store for transcripts and summaries.
+
+    Every artifact is written once under ``<root>/.blobs/<aa>/<sha256>``. Course
+    folders only hold hard links (or symlinks/copies where links are not
+    supported) plus a ``manifest.json`` mapping file names to blob hashes, so
+    identical lectures shared across courses or re-runs take no extra space.
+    """
+
+    def __init__(self, root="udemy_transcripts"):
+        self.root = root
+        self.blob_dir = os.path.join(root, ".blobs")
+        self.summary_index_path = os.path.join(self.blob_dir, "summary_index.json")
+        self._lock = threading.Lock()
+        os.makedirs(self.blob_dir, exist_ok=True)
+
+    def _exclusive(self, path):
+        """Serialize read-modify-write of a shared file of this store, across threads and processes."""
+        return exclusive_file(path, self._lock)
+
+    @staticmethod
+    def hash_text(text):
+        """Return the sha256 hex digest of a text artifact."""
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def blob_path(self, digest):
+        """Path of the blob for a given digest."""
+        return os.path.join(self.blob_dir, digest[:2], digest)
+
+    def put(self, text):
+        """Store text as a blob (if not already present) and return its digest."""
+        digest = self.hash_text(text)
+        path = self.blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            # Atomic rename so concurrent writers never expose a partial blob
+            os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest):
+        """Return the text of a blob, or None if it does not exist."""
+        try:
+            with open(self.blob_path(digest), "r", encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def link_into(self, digest, dest_path):
+        """Make dest_path point at the blob, preferring hard links."""
+        blob = self.blob_path(digest)
+        os.makedirs(os.path.dirname(dest_path) or ".", exist_ok=True)
+
+        # Never write through an existing link, that would modify the blob itself
+        if os.path.lexists(dest_path):
+            os.remove(dest_path)
+
+        try:
+            os.link(blob, dest_path)
+            return
+        except OSError:
+            pass
+
+        try:
+            os.symlink(os.path.relpath(blob, os.path.dirname(dest_path) or "."), dest_path)
+            return
+        except OSError:
+            pass
+
+        shutil.copyfile(blob, dest_path)
+
+    def record(self, course_dir, rel_name, digest, kind):
+        """Record a file -> blob reference in the course manifest."""
+        manifest_path = os.path.join(course_dir, "manifest.json")
+        with self._exclusive(manifest_path):
+            manifest = {"files": {}}
+            if os.path.exists(manifest_path):
+                try:
+                    with open(manifest_path, "r", encoding="utf-8") as f:
+                        manifest = json.load(f)
+                except (OSError, ValueError):
+                    print(f"Could not read manifest {manifest_path}, rebuilding it.")
+            manifest.setdefault("files", {})[rel_name.replace(os.sep, "/")] = {
+                "sha256": digest,
+                "kind": kind
+            }
+            tmp_path = f"{manifest_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, manifest_path)
+
+    def store_file(self, course_dir, rel_name, text, kind="transcript"):
+        """Store text in the blob store and reference it from a course folder."""
+        digest = self.put(text)
+        self.link_into(digest, os.path.join(course_dir, rel_name))
+        self.record(course_dir, rel_name, digest, kind)
+        return digest
+
+    def _load_summary_index(self):
+        try:
+            with open(self.summary_index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @classmethod
+    def summary_variant(cls, model, title):
+        """Summary index variant for a model and lecture title.
+
+        The notes are headed with the lecture title, so the same transcript under
+        another title (another lecture or course) must not reuse them.
+        """
+        return f"{model}:{cls.hash_text(title)[:16]}"
+
+    def get_summary(self, transcript_digest, variant="default"):
+        """Return a previously generated summary for a transcript blob, if any."""
+        with self._lock:
+            index = self._load_summary_index()
+        summary_digest = index.get(transcript_digest, {}).get(variant)
+        if not summary_digest:
+            return None
+        return self.get(summary_digest)
+
+    def put_summary(self, transcript_digest, summary, variant="default"):
+        """Store a summary blob and remember it as the summary of a transcript blob."""
+        summary_digest = self.put(summary)
+        with self._exclusive(self.summary_index_path):
+            index = self._load_summary_index()
+            index.setdefault(transcript_digest, {})[variant] = summary_digest
+            tmp_path = f"{self.summary_index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(index, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.summary_index_path)
+        return summary_digest
@@ -0,0 +1,421 @@
+import os
+import sys
+import json
+import time
+import socket
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from job_registry import normalize_course_url, make_job_key
+from cancellation import CancellationToken, JobCancelled, DEFAULT_JOB_TIMEOUT
+from pacing import process_pacer
+
+BATCH_DB_PATH = os.path.join("udemy_transcripts", ".batch", "batch.sqlite3")
+BATCH_WORKERS = int(os.environ.get("UDEMY_BATCH_WORKERS", 2))
+# A worker holds a course for LEASE_SECONDS and renews it every HEARTBEAT_SECONDS;
+# a course whose lease runs out (worker killed, host down, browser hung) goes back to the queue
+LEASE_SECONDS = float(os.environ.get("UDEMY_LEASE_SECONDS", 120))
+HEARTBEAT_SECONDS = float(os.environ.get("UDEMY_HEARTBEAT_SECONDS", 30))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT UNIQUE NOT NULL,
+    url TEXT NOT NULL,
+    options TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lectures INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    added_at REAL,
+    started_at REAL,
+    finished_at REAL,
+    lease_expires_at REAL,
+    heartbeat_at REAL
+);
+CREATE INDEX IF NOT EXISTS courses_status ON courses (status, id);
+"""
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def load_course_file(path):
+    """(url, options) pairs from a file of course URLs.
+
+    One course per line: either a bare URL or a JSON object such as
+    ``{"url": "...", "max_videos": 10, "summarize": true}``. Blank lines and
+    lines starting with # are ignored.
+    """
+    courses = []
+    with open(path, "r", encoding="utf-8") as f:
+        for number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            if line.startswith("{"):
+                try:
+                    entry = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"{path}:{number}: invalid JSON ({str(e)})")
+                url = entry.pop("url", None)
+                if not url:
+                    raise ValueError(f"{path}:{number}: missing \"url\"")
+                courses.append((url, entry))
+            else:
+                courses.append((line, {}))
+    return courses
+
+
+class BatchQueue:
+    """Persistent queue of courses in SQLite.
+
+    Courses move pending -> running -> done/failed. A course is keyed like a job
+    (normalized URL plus options), so adding the same file twice does not queue
+    anything twice. Every call opens its own connection, so worker threads and
+    separate processes can share the database.
+    """
+
+    def __init__(self, path=BATCH_DB_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.executescript(SCHEMA)
+            # Queues created before leases existed
+            columns = {row["name"] for row in db.execute("PRAGMA table_info(courses)")}
+            for column in ("lease_expires_at", "heartbeat_at"):
+                if column not in columns:
+                    db.execute(f"ALTER TABLE courses ADD COLUMN {column} REAL")
+
+    @contextmanager
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def add(self, url, options=None):
+        """Queue a course unless the same course and options are already queued; returns True if added."""
+        options = options or {}
+        key = make_job_key(url, **options)
+        with self._connect() as db:
+            cursor = db.execute(
+                "INSERT OR IGNORE INTO courses (key, url, options, added_at) VALUES (?, ?, ?, ?)",
+                (key, normalize_course_url(url), json.dumps(options, sort_keys=True), time.time()))
+            return cursor.rowcount > 0
+
+    def claim(self, worker, lease=None):
+        """Atomically take the oldest pending course for worker, or None when nothing is pending.
+
+        With ``lease`` (seconds) the claim expires unless the worker keeps renewing it with heartbeat().
+        """
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT * FROM courses WHERE status = 'pending' ORDER BY id LIMIT 1").fetchone()
+                if row is not None:
+                    now = time.time()
+                    db.execute("UPDATE courses SET status = 'running', attempts = attempts + 1, worker = ?, "
+                               "started_at = ?, finished_at = NULL, error = NULL, lease_expires_at = ?, "
+                               "heartbeat_at = ? WHERE id = ?",
+                               (worker, now, now + lease if lease else None, now, row["id"]))
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        if row is None:
+            return None
+        return dict(row, status="running", attempts=row["attempts"] + 1, worker=worker)
+
+    def finish(self, course_id, status, lectures=0, error=None, worker=None):
+        """Record the outcome of a course; with worker, only if that worker still holds it. Returns True if saved."""
+        query = ("UPDATE courses SET status = ?, lectures = ?, error = ?, finished_at = ?, lease_expires_at = NULL "
+                 "WHERE id = ?")
+        params = [status, lectures, error, time.time(), course_id]
+        if worker is not None:
+            query += " AND worker = ? AND status = 'running'"
+            params.append(worker)
+        with self._connect() as db:
+            return db.execute(query, params).rowcount > 0
+
+    def release(self, course_id, worker=None):
+        """Put a course that was interrupted (not failed) back in the queue."""
+        query = "UPDATE courses SET status = 'pending', worker = NULL, lease_expires_at = NULL WHERE id = ?"
+        params = [course_id]
+        if worker is not None:
+            query += " AND worker = ? AND status = 'running'"
+            params.append(worker)
+        with self._connect() as db:
+            db.execute(query, params)
+
+    def heartbeat(self, course_id, worker, lease):
+        """Extend worker's lease on a course; False means the lease was lost (reclaimed by someone else)."""
+        now = time.time()
+        with self._connect() as db:
+            return db.execute("UPDATE courses SET lease_expires_at = ?, heartbeat_at = ? "
+                              "WHERE id = ? AND worker = ? AND status = 'running'",
+                              (now + lease, now, course_id, worker)).rowcount > 0
+
+    def reclaim_expired(self, max_attempts=None, stale_after=LEASE_SECONDS):
+        """Queue again courses whose lease ran out (their worker died or hung); returns how many.
+
+        Courses claimed without a lease (by runners older than leases) count as expired
+        once they have gone ``stale_after`` seconds without a heartbeat. Courses that
+        already used max_attempts are failed instead, so one course that keeps killing
+        workers cannot block the batch.
+        """
+        now = time.time()
+        expired = ("status = 'running' AND (lease_expires_at < ? OR "
+                   "(lease_expires_at IS NULL AND COALESCE(heartbeat_at, started_at, 0) < ?))")
+        with self._connect() as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                failed = 0
+                if max_attempts:
+                    failed = db.execute(
+                        "UPDATE courses SET status = 'failed', finished_at = ?, lease_expires_at = NULL, "
+                        "error = 'Lease expired ' || attempts || ' times (worker ' || COALESCE(worker, '?') || ')' "
+                        f"WHERE {expired} AND attempts >= ?",
+                        (now, now, now - stale_after, max_attempts)).rowcount
+                requeued = db.execute(
+                    "UPDATE courses SET status = 'pending', worker = NULL, lease_expires_at = NULL "
+                    f"WHERE {expired}", (now, now - stale_after)).rowcount
+                db.execute("COMMIT")
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+        if requeued or failed:
+            print(f"Reclaimed {requeued} courses with expired leases" + (f", failed {failed}" if failed else ""))
+        return requeued
+
+    def retry_failed(self):
+        with self._connect() as db:
+            return db.execute("UPDATE courses SET status = 'pending', worker = NULL "
+                              "WHERE status = 'failed'").rowcount
+
+    def counts(self):
+        """Courses per status plus lectures extracted so far."""
+        with self._connect() as db:
+            counts = {"pending": 0, "running": 0, "done": 0, "failed": 0}
+            for row in db.execute("SELECT status, COUNT(*) AS n FROM courses GROUP BY status"):
+                counts[row["status"]] = row["n"]
+            counts["lectures"] = db.execute("SELECT COALESCE(SUM(lectures), 0) FROM courses").fetchone()[0]
+            return counts
+
+    def courses(self, status=None):
+        with self._connect() as db:
+            if status:
+                rows = db.execute("SELECT * FROM courses WHERE status = ? ORDER BY id", (status,))
+            else:
+                rows = db.execute("SELECT * FROM courses ORDER BY id")
+            return [dict(row) for row in rows]
+
+
+def extract_course(course, cancel_token, headless=True, api_key=None, api_base=None, extractor_options=None):
+    """Run the extractor non-interactively on one queued course; returns (status, lectures, error)."""
+    from ibm_udemy_transcript_scraper import UdemyTranscriptExtractor
+    options = json.loads(course["options"])
+    summarize = bool(options.get("summarize")) and bool(api_key)
+    extractor = UdemyTranscriptExtractor(headless=headless, summarize=summarize, api_key=api_key, api_base=api_base,
+                                         cancel_token=cancel_token, interactive=False, **(extractor_options or {}))
+    try:
+        ok = extractor.extract_all_transcripts(course["url"], max_videos=int(options.get("max_videos", 0)))
+        lectures = len(extractor.processed_lectures)
+    finally:
+        extractor.memory.stop()
+        extractor.close()
+    if ok:
+        return "done", lectures, None
+    return "failed", lectures, "Extraction stopped early, see the log (and the dead-letter file)"
+
+
+class BatchRunner:
+    """Works through a BatchQueue with a fixed number of workers, one browser each.
+
+    Workers run the extractor non-interactively and share the saved login session,
+    so only the first login (if any) is done by hand. Courses are claimed under a
+    lease that a heartbeat thread keeps renewing, so runners and distributed workers
+    can share one queue. Progress, throughput and the ETA for the whole batch are
+    printed every ``report_every`` seconds.
+    """
+
+    def __init__(self, queue, workers=BATCH_WORKERS, headless=True, api_key=None, api_base=None,
+                 report_every=60, extractor_options=None):
+        self.queue = queue
+        self.workers = max(1, workers)
+        self.headless = headless
+        self.api_key = api_key
+        self.api_base = api_base
+        self.report_every = report_every
+        self.extractor_options = extractor_options or {}
+        self.cancel_token = CancellationToken()
+        self.runner_id = default_worker_id()
+        self._held = {}  # course id -> worker name, renewed by the heartbeat thread
+        self._started_at = None
+        self._finished_this_run = 0
+        self._lectures_this_run = 0
+        self._lock = threading.Lock()
+
+    def run_course(self, course):
+        """Extract one queued course; returns (status, lectures, error)."""
+        # Each course gets its own deadline, and the whole batch can be cancelled at once
+        with self.cancel_token.child(DEFAULT_JOB_TIMEOUT) as token:
+            return extract_course(course, token, headless=self.headless, api_key=self.api_key,
+                                  api_base=self.api_base, extractor_options=self.extractor_options)
+
+    def _worker(self, name):
+        while not self.cancel_token.cancelled:
+            course = self.queue.claim(name, lease=LEASE_SECONDS)
+            if course is None:
+                return
+            with self._lock:
+                self._held[course["id"]] = name
+            print(f"[{name}] Starting course {course['id']}: {course['url']} (attempt {course['attempts']})")
+            started = time.time()
+            try:
+                status, lectures, error = self.run_course(course)
+            except JobCancelled:
+                status, lectures, error = None, 0, None
+            except Exception as e:
+                status, lectures, error = "failed", 0, str(e)
+            finally:
+                with self._lock:
+                    self._held.pop(course["id"], None)
+
+            if status is None or self.cancel_token.cancelled:
+                # Interrupted, not failed: the next run picks it up again
+                self.queue.release(course["id"], worker=name)
+                return
+            self.queue.finish(course["id"], status, lectures, error, worker=name)
+            with self._lock:
+                self._finished_this_run += 1
+                self._lectures_this_run += lectures
+            print(f"[{name}] Course {course['id']} {status}: {lectures} lectures in {time.time() - started:.0f}s")
+
+    def progress(self):
+        """Batch totals plus throughput and ETA based on this run."""
+        counts = self.queue.counts()
+        elapsed = time.time() - self._started_at if self._started_at else 0
+        with self._lock:
+            finished, lectures = self._finished_this_run, self._lectures_this_run
+        remaining = counts["pending"] + counts["running"]
+        courses_per_hour = finished / elapsed * 3600 if elapsed and finished else 0
+        counts.update({
+            "elapsed": elapsed,
+            "courses_per_hour": courses_per_hour,
+            "lectures_per_minute": lectures / elapsed * 60 if elapsed else 0,
+            "eta": remaining / courses_per_hour * 3600 if courses_per_hour else None,
+        })
+        return counts
+
+    def format_progress(self):
+        p = self.progress()
+        eta = f"{p['eta'] / 60:.0f} min" if p["eta"] is not None else "unknown"
+        return (f"Batch: {p['done']} done, {p['failed']} failed, {p['running']} running, {p['pending']} pending | "
+                f"{p['lectures']} lectures | {p['courses_per_hour']:.1f} courses/h, "
+                f"{p['lectures_per_minute']:.1f} lectures/min | ETA {eta} | {process_pacer.describe()}")
+
+    def _reporter(self, done):
+        while not done.wait(self.report_every):
+            print(self.format_progress())
+
+    def _keep_leases(self, done):
+        while not done.wait(HEARTBEAT_SECONDS):
+            with self._lock:
+                held = list(self._held.items())
+            for course_id, name in held:
+                try:
+                    self.queue.heartbeat(course_id, name, LEASE_SECONDS)
+                except Exception as e:
+                    print(f"[{name}] Heartbeat failed: {str(e)}")
+
+    def run(self):
+        """Run until the queue is empty or the batch is cancelled (Ctrl+C); returns the final progress."""
+        # Only courses whose holder stopped renewing its lease; live workers sharing the queue keep theirs
+        requeued = self.queue.reclaim_expired()
+        if requeued:
+            print(f"Resuming: {requeued} courses from an interrupted run are queued again.")
+        self._started_at = time.time()
+        done = threading.Event()
+        threading.Thread(target=self._reporter, args=(done,), name="batch-reporter", daemon=True).start()
+        threading.Thread(target=self._keep_leases, args=(done,), name="batch-leases", daemon=True).start()
+        threads = [threading.Thread(target=self._worker, args=(f"{self.runner_id}-{i}",), name=f"batch-worker-{i}",
+                                    daemon=True) for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(timeout=1)
+        except KeyboardInterrupt:
+            print("\nInterrupted, stopping the batch (running courses will be resumed next time)...")
+            self.cancel_token.cancel("Batch interrupted")
+            for thread in threads:
+                thread.join(timeout=30)
+        finally:
+            done.set()
+        print(self.format_progress())
+        return self.progress()
+
+
+def login_once(url, headless=False):
+    """Log in by hand once so every worker can reuse the saved session."""
+    from ibm_udemy_transcript_scraper import UdemyTranscriptExtractor
+    extractor = UdemyTranscriptExtractor(headless=headless)
+    try:
+        extractor.ensure_logged_in(url)
+    finally:
+        extractor.memory.stop()
+        extractor.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract transcripts for a whole list of courses.")
+    parser.add_argument("courses", nargs="?", help="File with one course URL (or JSON object) per line")
+    parser.add_argument("--db", default=BATCH_DB_PATH, help="SQLite file holding the batch queue")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS, help="Courses extracted at once")
+    parser.add_argument("--max-videos", type=int, default=0, help="Default maximum videos per course")
+    parser.add_argument("--summarize", action="store_true", help="Summarize every course by default")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"), help="OpenAI API key")
+    parser.add_argument("--api-base", help="OpenAI-compatible API base URL")
+    parser.add_argument("--visible", action="store_true", help="Show the browsers instead of running headless")
+    parser.add_argument("--login-first", action="store_true",
+                        help="Open one visible browser to log in by hand before the workers start")
+    parser.add_argument("--retry-failed", action="store_true", help="Queue failed courses again")
+    parser.add_argument("--status", action="store_true", help="Print the queue and exit")
+    parser.add_argument("--report-every", type=float, default=60, help="Seconds between progress reports")
+    args = parser.parse_args(argv)
+
+    queue = BatchQueue(args.db)
+    if args.courses:
+        defaults = {"max_videos": args.max_videos, "summarize": args.summarize}
+        added = sum(queue.add(url, dict(defaults, **options)) for url, options in load_course_file(args.courses))
+        print(f"Queued {added} new courses from {args.courses}.")
+    if args.retry_failed:
+        print(f"Queued {queue.retry_failed()} failed courses again.")
+    if args.status:
+        for course in queue.courses():
+            print(f"{course['id']:>5}  {course['status']:<8} {course['lectures']:>5} lectures  {course['url']}"
+                  + (f"  ({course['error']})" if course["error"] else ""))
+        print(queue.counts())
+        return
+
+    pending = queue.courses("pending") + queue.courses("running")
+    if not pending:
+        sys.exit("Nothing to do: the queue is empty. Pass a file of course URLs.")
+    if args.login_first:
+        login_once(pending[0]["url"])
+
+    runner = BatchRunner(queue, workers=args.workers, headless=not args.visible, api_key=args.api_key,
+                         api_base=args.api_base, report_every=args.report_every)
+    runner.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Local multi-process check of the distributed worker protocol.
+
+Queues synthetic courses in a fresh SQLite job store, starts several worker
+processes from ``distributed.Worker`` and SIGKILLs one of them in the middle of
+a course, so its lease has to expire and be reclaimed by the others. Courses are
+"extracted" by writing FakeCourse transcripts into the usual udemy_transcripts
+layout, so no browser is needed. Reports throughput, reclaimed leases and
+whether every course ended up done exactly once.
+
+Run from the repository root:
+    python -m benchmarks.bench_distributed --workers 4 --courses 20 --lectures 5
+    python -m benchmarks.bench_distributed --workers 3 --lease 2 --heartbeat 0.5 --no-kill
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import tempfile
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from batch_runner import BatchQueue  # noqa: E402
+from distributed import Worker  # noqa: E402
+from benchmarks.fake_udemy_site import FakeCourse  # noqa: E402
+
+
+def simulated_course(course, token, lectures=5, seconds_per_lecture=0.2):
+    """Stand-in for extract_course: writes lectures at a steady pace, honouring cancellation."""
+    slug = course["url"].rstrip("/").rsplit("/", 1)[-1]
+    output_dir = os.path.join("udemy_transcripts", slug)
+    os.makedirs(output_dir, exist_ok=True)
+    fake = FakeCourse(lectures=lectures, cues=20, seed=course["id"])
+    for index, lecture in enumerate(fake.lectures, start=1):
+        token.sleep(seconds_per_lecture)
+        with open(os.path.join(output_dir, f"{index}_{lecture['id']}.txt"), "w", encoding="utf-8") as f:
+            f.write("\n".join(lecture["cues"]))
+    return "done", len(fake.lectures), None
+
+
+def worker_process(workdir, db_path, worker_id, lease, heartbeat, lectures, seconds_per_lecture):
+    os.chdir(workdir)
+    worker = Worker(BatchQueue(db_path), worker_id=worker_id, lease=lease, heartbeat=heartbeat, poll=0.2,
+                    exit_when_done=True,
+                    run_course=lambda course, token: simulated_course(course, token, lectures, seconds_per_lecture))
+    worker.run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exercise lease/heartbeat coordination with local worker processes.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--lectures", type=int, default=5)
+    parser.add_argument("--seconds-per-lecture", type=float, default=0.2)
+    parser.add_argument("--lease", type=float, default=3.0)
+    parser.add_argument("--heartbeat", type=float, default=1.0)
+    parser.add_argument("--no-kill", action="store_true", help="Do not kill a worker mid-course")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+    if not args.no_kill and args.workers < 2:
+        parser.error("killing a worker needs at least 2 workers")
+
+    workdir = tempfile.mkdtemp(prefix="udemy_distributed_")
+    db_path = os.path.join(workdir, "udemy_transcripts", ".batch", "batch.sqlite3")
+    queue = BatchQueue(db_path)
+    for index in range(args.courses):
+        queue.add(f"https://www.udemy.com/course/synthetic-course-{index}/")
+
+    context = multiprocessing.get_context("spawn")
+    processes = []
+    start = time.perf_counter()
+    for index in range(args.workers):
+        process = context.Process(target=worker_process, args=(
+            workdir, db_path, f"worker-{index}", args.lease, args.heartbeat, args.lectures,
+            args.seconds_per_lecture))
+        process.start()
+        processes.append(process)
+
+    killed = None
+    if not args.no_kill:
+        # Wait until worker-0 holds a course, then kill it without any chance to clean up
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline and killed is None:
+            running = [c for c in queue.courses("running") if c["worker"] == "worker-0"]
+            if running:
+                os.kill(processes[0].pid, signal.SIGKILL)
+                killed = running[0]["id"]
+                print(f"Killed worker-0 while it held course {killed}")
+            time.sleep(0.05)
+
+    # The surviving workers only exit once the killed worker's course was reclaimed and finished
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    courses = queue.courses()
+    counts = queue.counts()
+    written = sum(len([name for name in files if name.endswith(".txt")])
+                  for _, _, files in os.walk(os.path.join(workdir, "udemy_transcripts")))
+    results = {
+        "workers": args.workers,
+        "courses": args.courses,
+        "done": counts["done"],
+        "failed": counts["failed"],
+        "elapsed_s": round(elapsed, 2),
+        "courses_per_minute": round(counts["done"] / elapsed * 60, 2) if elapsed else 0.0,
+        "killed_course": killed,
+        "reclaimed_attempts": sum(course["attempts"] - 1 for course in courses),
+        "transcript_files": written,
+        "all_done": counts["done"] == args.courses,
+        "workdir": workdir,
+    }
+    print("\nDistributed run results")
+    for key, value in results.items():
+        print(f"  {key:<20} {value}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
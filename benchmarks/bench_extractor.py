@@ -0,0 +1,207 @@
+"""Offline throughput benchmark for the transcript extractor.
+
+Starts the fake course site from ``fake_udemy_site`` on localhost and drives either
+``UdemyTranscriptExtractor`` directly or the Streamlit app's ``extraction_thread``
+against it, then reports lectures/minute, p50/p95 per-lecture latency and peak RSS.
+
+Run from the repository root:
+    python -m benchmarks.bench_extractor --mode extractor --lectures 10 --cues 200
+    python -m benchmarks.bench_extractor --mode app --lectures 10 --latency-ms 150
+"""
+import os
+import sys
+import json
+import math
+import time
+import queue
+import argparse
+import tempfile
+import resource
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_udemy_site import FakeUdemySite, SESSION_COOKIE  # noqa: E402
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def process_tree_rss_kb(root_pid):
+    """Current RSS (KB) of root_pid and all of its descendants, read from /proc."""
+    children = {}
+    rss = {}
+    page_kb = os.sysconf("SC_PAGE_SIZE") // 1024
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{entry}/statm") as f:
+                rss[int(entry)] = int(f.read().split()[1]) * page_kb
+            children.setdefault(int(fields[1]), []).append(int(entry))
+        except (OSError, IndexError, ValueError):
+            continue
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total
+
+
+class RssSampler:
+    """Samples the RSS of this process tree (Python + chromedriver + Chrome) in the background."""
+
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.peak_kb = max(self.peak_kb, process_tree_rss_kb(os.getpid()))
+            except OSError:
+                pass
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+def bench_extractor(site, lectures):
+    """Drive UdemyTranscriptExtractor lecture by lecture; returns per-lecture latencies."""
+    from ibm_udemy_transcript_scraper import UdemyTranscriptExtractor
+
+    extractor = UdemyTranscriptExtractor(headless=True)
+    latencies = []
+    try:
+        # Skip the manual login: the fake site accepts its session cookie directly
+        extractor.driver.get(site.base_url + "/login")
+        extractor.driver.add_cookie({"name": SESSION_COOKIE, "value": "ok", "path": "/"})
+        extractor.driver.get(site.first_lecture_url)
+        extractor.find_and_enable_transcript()
+        course_title = extractor.get_course_title()
+        output_dir = os.path.join("udemy_transcripts", course_title)
+        os.makedirs(output_dir, exist_ok=True)
+
+        for index in range(lectures):
+            start = time.perf_counter()
+            current_url = extractor.driver.current_url
+            extractor.begin_lecture(current_url)
+            outcome = extractor.process_current_lecture(current_url, output_dir, None, index)
+            if outcome != "processed":
+                print(f"Lecture {index + 1}: {outcome}")
+            if index + 1 < lectures:
+                with extractor.tracer.span("next_lecture_navigation"):
+                    extractor.navigate_to_next_video()
+                extractor._sleep(3)
+            latencies.append(time.perf_counter() - start)
+        print(extractor.tracer.format_breakdown())
+    finally:
+        extractor.close()
+    return latencies
+
+
+def bench_app(site, lectures):
+    """Run the app's extraction_thread end to end (login included); returns per-lecture latencies."""
+    from extraction_pipeline import extraction_thread, init_cloud_browser
+
+    status_queue = queue.Queue()
+    driver = init_cloud_browser()
+    worker = threading.Thread(
+        target=extraction_thread,
+        args=(driver, site.course_url, lectures, None, status_queue, "bench@example.com", "benchmark"),
+        daemon=True
+    )
+    worker.start()
+
+    progress_times = []
+    finished_at = None
+    while True:
+        msg_type, content = status_queue.get()
+        if msg_type == "progress":
+            progress_times.append(time.perf_counter())
+        elif msg_type == "error":
+            print(f"Extraction error: {content}")
+        elif msg_type in ("success", "done"):
+            finished_at = finished_at or time.perf_counter()
+            if msg_type == "done":
+                break
+    worker.join()
+
+    # Lecture i spans from its progress event to the next one (or to the end of the run)
+    boundaries = progress_times + [finished_at]
+    return [boundaries[i + 1] - boundaries[i] for i in range(len(progress_times))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the extractor against a local fake Udemy course.")
+    parser.add_argument("--mode", choices=["extractor", "app"], default="extractor")
+    parser.add_argument("--lectures", type=int, default=10)
+    parser.add_argument("--cues", type=int, default=150)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--jitter-ms", type=int, default=0)
+    parser.add_argument("--render-delay-ms", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    site = FakeUdemySite(args.lectures, args.cues, args.latency_ms, args.jitter_ms, args.render_delay_ms).start()
+    workdir = tempfile.mkdtemp(prefix="udemy_bench_")
+    json_path = os.path.abspath(args.json) if args.json else None
+    os.chdir(workdir)  # keep benchmark artifacts out of the real udemy_transcripts folder
+
+    # Import up front so module import time is not counted as extraction time
+    if args.mode == "extractor":
+        import ibm_udemy_transcript_scraper  # noqa: F401
+    else:
+        import extraction_pipeline  # noqa: F401
+
+    try:
+        with RssSampler() as sampler:
+            start = time.perf_counter()
+            if args.mode == "extractor":
+                latencies = bench_extractor(site, args.lectures)
+            else:
+                latencies = bench_app(site, args.lectures)
+            elapsed = time.perf_counter() - start
+    finally:
+        site.stop()
+
+    results = {
+        "mode": args.mode,
+        "lectures": len(latencies),
+        "elapsed_s": round(elapsed, 2),
+        "lectures_per_minute": round(len(latencies) / elapsed * 60, 2) if elapsed else 0.0,
+        "p50_lecture_s": round(percentile(latencies, 50), 3),
+        "p95_lecture_s": round(percentile(latencies, 95), 3),
+        "peak_rss_python_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "peak_rss_tree_mb": round(sampler.peak_kb / 1024, 1),
+        "site_requests": site.requests_served
+    }
+
+    print("\nBenchmark results")
+    for key, value in results.items():
+        print(f"  {key:<22} {value}")
+    if json_path:
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Offline load benchmark for the summarization path.
+
+Starts ``mock_openai_server`` on localhost (unless ``--api-base`` points at another
+server) and pushes synthetic transcripts through ``SummaryClient.summarize`` -- the
+client behind ``UdemyTranscriptExtractor.generate_notion_friendly_summary`` -- from
+a pool of worker threads. Reports throughput, retry counts and tail latency.
+
+Run from the repository root:
+    python -m benchmarks.bench_summarization --transcripts 300 --concurrency 16 --rate-429 0.1
+    python -m benchmarks.bench_summarization --latency uniform:200:2000 --rate-5xx 0.05 --stream
+    python -m benchmarks.bench_summarization --duplicates 3   # same lectures from concurrent jobs
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from summary_client import SummaryClient  # noqa: E402
+from benchmarks.fake_udemy_site import FakeCourse  # noqa: E402
+from benchmarks.mock_openai_server import MockOpenAIServer  # noqa: E402
+from benchmarks.bench_extractor import percentile  # noqa: E402
+
+
+def synthetic_transcripts(count, cues):
+    """(title, transcript) pairs shaped like extracted lectures."""
+    course = FakeCourse(lectures=count, cues=cues)
+    return [(lecture["title"], "\n".join(lecture["cues"])) for lecture in course.lectures]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test lecture summarization against a mock OpenAI server.")
+    parser.add_argument("--transcripts", type=int, default=200)
+    parser.add_argument("--cues", type=int, default=150, help="Transcript length in cues")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", default="lognormal:800", help="fixed:MS, uniform:MIN:MAX or lognormal:MEDIAN[:SIGMA]")
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--rate-5xx", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=float, help="Retry-After seconds sent with 429 responses")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="Server answers 429 above this many in-flight")
+    parser.add_argument("--max-retries", type=int, default=4)
+    parser.add_argument("--backoff-base", type=float, default=0.25)
+    parser.add_argument("--stream", action="store_true", help="Request server-sent-event streaming")
+    parser.add_argument("--cache-min-tokens", type=int, default=1024,
+                        help="Shortest prefix the mock server reports as cached (OpenAI: 1024)")
+    parser.add_argument("--duplicates", type=int, default=1,
+                        help="Request every transcript this many times at once, like jobs sharing a course")
+    parser.add_argument("--api-base", help="Use an already running OpenAI-compatible server instead of the mock")
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    server = None
+    api_base = args.api_base
+    if not api_base:
+        server = MockOpenAIServer(args.latency, args.rate_429, args.rate_5xx, args.retry_after,
+                                  args.max_concurrency, seed=7, cache_min_tokens=args.cache_min_tokens).start()
+        api_base = server.base_url
+
+    # One pooled connection per worker, like the extractor's long-lived session
+    client = SummaryClient("sk-benchmark", api_base=api_base, max_retries=args.max_retries,
+                           backoff_base=args.backoff_base, pool_maxsize=args.concurrency)
+    # Duplicates sit next to each other so they are in flight at the same time
+    transcripts = [item for item in synthetic_transcripts(args.transcripts, args.cues)
+                   for _ in range(max(1, args.duplicates))]
+
+    def summarize(item):
+        title, text = item
+        start = time.perf_counter()
+        summary = client.summarize(text, title, stream=args.stream)
+        return time.perf_counter() - start, summary is not None
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            outcomes = list(pool.map(summarize, transcripts))
+        elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.stop()
+
+    latencies = [latency for latency, ok in outcomes if ok]
+    stats = client.stats()
+    results = {
+        "transcripts": len(transcripts),
+        "concurrency": args.concurrency,
+        "stream": args.stream,
+        "elapsed_s": round(elapsed, 2),
+        "summaries_per_minute": round(len(latencies) / elapsed * 60, 1) if elapsed else 0.0,
+        "succeeded": stats["succeeded"],
+        "failed": stats["failed"],
+        "http_requests": stats["requests"],
+        "retries": stats["retries"],
+        "rate_limited": stats["rate_limited"],
+        "server_errors": stats["server_errors"],
+        "connection_errors": stats["connection_errors"],
+        "coalesced": stats["coalesced"],
+        "prompt_tokens": stats["prompt_tokens"],
+        "cached_tokens": stats["cached_tokens"],
+        "cached_share": round(stats["cached_tokens"] / stats["prompt_tokens"], 3) if stats["prompt_tokens"] else 0.0,
+        "p50_s": round(percentile(latencies, 50), 3),
+        "p95_s": round(percentile(latencies, 95), 3),
+        "p99_s": round(percentile(latencies, 99), 3),
+        "max_s": round(max(latencies), 3) if latencies else 0.0
+    }
+    if server is not None:
+        results["server_responses"] = {str(status): count for status, count in sorted(server.counts.items())}
+        results["server_peak_in_flight"] = server.peak_in_flight
+
+    print("\nSummarization benchmark results")
+    for key, value in results.items():
+        print(f"  {key:<22} {value}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+"""Local stand-in for a Udemy course, for offline extractor benchmarks.
+
+Serves a login flow shaped like the IBM w3id screens the app automates and
+lecture pages with the markup the extractor targets: curriculum items with
+``data-purpose='item-title'``, a transcript toggle, ``transcript-cue`` cues and
+the ``go-to-next`` button.
+
+Run standalone:  python -m benchmarks.fake_udemy_site --lectures 20 --cues 150
+"""
+import json
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SESSION_COOKIE = "fake_udemy_session"
+COURSE_SLUG = "fake-benchmark-course"
+COURSE_TITLE = "Fake Benchmark Course"
+WORDS = ("data", "pipeline", "query", "warehouse", "table", "index", "stream", "cluster", "schema", "cache",
+         "replication", "partition", "latency", "throughput", "storage", "compute", "snapshot", "commit")
+
+
+class FakeCourse:
+    """Deterministic course content: sections, lectures and transcript cues."""
+
+    def __init__(self, lectures=20, cues=150, lectures_per_section=5, seed=7):
+        rng = random.Random(seed)
+        self.lectures = []
+        for index in range(lectures):
+            lecture_id = 1000 + index
+            cue_texts = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 14))).capitalize() + "."
+                         for _ in range(cues)]
+            self.lectures.append({
+                "id": lecture_id,
+                "number": index + 1,
+                "title": f"{index + 1}. Lecture about {rng.choice(WORDS)} {rng.choice(WORDS)}",
+                "section": index // lectures_per_section + 1,
+                "duration_min": max(1, cues // 15),
+                "cues": cue_texts
+            })
+
+    def lecture(self, lecture_id):
+        for position, lecture in enumerate(self.lectures):
+            if lecture["id"] == lecture_id:
+                return position, lecture
+        return None, None
+
+    def lecture_url(self, lecture):
+        return f"/course/{COURSE_SLUG}/learn/lecture/{lecture['id']}"
+
+
+PAGE_STYLE = """
+<style>
+body { font-family: sans-serif; margin: 0; display: flex; }
+.sidebar { width: 360px; height: 100vh; overflow-y: auto; border-right: 1px solid #ccc; }
+.main { flex: 1; padding: 16px; }
+.transcript--transcript-panel--1EX49 { display: none; height: 400px; overflow-y: auto; border: 1px solid #ccc; }
+.transcript--transcript-panel--1EX49.open { display: block; }
+.curriculum-item-link--is-current--2mKk4 { background: #eef; }
+</style>
+"""
+
+
+def render_course_page(course):
+    first = course.lecture_url(course.lectures[0])
+    return f"""<!DOCTYPE html><html><head><title>{COURSE_TITLE} | Udemy</title>{PAGE_STYLE}</head>
+<body><div class="main course-content">
+<h1 data-purpose="course-header-title">{COURSE_TITLE}</h1>
+<button data-purpose="start-course" onclick="window.location.href='{first}'">Start course</button>
+</div></body></html>"""
+
+
+def render_landing_page():
+    return f"""<!DOCTYPE html><html><head><title>{COURSE_TITLE} | Udemy</title></head>
+<body><header><a class="header-login" data-purpose="header-login" href="/login">Log in</a></header>
+<h1>{COURSE_TITLE}</h1></body></html>"""
+
+
+def render_login_page(next_url):
+    return f"""<!DOCTYPE html><html><head><title>IBM Security Verify</title></head><body>
+<div id="credsDiv" onclick="document.getElementById('login-form').style.display='block'">w3id Credentials</div>
+<form id="login-form" method="post" action="/login" style="display:none">
+  <input type="hidden" name="next" value="{next_url}">
+  <input id="user-name-input" name="username" type="email">
+  <input id="password-input" name="password" type="password">
+  <button id="login-button" type="submit">Sign in</button>
+</form></body></html>"""
+
+
+def render_lecture_page(course, position, lecture, render_delay_ms):
+    items = []
+    for other in course.lectures:
+        current = other["id"] == lecture["id"]
+        css = "curriculum-item-link--curriculum-item--1KhyE"
+        current_attr = ""
+        if current:
+            css += " curriculum-item-link--is-current--2mKk4"
+            current_attr = ' aria-current="true"'
+        items.append(
+            f'<li class="{css}" data-purpose="curriculum-item-{other["section"]}-{other["number"]}"{current_attr}>'
+            f'<a href="{course.lecture_url(other)}"><span data-purpose="item-title">{other["title"]}</span></a>'
+            f'<svg><use xlink:href="#icon-video"></use></svg>'
+            f'<span class="curriculum-item-link--metadata">{other["duration_min"]}min</span></li>'
+        )
+
+    next_button = ""
+    if position + 1 < len(course.lectures):
+        next_url = course.lecture_url(course.lectures[position + 1])
+        next_button = (f'<div id="go-to-next-item" data-purpose="go-to-next" class="next-and-previous--next--8Avih"'
+                       f' onclick="window.location.href=\'{next_url}\'">Next</div>')
+
+    cues_json = json.dumps(lecture["cues"])
+    return f"""<!DOCTYPE html><html><head><title>{lecture['title']} | {COURSE_TITLE} | Udemy</title>{PAGE_STYLE}</head>
+<body>
+<div class="sidebar"><a data-purpose="course-title-link" href="/course/{COURSE_SLUG}/">{COURSE_TITLE}</a>
+<div data-purpose="section-title">Section {lecture['section']}: Benchmarks</div>
+<ul>{''.join(items)}</ul></div>
+<div class="main">
+<video data-purpose="video-player" data-duration="{lecture['duration_min'] * 60}"></video>
+<button data-purpose="transcript-toggle" aria-label="Transcript" onclick="toggleTranscript()">Transcript</button>
+{next_button}
+<div class="transcript--transcript-panel--1EX49" data-purpose="transcript-panel">
+<div class="transcript--cue-container--Vuwj6"></div></div>
+</div>
+<script>
+const CUES = {cues_json};
+function renderCues() {{
+  const container = document.querySelector('.transcript--cue-container--Vuwj6');
+  container.innerHTML = CUES.map((text, i) =>
+    '<p data-purpose="transcript-cue" data-index="' + i + '"><span data-purpose="cue-text">' + text + '</span></p>').join('');
+}}
+function openTranscript() {{
+  document.querySelector('.transcript--transcript-panel--1EX49').classList.add('open');
+  setTimeout(renderCues, {render_delay_ms});
+}}
+function toggleTranscript() {{
+  const panel = document.querySelector('.transcript--transcript-panel--1EX49');
+  if (panel.classList.contains('open')) {{
+    panel.classList.remove('open');
+    localStorage.setItem('transcriptOpen', '0');
+  }} else {{
+    localStorage.setItem('transcriptOpen', '1');
+    openTranscript();
+  }}
+}}
+// Like the real player, the panel stays open across lectures once opened
+if (localStorage.getItem('transcriptOpen') === '1') openTranscript();
+</script>
+</body></html>"""
+
+
+class FakeUdemySite:
+    """Threaded HTTP server hosting a FakeCourse on localhost."""
+
+    def __init__(self, lectures=20, cues=150, latency_ms=0, jitter_ms=0, render_delay_ms=0, port=0, host="127.0.0.1"):
+        self.course = FakeCourse(lectures=lectures, cues=cues)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.render_delay_ms = render_delay_ms
+        self.host = host
+        self.requests_served = 0
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.port = self._server.server_address[1]
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def course_url(self):
+        return f"{self.base_url}/course/{COURSE_SLUG}/"
+
+    @property
+    def first_lecture_url(self):
+        return self.base_url + self.course.lecture_url(self.course.lectures[0])
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-udemy-site", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _delay(self):
+        delay = self.latency_ms + (random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+        if delay:
+            time.sleep(delay / 1000.0)
+
+    def _make_handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _logged_in(self):
+                return f"{SESSION_COOKIE}=ok" in (self.headers.get("Cookie") or "")
+
+            def _send_html(self, body, status=200, headers=None):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _redirect(self, location, headers=None):
+                self.send_response(302)
+                self.send_header("Location", location)
+                self.send_header("Content-Length", "0")
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+
+            def do_GET(self):
+                site.requests_served += 1
+                site._delay()
+                parts = urlsplit(self.path)
+                path = parts.path.rstrip("/")
+
+                if path == "/login":
+                    next_url = parse_qs(parts.query).get("next", [f"/course/{COURSE_SLUG}/"])[0]
+                    self._send_html(render_login_page(next_url))
+                    return
+
+                if path == f"/course/{COURSE_SLUG}":
+                    self._send_html(render_course_page(site.course) if self._logged_in() else render_landing_page())
+                    return
+
+                prefix = f"/course/{COURSE_SLUG}/learn/lecture/"
+                if path.startswith(prefix):
+                    if not self._logged_in():
+                        self._redirect(f"/login?next={parts.path}")
+                        return
+                    try:
+                        position, lecture = site.course.lecture(int(path[len(prefix):]))
+                    except ValueError:
+                        position, lecture = None, None
+                    if lecture is None:
+                        self._send_html("<h1>Not found</h1>", status=404)
+                        return
+                    self._send_html(render_lecture_page(site.course, position, lecture, site.render_delay_ms))
+                    return
+
+                self._send_html(render_landing_page())
+
+            def do_POST(self):
+                site.requests_served += 1
+                site._delay()
+                length = int(self.headers.get("Content-Length") or 0)
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                if urlsplit(self.path).path == "/login" and form.get("username") and form.get("password"):
+                    next_url = form.get("next", [f"/course/{COURSE_SLUG}/"])[0]
+                    self._redirect(next_url, {"Set-Cookie": f"{SESSION_COOKIE}=ok; Path=/"})
+                    return
+                self._send_html(render_login_page(f"/course/{COURSE_SLUG}/"), status=401)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a fake Udemy course on localhost.")
+    parser.add_argument("--lectures", type=int, default=20)
+    parser.add_argument("--cues", type=int, default=150)
+    parser.add_argument("--latency-ms", type=int, default=0, help="Server-side delay added to every request")
+    parser.add_argument("--jitter-ms", type=int, default=0, help="Random extra delay up to this many ms")
+    parser.add_argument("--render-delay-ms", type=int, default=0, help="Delay before transcript cues render")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    site = FakeUdemySite(args.lectures, args.cues, args.latency_ms, args.jitter_ms, args.render_delay_ms,
+                         port=args.port).start()
+    print(f"Fake course at {site.course_url} (first lecture: {site.first_lecture_url})")
+    print("Log in with any username/password. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        site.stop()
+
+
+if __name__ == "__main__":
+    main()
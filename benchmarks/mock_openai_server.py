@@ -0,0 +1,245 @@
+"""Local OpenAI-compatible chat-completions server for offline summarization benchmarks.
+
+Answers ``POST /v1/chat/completions`` with a canned markdown summary after a
+configurable latency, and can inject 429 rate limits, 5xx errors and
+server-sent-event streaming. Reports ``prompt_tokens_details.cached_tokens``
+like OpenAI's automatic prompt caching: the longest prefix shared with a
+recent prompt, in 128-token steps, once it reaches ``cache_min_tokens``. Point the app at it with
+``OPENAI_API_BASE=http://127.0.0.1:8766/v1``.
+
+Run standalone:  python -m benchmarks.mock_openai_server --latency lognormal:800 --rate-429 0.1
+"""
+import os
+import json
+import math
+import time
+import random
+import argparse
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SUMMARY_TEMPLATE = """# {title}
+
+## Overview
+A synthetic summary generated by the local mock server.
+
+## Key Concepts
+- **Concept one**: placeholder explanation.
+- **Concept two**: placeholder explanation.
+
+---
+
+## Key Takeaways
+- 📌 The mock server answered this request after {latency_ms} ms.
+"""
+
+
+def parse_latency(spec):
+    """Parse a latency spec into a sampler returning seconds.
+
+    ``fixed:500``, ``uniform:200:900`` and ``lognormal:800[:0.5]`` (median ms, sigma) are supported.
+    """
+    kind, _, rest = spec.partition(":")
+    values = [float(v) for v in rest.split(":") if v]
+    if kind == "fixed":
+        return lambda rng: values[0] / 1000.0
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1]) / 1000.0
+    if kind == "lognormal":
+        median, sigma = values[0], values[1] if len(values) > 1 else 0.5
+        return lambda rng: rng.lognormvariate(math.log(median), sigma) / 1000.0
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class MockOpenAIServer:
+    """Threaded HTTP server that imitates the chat-completions endpoint."""
+
+    def __init__(self, latency="fixed:0", rate_429=0.0, rate_5xx=0.0, retry_after=None, max_concurrency=0,
+                 stream_chunks=20, port=0, host="127.0.0.1", seed=None, cache_min_tokens=1024):
+        self.sample_latency = parse_latency(latency)
+        self.rate_429 = rate_429
+        self.rate_5xx = rate_5xx
+        self.retry_after = retry_after
+        self.max_concurrency = max_concurrency  # above this many in-flight requests, answer 429
+        self.stream_chunks = stream_chunks
+        self.cache_min_tokens = cache_min_tokens
+        self._recent_prompts = deque(maxlen=64)
+        self.host = host
+        self.counts = {}
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self.port = self._server.server_address[1]
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}/v1"
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="mock-openai", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _count(self, status):
+        with self._lock:
+            self.counts[status] = self.counts.get(status, 0) + 1
+
+    def _usage(self, messages, content):
+        """Token usage (about 4 characters a token) with the cached share of the prompt."""
+        prompt = json.dumps(messages, ensure_ascii=False)
+        # Compare outside the lock so concurrent benchmark requests don't run one at a time
+        with self._lock:
+            recent = list(self._recent_prompts)
+            self._recent_prompts.append(prompt)
+        shared = max((len(os.path.commonprefix([prompt, previous])) for previous in recent), default=0)
+        prompt_tokens = len(prompt) // 4
+        cached = (shared // 4) // 128 * 128
+        if cached < self.cache_min_tokens:
+            cached = 0
+        completion_tokens = len(content) // 4
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": cached}}
+
+    def _decide(self):
+        """Pick (status, latency seconds) for the next request."""
+        with self._lock:
+            roll = self._rng.random()
+            latency = self.sample_latency(self._rng)
+            overloaded = self.max_concurrency and self.in_flight >= self.max_concurrency
+        if overloaded or roll < self.rate_429:
+            return 429, 0.01
+        if roll < self.rate_429 + self.rate_5xx:
+            return self._rng.choice((500, 502, 503)), latency / 2
+        return 200, latency
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _send_json(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, model, content, latency, usage=None):
+                """Send content as SSE chunks spread over the latency budget."""
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                pieces = max(1, server.stream_chunks)
+                step = math.ceil(len(content) / pieces)
+                for index in range(0, len(content), step):
+                    time.sleep(latency / pieces)
+                    chunk = {"object": "chat.completion.chunk", "model": model,
+                             "choices": [{"index": 0, "delta": {"content": content[index:index + step]}}]}
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+                if usage is not None:
+                    chunk = {"object": "chat.completion.chunk", "model": model, "choices": [], "usage": usage}
+                    self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+                self._write_chunk("data: [DONE]\n\n")
+                self.wfile.write(b"0\r\n\r\n")
+
+            def _write_chunk(self, text):
+                data = text.encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._count_and_send(400, {"error": {"message": "Invalid JSON body"}})
+                    return
+                if not self.path.rstrip("/").endswith("/chat/completions"):
+                    self._count_and_send(404, {"error": {"message": "Unknown endpoint"}})
+                    return
+
+                with server._lock:
+                    server.in_flight += 1
+                    server.peak_in_flight = max(server.peak_in_flight, server.in_flight)
+                try:
+                    status, latency = server._decide()
+                    if status == 429:
+                        headers = {"Retry-After": str(server.retry_after)} if server.retry_after is not None else {}
+                        self._count_and_send(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                                             headers)
+                        return
+                    time.sleep(latency)
+                    if status != 200:
+                        self._count_and_send(status, {"error": {"message": "Mock upstream error", "type": "server_error"}})
+                        return
+
+                    model = body.get("model", "mock-model")
+                    messages = body.get("messages") or [{}]
+                    prompt = messages[-1].get("content", "")
+                    title = prompt.split("The lecture title is:", 1)[-1].split("\n", 1)[0].strip(" .") or "Lecture"
+                    content = SUMMARY_TEMPLATE.format(title=title, latency_ms=int(latency * 1000))
+                    server._count(200)
+                    usage = server._usage(messages, content)
+                    if body.get("stream"):
+                        include_usage = (body.get("stream_options") or {}).get("include_usage")
+                        self._stream(model, content, latency, usage if include_usage else None)
+                        return
+                    self._send_json(200, {
+                        "id": f"chatcmpl-mock-{int(time.time() * 1000)}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": model,
+                        "choices": [{"index": 0, "finish_reason": "stop",
+                                     "message": {"role": "assistant", "content": content}}],
+                        "usage": usage
+                    })
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+
+            def _count_and_send(self, status, payload, headers=None):
+                server._count(status)
+                self._send_json(status, payload, headers)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a mock OpenAI chat-completions endpoint on localhost.")
+    parser.add_argument("--latency", default="lognormal:800", help="fixed:MS, uniform:MIN:MAX or lognormal:MEDIAN[:SIGMA]")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-5xx", type=float, default=0.0, help="Fraction of requests answered with 500/502/503")
+    parser.add_argument("--retry-after", type=float, help="Retry-After seconds sent with 429 responses")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="Answer 429 above this many in-flight requests")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    server = MockOpenAIServer(args.latency, args.rate_429, args.rate_5xx, args.retry_after, args.max_concurrency,
+                              port=args.port).start()
+    print(f"Mock chat completions at {server.base_url}/chat/completions")
+    print(f"Use it with: OPENAI_API_BASE={server.base_url}. Press Ctrl+C to stop.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        print(f"Responses served: {server.counts}")
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
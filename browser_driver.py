@@ -0,0 +1,191 @@
+import re
+from abc import ABC, abstractmethod
+
+# Selectors shared by every engine (kept in the same order the Selenium extractor tries them)
+TRANSCRIPT_TOGGLE_SELECTORS = [
+    "button[data-purpose='transcript-toggle']",
+    "button[aria-label='Transcript']",
+    "[aria-label*='Transcript']",
+    "[data-purpose='captions-toggle-button']",
+]
+TRANSCRIPT_PANEL_SELECTORS = [
+    ".transcript--transcript-panel--1EX49",
+    ".transcript--cue-container--Vuwj6",
+    "[data-purpose='transcript-cue']",
+]
+CUE_SELECTORS = [
+    "div.transcript--cue-container--Vuwj6 p[data-purpose='transcript-cue'] span[data-purpose='cue-text']",
+    "[data-purpose='transcript-cue'] span",
+    ".transcript--transcript-panel--1EX49 p",
+]
+COURSE_TITLE_SELECTOR = ("a[data-purpose='course-title-link'], .course-title--course-title--3r1sL, .ud-heading-xl, "
+                         "[data-purpose='course-header-title'], h1")
+CURRENT_LECTURE_TITLE_SELECTOR = ("li[aria-current='true'] [data-purpose='item-title'], "
+                                  "li[class*='is-current'] [data-purpose='item-title']")
+LECTURE_LINK_SELECTOR = "a[href*='/learn/lecture/']"
+
+
+def lecture_id_from_url(url):
+    """Return the numeric lecture id from a lecture URL, or None."""
+    match = re.search(r'/lecture/(\d+)', url or "")
+    return match.group(1) if match else None
+
+
+def course_title_from_page_title(page_title):
+    """Strip suffixes like "| Udemy" from a document title."""
+    return re.sub(r'\s*\|.*$', '', page_title or "").strip()
+
+
+class BrowserDriver(ABC):
+    """Engine-neutral surface of a browser tab used by the extraction pipeline.
+
+    Adapters exist for Selenium WebDriver and the sync Playwright ``Page``; the async
+    Playwright engine (playwright_engine.py) implements the same methods as coroutines.
+    """
+
+    is_playwright = False
+
+    @abstractmethod
+    def goto(self, url):
+        pass
+
+    @property
+    @abstractmethod
+    def current_url(self):
+        pass
+
+    @property
+    @abstractmethod
+    def title(self):
+        pass
+
+    @abstractmethod
+    def query_texts(self, selector):
+        """Visible text of every element matching a CSS selector."""
+
+    @abstractmethod
+    def exists(self, selector):
+        pass
+
+    @abstractmethod
+    def click_first(self, selectors):
+        """Click the first element matching any of the selectors; returns the selector used or None."""
+
+    @abstractmethod
+    def wait_for(self, selector, timeout=10):
+        """Wait until selector matches; returns False on timeout."""
+
+    @abstractmethod
+    def evaluate(self, script, arg=None):
+        """Run a JavaScript function body with ``arg`` and return its result."""
+
+    @abstractmethod
+    def quit(self):
+        pass
+
+
+class SeleniumDriver(BrowserDriver):
+    """BrowserDriver over a Selenium WebDriver."""
+
+    def __init__(self, driver):
+        from selenium.webdriver.common.by import By
+        self.driver = driver
+        self._by = By
+
+    def goto(self, url):
+        self.driver.get(url)
+
+    @property
+    def current_url(self):
+        return self.driver.current_url
+
+    @property
+    def title(self):
+        return self.driver.title
+
+    def query_texts(self, selector):
+        # One script round trip instead of one per element
+        return self.driver.execute_script(
+            "return Array.from(document.querySelectorAll(arguments[0]), e => e.innerText.trim());", selector)
+
+    def exists(self, selector):
+        return bool(self.driver.find_elements(self._by.CSS_SELECTOR, selector))
+
+    def click_first(self, selectors):
+        for selector in selectors:
+            elements = self.driver.find_elements(self._by.CSS_SELECTOR, selector)
+            if elements:
+                self.driver.execute_script("arguments[0].click();", elements[0])
+                return selector
+        return None
+
+    def wait_for(self, selector, timeout=10):
+        from selenium.webdriver.support.ui import WebDriverWait
+        try:
+            WebDriverWait(self.driver, timeout).until(lambda d: d.find_elements(self._by.CSS_SELECTOR, selector))
+            return True
+        except Exception:
+            return False
+
+    def evaluate(self, script, arg=None):
+        return self.driver.execute_script(f"return (function(arg) {{ {script} }})(arguments[0]);", arg)
+
+    def quit(self):
+        self.driver.quit()
+
+
+class PlaywrightSyncDriver(BrowserDriver):
+    """BrowserDriver over a sync Playwright Page (locators auto-wait for elements)."""
+
+    is_playwright = True
+
+    def __init__(self, page):
+        self.page = page
+
+    def goto(self, url):
+        self.page.goto(url, wait_until="domcontentloaded")
+
+    @property
+    def current_url(self):
+        return self.page.url
+
+    @property
+    def title(self):
+        return self.page.title()
+
+    def query_texts(self, selector):
+        return [text.strip() for text in self.page.locator(selector).all_inner_texts()]
+
+    def exists(self, selector):
+        return self.page.locator(selector).count() > 0
+
+    def click_first(self, selectors):
+        for selector in selectors:
+            locator = self.page.locator(selector).first
+            if locator.count():
+                locator.click()
+                return selector
+        return None
+
+    def wait_for(self, selector, timeout=10):
+        try:
+            self.page.locator(selector).first.wait_for(timeout=timeout * 1000)
+            return True
+        except Exception:
+            return False
+
+    def evaluate(self, script, arg=None):
+        return self.page.evaluate(f"(arg) => {{ {script} }}", arg)
+
+    def quit(self):
+        self.page.close()
+        self.page.context.browser.close()
+
+
+def as_browser_driver(driver):
+    """Wrap a Selenium driver or Playwright page (or pass through a BrowserDriver)."""
+    if isinstance(driver, BrowserDriver):
+        return driver
+    if hasattr(driver, "goto"):
+        return PlaywrightSyncDriver(driver)
+    return SeleniumDriver(driver)
@@ -0,0 +1,223 @@
+import os
+import copy
+import json
+import time
+import queue
+import shutil
+import threading
+from selenium import webdriver
+from selenium.webdriver.chrome.service import Service
+from selenium.common.exceptions import SessionNotCreatedException
+
+# Resolved chromedriver path and the launch strategy that last worked, shared by every run on this host
+STATE_PATH = os.environ.get("UDEMY_BROWSER_STATE",
+                            os.path.join(os.path.expanduser("~"), ".cache", "udemy_transcripts", "browser_startup.json"))
+# How long a resolved chromedriver is trusted before webdriver-manager is asked again
+DRIVER_CACHE_TTL = float(os.environ.get("UDEMY_DRIVER_CACHE_TTL", 7 * 24 * 60 * 60))
+# Tried in this order, except that the strategy that worked last time goes first
+LAUNCH_STRATEGIES = ("cached_driver", "system_chrome", "playwright")
+
+_state_lock = threading.Lock()
+_resolved_driver = None
+
+
+def _load_state():
+    try:
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_state(**values):
+    with _state_lock:
+        state = _load_state()
+        state.update(values)
+        try:
+            os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+            tmp_path = f"{STATE_PATH}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, indent=2)
+            os.replace(tmp_path, STATE_PATH)
+        except OSError as e:
+            print(f"Could not save browser startup state: {str(e)}")
+
+
+def resolve_chromedriver(refresh=False):
+    """Path of a chromedriver binary, resolved once per host and cached.
+
+    CHROMEDRIVER_PATH wins, then a still-valid cached path, then a chromedriver on
+    PATH, and only then webdriver-manager (which does version checks and downloads).
+    """
+    global _resolved_driver
+    explicit = os.environ.get("CHROMEDRIVER_PATH")
+    if explicit:
+        return explicit
+    if _resolved_driver and not refresh and os.path.exists(_resolved_driver):
+        return _resolved_driver
+
+    state = _load_state()
+    cached = state.get("chromedriver")
+    if (not refresh and cached and os.path.exists(cached.get("path", ""))
+            and time.time() - cached.get("resolved_at", 0) < DRIVER_CACHE_TTL):
+        _resolved_driver = cached["path"]
+        return _resolved_driver
+
+    path = None if refresh else shutil.which("chromedriver")
+    if not path:
+        from webdriver_manager.chrome import ChromeDriverManager
+        path = ChromeDriverManager().install()
+    _resolved_driver = path
+    _update_state(chromedriver={"path": path, "resolved_at": time.time()})
+    return path
+
+
+def _launch_cached_driver(options):
+    try:
+        return webdriver.Chrome(service=Service(resolve_chromedriver()), options=options)
+    except SessionNotCreatedException as e:
+        # Chrome may have auto-updated past the cached driver; only then is resolving again worth a download
+        if "version" not in str(e).lower():
+            raise
+        print(f"Cached chromedriver does not match Chrome ({str(e).splitlines()[0]}), resolving it again...")
+        return webdriver.Chrome(service=Service(resolve_chromedriver(refresh=True)), options=options)
+
+
+def _launch_system_chrome(options):
+    # Work on a copy: the caller's options go on to the next strategy if this one fails
+    options = copy.deepcopy(options)
+    options.binary_location = "/usr/bin/google-chrome"  # Common path in cloud environments
+    return webdriver.Chrome(options=options)
+
+
+def _launch_playwright(options):
+    from playwright.sync_api import sync_playwright
+    playwright = sync_playwright().start()
+    browser = playwright.chromium.launch(headless=True)
+    context = browser.new_context()
+    return context.new_page()
+
+
+_LAUNCHERS = {
+    "cached_driver": _launch_cached_driver,
+    "system_chrome": _launch_system_chrome,
+    "playwright": _launch_playwright,
+}
+
+
+def launch_browser(options, strategies=LAUNCH_STRATEGIES):
+    """Start a browser with the first strategy that works, trying last run's winner first."""
+    remembered = _load_state().get("launch_strategy")
+    ordered = list(strategies)
+    if remembered in ordered:
+        ordered.remove(remembered)
+        ordered.insert(0, remembered)
+
+    errors = []
+    for name in ordered:
+        try:
+            driver = _LAUNCHERS[name](options)
+        except Exception as e:
+            print(f"Browser launch strategy '{name}' failed: {str(e)}")
+            errors.append(f"{name}: {str(e)}")
+            continue
+        if name != remembered:
+            _update_state(launch_strategy=name)
+        return driver
+    raise Exception("All browser initialization attempts failed: " + "; ".join(errors))
+
+
+class BrowserPool:
+    """Keeps a few pre-launched browsers ready so a job starts without a cold browser launch.
+
+    Browsers are handed out once and never returned; the pool refills itself in the
+    background. Playwright pages are tied to the thread that created them, so when
+    the factory falls back to Playwright the pool stops pre-launching and browsers
+    are created by the caller instead.
+    """
+
+    def __init__(self, factory, size=1, max_idle=30 * 60):
+        self.factory = factory
+        self.size = size
+        self.max_idle = max_idle
+        self.enabled = size > 0
+        self._idle = queue.Queue()
+        self._closed = False
+        self._warming = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Begin pre-launching browsers in the background."""
+        for _ in range(self.size):
+            self._refill()
+        return self
+
+    def _refill(self):
+        with self._lock:
+            if self._closed or not self.enabled or self._idle.qsize() + self._warming >= self.size:
+                return
+            self._warming += 1
+        threading.Thread(target=self._warm_one, name="browser-prewarm", daemon=True).start()
+
+    def _warm_one(self):
+        driver = None
+        try:
+            driver = self.factory()
+        except Exception as e:
+            print(f"Could not pre-launch a browser: {str(e)}")
+        finally:
+            with self._lock:
+                self._warming -= 1
+        if driver is None:
+            return
+        if hasattr(driver, "goto"):
+            print("Browser fallback is Playwright, which cannot be handed across threads; pre-warming disabled.")
+            self.enabled = False
+            self._quit(driver)
+            return
+        if self._closed:
+            self._quit(driver)
+            return
+        self._idle.put((driver, time.monotonic()))
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            if hasattr(driver, "goto"):
+                driver.context.browser.close()
+            else:
+                driver.quit()
+        except Exception:
+            pass
+
+    def acquire(self):
+        """Hand out a warm, healthy browser, or launch one now if none is ready."""
+        while True:
+            try:
+                driver, launched_at = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                if time.monotonic() - launched_at > self.max_idle:
+                    raise Exception("idle too long")
+                driver.window_handles  # one round trip: is the browser still alive?
+            except Exception:
+                self._quit(driver)
+                continue
+            self._refill()
+            return driver
+        self._refill()
+        return self.factory()
+
+    def stats(self):
+        return {"idle": self._idle.qsize(), "warming": self._warming, "size": self.size, "enabled": self.enabled}
+
+    def shutdown(self):
+        """Quit every idle browser and stop refilling."""
+        self._closed = True
+        while True:
+            try:
+                driver, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            self._quit(driver)
@@ -0,0 +1,231 @@
+import os
+import sys
+import time
+import queue
+import threading
+
+# Wall-clock limits, overridable per deployment
+DEFAULT_JOB_TIMEOUT = float(os.environ.get("UDEMY_JOB_TIMEOUT", 6 * 60 * 60))
+DEFAULT_LECTURE_TIMEOUT = float(os.environ.get("UDEMY_LECTURE_TIMEOUT", 10 * 60))
+
+
+class JobCancelled(BaseException):
+    """Raised at a cancellation point once a job was cancelled or ran out of time.
+
+    Derives from BaseException (like KeyboardInterrupt) so the many broad
+    ``except Exception`` fallbacks in the extractor do not swallow it.
+    """
+
+
+class DeadlineExceeded(JobCancelled):
+    """Raised when a job or lecture deadline has passed."""
+
+
+class CancellationToken:
+    """Cooperative cancellation flag with an optional deadline.
+
+    Long-running code calls ``raise_if_cancelled()`` / ``sleep()`` at safe points.
+    Callbacks registered with ``on_cancel`` run once on cancellation, which is how
+    browsers are quit and blocking calls are released promptly.
+    """
+
+    def __init__(self, timeout=None, parent=None):
+        self.parent = parent
+        self.reason = None
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._timer = None
+        self._unlink_parent = None
+
+        if parent is not None:
+            self._unlink_parent = parent.on_cancel(lambda: self.cancel(parent.reason))
+        if timeout:
+            # Fire callbacks at the deadline even if nobody reaches a cancellation point
+            self._timer = threading.Timer(timeout, self._expire)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _expire(self):
+        self.cancel("Deadline exceeded")
+
+    def cancel(self, reason="Cancelled by user"):
+        """Cancel the token and run the registered callbacks."""
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.reason = reason
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"Cancellation callback failed: {str(e)}")
+
+    def on_cancel(self, callback):
+        """Register a callback; returns a function that unregisters it."""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return lambda: self._remove_callback(callback)
+        callback()
+        return lambda: None
+
+    def _remove_callback(self, callback):
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    @property
+    def cancelled(self):
+        if self._event.is_set():
+            return True
+        if self.parent is not None and self.parent.cancelled:
+            self.cancel(self.parent.reason)
+            return True
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel("Deadline exceeded")
+            return True
+        return False
+
+    def remaining(self):
+        """Seconds left before the nearest deadline, or None without a deadline."""
+        limits = []
+        token = self
+        while token is not None:
+            if token.deadline is not None:
+                limits.append(token.deadline - time.monotonic())
+            token = token.parent
+        return max(0.0, min(limits)) if limits else None
+
+    def timeout_for(self, default):
+        """Clamp a timeout (e.g. for an HTTP request) to the remaining deadline."""
+        remaining = self.remaining()
+        return default if remaining is None else max(0.1, min(default, remaining))
+
+    def raise_if_cancelled(self):
+        """Cancellation point: raise if the token is cancelled or expired."""
+        if self.cancelled:
+            if self.reason == "Deadline exceeded":
+                raise DeadlineExceeded(self.reason)
+            raise JobCancelled(self.reason)
+
+    def sleep(self, seconds):
+        """Sleep that wakes up immediately on cancellation."""
+        self.raise_if_cancelled()
+        self._event.wait(self.timeout_for(seconds) if seconds > 0 else 0)
+        self.raise_if_cancelled()
+
+    def child(self, timeout=None):
+        """Token that is cancelled with this one and may have its own, shorter deadline."""
+        return CancellationToken(timeout=timeout, parent=self)
+
+    def close(self):
+        """Release the deadline timer and the link to the parent token."""
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._unlink_parent is not None:
+            self._unlink_parent()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def run_cancellable(func, token, *args, abort=None, **kwargs):
+    """Run a blocking call in a helper thread and stop waiting for it on cancellation.
+
+    ``abort`` is called on cancellation to stop the call itself (e.g. cut off its
+    HTTP connection); without it the abandoned call keeps running in the
+    background until its own timeout. Either way the caller is released immediately.
+    """
+    token.raise_if_cancelled()
+    outcome = {}
+    done = threading.Event()
+
+    def target():
+        try:
+            outcome["result"] = func(*args, **kwargs)
+        except BaseException as e:
+            outcome["error"] = e
+        finally:
+            done.set()
+
+    def on_cancel():
+        done.set()
+        if abort is not None:
+            abort()
+
+    threading.Thread(target=target, daemon=True).start()
+    unregister = token.on_cancel(on_cancel)
+    try:
+        done.wait()
+    finally:
+        unregister()
+    token.raise_if_cancelled()
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
+
+
+# One reader thread owns stdin for the whole process; prompts take lines from its queue, so a prompt
+# that timed out or was cancelled does not leave a blocked readline() behind to steal the next answer
+_stdin_lines = queue.Queue()
+_stdin_reader = None
+_stdin_closed = threading.Event()
+_stdin_lock = threading.Lock()
+
+
+def _read_stdin():
+    while True:
+        try:
+            line = sys.stdin.readline()
+        except Exception:
+            line = ""
+        if not line:
+            _stdin_closed.set()
+            return
+        _stdin_lines.put(line)
+
+
+def _start_stdin_reader():
+    global _stdin_reader
+    with _stdin_lock:
+        if _stdin_reader is None:
+            _stdin_reader = threading.Thread(target=_read_stdin, name="stdin-reader", daemon=True)
+            _stdin_reader.start()
+
+
+def cancellable_input(prompt, token, timeout=None):
+    """input() that returns early on cancellation or, if given, after timeout seconds.
+
+    Returns an empty string when the prompt times out (or stdin is closed) so callers
+    fall back to their defaults. Lines typed before the prompt was shown are discarded.
+    """
+    _start_stdin_reader()
+    while True:
+        try:
+            _stdin_lines.get_nowait()
+        except queue.Empty:
+            break
+    if prompt:
+        print(prompt, end="", flush=True)
+    wait = token.timeout_for(timeout) if timeout else token.remaining()
+    deadline = time.monotonic() + wait if wait is not None else None
+    while True:
+        token.raise_if_cancelled()
+        if _stdin_closed.is_set() and _stdin_lines.empty():
+            return ""
+        left = None if deadline is None else deadline - time.monotonic()
+        if left is not None and left <= 0:
+            print("\nNo answer received, continuing with the default.")
+            return ""
+        try:
+            return _stdin_lines.get(timeout=0.25 if left is None else min(0.25, left)).rstrip("\n")
+        except queue.Empty:
+            continue
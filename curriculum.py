@@ -0,0 +1,124 @@
+import re
+from browser_driver import as_browser_driver
+
+# Curriculum sidebar entries (Udemy marks them data-purpose="curriculum-item-<section>-<index>")
+CURRICULUM_ITEM_SELECTOR = "[data-purpose^='curriculum-item-']"
+# Elements that only exist on one kind of lecture page
+PAGE_TYPE_SELECTORS = {
+    "video": ["video", "[data-purpose='video-player']", "[class*='video-player--container']"],
+    "article": ["[data-purpose='article-content']", "[class*='article-asset--content']", "[class*='text-viewer']"],
+    "quiz": ["[data-purpose='quiz-container']", "[class*='quiz-view']", "[class*='mc-quiz']",
+             "[class*='practice-test']"],
+    "exercise": ["[class*='coding-exercise']", "[data-purpose='coding-exercise']", "[class*='assignment-view']"],
+}
+ARTICLE_BODY_SELECTORS = ["[data-purpose='article-content']", "[class*='article-asset--content']",
+                          "[class*='text-viewer--content']"]
+# Icon names, URL parts and title prefixes that give an item's type away, most specific first
+ICON_TYPES = [("video", "video"), ("play", "video"), ("article", "article"), ("text", "article"),
+              ("quiz", "quiz"), ("question", "quiz"), ("code", "exercise"), ("exercise", "exercise"),
+              ("assignment", "exercise"), ("lab", "exercise"), ("download", "resource"), ("file", "resource"),
+              ("link", "resource")]
+URL_TYPES = [("/learn/quiz/", "quiz"), ("/learn/practice-test/", "quiz"), ("/learn/coding-exercise/", "exercise"),
+             ("/learn/assignment/", "exercise"), ("/learn/lab/", "exercise")]
+TITLE_TYPES = [(r'^(quiz|practice test)\s*\d*\s*:', "quiz"), (r'^(coding exercise|assignment)\s*\d*\s*:', "exercise")]
+# Items that have no transcript and no article text worth capturing
+SKIPPED_TYPES = {"quiz", "exercise", "resource"}
+
+LECTURE_PAGE_SCRIPT = """
+const [itemSelector, pageSelectors, articleSelectors] = arg;
+const text = el => el ? el.innerText.trim() : '';
+const items = Array.from(document.querySelectorAll(itemSelector), item => {
+    const link = item.querySelector('a[href]') || item.closest('a[href]');
+    const use = item.querySelector('svg use');
+    return {
+        title: text(item.querySelector("[data-purpose='item-title']")),
+        href: link ? link.href : '',
+        icon: use ? (use.getAttribute('xlink:href') || use.getAttribute('href') || '') : '',
+        meta: text(item.querySelector("[class*='metadata'], [class*='bottom-row']")),
+        current: item.getAttribute('aria-current') === 'true' || /is-current|--active/.test(item.className)
+            || !!item.querySelector("[aria-current='true']")
+    };
+});
+const present = {};
+for (const [type, selectors] of Object.entries(pageSelectors)) {
+    present[type] = !!document.querySelector(selectors.join(', '));
+}
+const article = document.querySelector(articleSelectors.join(', '));
+return {items: items, present: present, article_text: article ? article.innerText : ''};
+"""
+
+
+def parse_duration(text):
+    """Seconds in an item's metadata ("5min", "1hr 5min", "12:34"), or None."""
+    text = (text or "").lower()
+    clock = re.search(r'\b(?:(\d+):)?(\d{1,2}):(\d{2})\b', text)
+    if clock:
+        hours, minutes, seconds = clock.groups()
+        return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+    hours = re.search(r'(\d+)\s*h', text)
+    minutes = re.search(r'(\d+)\s*min', text)
+    if hours or minutes:
+        return (int(hours.group(1)) * 3600 if hours else 0) + (int(minutes.group(1)) * 60 if minutes else 0)
+    return None
+
+
+def classify_item(item):
+    """Add "type" (video, article, quiz, exercise, resource or unknown) and "duration" to a curriculum item."""
+    item = dict(item)
+    icon = (item.get("icon") or "").lower()
+    href = item.get("href") or ""
+    title = re.sub(r'^\d+\.\s*', '', item.get("title") or "").lower()
+    # Whole icon-name tokens only: "lab" must not match "#icon-label", nor "play" "#icon-display"
+    icon_tokens = set(re.split(r'[-#_/.\s]+', icon))
+    item_type = next((t for part, t in URL_TYPES if part in href), None)
+    if item_type is None:
+        item_type = next((t for name, t in ICON_TYPES if name in icon_tokens), None)
+    if item_type is None:
+        item_type = next((t for pattern, t in TITLE_TYPES if re.match(pattern, title)), "unknown")
+    item["type"] = item_type
+    item["duration"] = parse_duration(item.get("meta"))
+    return item
+
+
+def page_type(present):
+    """Lecture type from which kind of content element the page shows, or "unknown"."""
+    for item_type in ("quiz", "exercise", "article", "video"):
+        if present.get(item_type):
+            return item_type
+    return "unknown"
+
+
+def read_lecture_page(driver):
+    """Classified curriculum, page type and article text of the open lecture, in one script call."""
+    raw = as_browser_driver(driver).evaluate(
+        LECTURE_PAGE_SCRIPT, [CURRICULUM_ITEM_SELECTOR, PAGE_TYPE_SELECTORS, ARTICLE_BODY_SELECTORS])
+    return raw_lecture_page(raw)
+
+
+def raw_lecture_page(raw):
+    """lecture_page() from the result of LECTURE_PAGE_SCRIPT."""
+    return lecture_page(raw.get("items") or [], raw.get("present") or {}, raw.get("article_text") or "")
+
+
+def lecture_page(items, present, article_text):
+    """Classified items plus the current lecture's type, duration and article lines."""
+    items = [classify_item(item) for item in items]
+    current = next((item for item in items if item.get("current")), None)
+    # The sidebar knows the type of the current item best; the page content is the fallback
+    item_type = current["type"] if current and current["type"] != "unknown" else page_type(present)
+    return {
+        "items": items,
+        "current": current,
+        "type": item_type,
+        "duration": current["duration"] if current else None,
+        "article_lines": [line.strip() for line in article_text.split("\n") if line.strip()],
+    }
+
+
+def summarize_curriculum(items):
+    """Counts per item type and total video duration, e.g. for a run header."""
+    counts = {}
+    for item in items:
+        counts[item["type"]] = counts.get(item["type"], 0) + 1
+    video_seconds = sum(item["duration"] or 0 for item in items if item["type"] == "video")
+    return counts, video_seconds
@@ -0,0 +1,191 @@
+import os
+import sys
+import time
+import argparse
+import threading
+from batch_runner import (BatchQueue, BATCH_DB_PATH, LEASE_SECONDS, HEARTBEAT_SECONDS, extract_course,
+                          load_course_file, default_worker_id)
+from cancellation import CancellationToken, JobCancelled, DEFAULT_JOB_TIMEOUT
+
+MAX_ATTEMPTS = int(os.environ.get("UDEMY_MAX_ATTEMPTS", 3))
+
+
+class Worker:
+    """Claims courses from a shared BatchQueue under a lease and extracts them.
+
+    Any number of workers, on any number of hosts, can share one queue: the
+    SQLite file lives on a shared volume (which must support POSIX file locks),
+    and so do ``udemy_transcripts`` and the saved login session, so every worker
+    writes into the same layout and only one manual login is ever needed.
+    ``run_course(course, token)`` returns (status, lectures, error) and defaults
+    to the non-interactive extractor.
+    """
+
+    def __init__(self, queue, worker_id=None, lease=LEASE_SECONDS, heartbeat=HEARTBEAT_SECONDS,
+                 max_attempts=MAX_ATTEMPTS, run_course=None, exit_when_done=False, poll=5):
+        self.queue = queue
+        self.worker_id = worker_id or default_worker_id()
+        self.lease = lease
+        self.heartbeat = heartbeat
+        self.max_attempts = max_attempts
+        self.run_course = run_course or extract_course
+        self.exit_when_done = exit_when_done
+        self.poll = poll
+        self.cancel_token = CancellationToken()
+        self.completed = 0
+
+    def _keep_lease(self, course, token, stop):
+        while not stop.wait(self.heartbeat):
+            try:
+                alive = self.queue.heartbeat(course["id"], self.worker_id, self.lease)
+            except Exception as e:
+                # A missed heartbeat is fine as long as a later one lands before the lease expires
+                print(f"[{self.worker_id}] Heartbeat failed: {str(e)}")
+                continue
+            if not alive:
+                print(f"[{self.worker_id}] Lost the lease on course {course['id']}, stopping it.")
+                token.cancel("Lease lost")
+                return
+
+    def process(self, course):
+        """Run one claimed course while heartbeating its lease, then record the outcome."""
+        print(f"[{self.worker_id}] Claimed course {course['id']}: {course['url']} (attempt {course['attempts']})")
+        started = time.time()
+        stop = threading.Event()
+        with self.cancel_token.child(DEFAULT_JOB_TIMEOUT) as token:
+            keeper = threading.Thread(target=self._keep_lease, args=(course, token, stop),
+                                      name="lease-heartbeat", daemon=True)
+            keeper.start()
+            try:
+                status, lectures, error = self.run_course(course, token)
+            except JobCancelled:
+                status, lectures, error = None, 0, token.reason
+            except KeyboardInterrupt:
+                self.queue.release(course["id"], worker=self.worker_id)
+                raise
+            except Exception as e:
+                status, lectures, error = "failed", 0, str(e)
+            finally:
+                stop.set()
+                keeper.join()
+
+        if status is None:
+            if token.reason != "Lease lost":
+                # Shut down or timed out here: hand the course to another worker right away
+                self.queue.release(course["id"], worker=self.worker_id)
+            print(f"[{self.worker_id}] Course {course['id']} interrupted: {error}")
+            return
+        if self.queue.finish(course["id"], status, lectures, error, worker=self.worker_id):
+            self.completed += 1
+            print(f"[{self.worker_id}] Course {course['id']} {status}: {lectures} lectures "
+                  f"in {time.time() - started:.0f}s")
+        else:
+            print(f"[{self.worker_id}] Course {course['id']} finished after its lease was reclaimed; "
+                  f"the result was not recorded.")
+
+    def run(self):
+        """Claim and process courses until stopped (or, with exit_when_done, until the queue is drained)."""
+        print(f"[{self.worker_id}] Worker started (lease {self.lease:.0f}s, heartbeat {self.heartbeat:.0f}s)")
+        while not self.cancel_token.cancelled:
+            self.queue.reclaim_expired(self.max_attempts)
+            course = self.queue.claim(self.worker_id, lease=self.lease)
+            if course is not None:
+                self.process(course)
+                continue
+            counts = self.queue.counts()
+            if self.exit_when_done and counts["pending"] == 0 and counts["running"] == 0:
+                break
+            try:
+                self.cancel_token.sleep(self.poll)
+            except JobCancelled:
+                break
+        print(f"[{self.worker_id}] Worker exiting after {self.completed} courses.")
+
+    def stop(self, reason="Worker stopped"):
+        self.cancel_token.cancel(reason)
+
+
+class Coordinator:
+    """Fills the shared queue, reclaims expired leases and reports progress until the batch is drained."""
+
+    def __init__(self, queue, max_attempts=MAX_ATTEMPTS, interval=15):
+        self.queue = queue
+        self.max_attempts = max_attempts
+        self.interval = interval
+
+    def status_lines(self):
+        now = time.time()
+        lines = []
+        for course in self.queue.courses("running"):
+            age = now - (course["heartbeat_at"] or course["started_at"] or now)
+            left = (course["lease_expires_at"] or now) - now
+            lines.append(f"  course {course['id']:>4} on {course['worker']}: running {now - course['started_at']:.0f}s, "
+                         f"last heartbeat {age:.0f}s ago, lease {left:.0f}s left")
+        return lines
+
+    def run(self):
+        started = time.time()
+        done_at_start = self.queue.counts()["done"]
+        while True:
+            self.queue.reclaim_expired(self.max_attempts)
+            counts = self.queue.counts()
+            elapsed = time.time() - started
+            rate = (counts["done"] - done_at_start) / elapsed * 3600 if elapsed else 0
+            remaining = counts["pending"] + counts["running"]
+            eta = f"{remaining / rate * 60:.0f} min" if rate else "unknown"
+            print(f"Batch: {counts['done']} done, {counts['failed']} failed, {counts['running']} running, "
+                  f"{counts['pending']} pending | {counts['lectures']} lectures | {rate:.1f} courses/h | ETA {eta}")
+            for line in self.status_lines():
+                print(line)
+            if remaining == 0:
+                return counts
+            time.sleep(self.interval)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distributed extraction over a shared SQLite job store.")
+    parser.add_argument("role", choices=["coordinator", "worker"])
+    parser.add_argument("courses", nargs="?", help="(coordinator) File with one course URL per line to queue")
+    parser.add_argument("--workdir", help="Shared folder holding udemy_transcripts/ (queue, session, outputs)")
+    parser.add_argument("--db", default=BATCH_DB_PATH, help="Queue database, relative to --workdir")
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS, help="Lease expiries before a course fails")
+    parser.add_argument("--max-videos", type=int, default=0, help="(coordinator) Default maximum videos per course")
+    parser.add_argument("--summarize", action="store_true", help="(coordinator) Summarize every course by default")
+    parser.add_argument("--id", help="(worker) Worker id, default host-pid")
+    parser.add_argument("--lease", type=float, default=LEASE_SECONDS, help="(worker) Lease length in seconds")
+    parser.add_argument("--heartbeat", type=float, default=HEARTBEAT_SECONDS, help="(worker) Seconds between renewals")
+    parser.add_argument("--exit-when-done", action="store_true", help="(worker) Exit once the queue is drained")
+    parser.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"), help="(worker) OpenAI API key")
+    parser.add_argument("--api-base", help="(worker) OpenAI-compatible API base URL")
+    parser.add_argument("--visible", action="store_true", help="(worker) Show the browser")
+    args = parser.parse_args(argv)
+
+    if args.heartbeat * 2 > args.lease:
+        sys.exit("--heartbeat must be at most half of --lease, or live workers would lose their courses.")
+    if args.workdir:
+        # Every path (queue, sessions, transcripts) is relative, so this puts them all on the shared volume
+        os.chdir(args.workdir)
+    queue = BatchQueue(args.db)
+
+    if args.role == "coordinator":
+        if args.courses:
+            defaults = {"max_videos": args.max_videos, "summarize": args.summarize}
+            added = sum(queue.add(url, dict(defaults, **options)) for url, options in load_course_file(args.courses))
+            print(f"Queued {added} new courses from {args.courses}.")
+        Coordinator(queue, max_attempts=args.max_attempts).run()
+        return
+
+    def run_course(course, token):
+        return extract_course(course, token, headless=not args.visible, api_key=args.api_key,
+                              api_base=args.api_base)
+
+    worker = Worker(queue, worker_id=args.id, lease=args.lease, heartbeat=args.heartbeat,
+                    max_attempts=args.max_attempts, run_course=run_course, exit_when_done=args.exit_when_done)
+    try:
+        worker.run()
+    except KeyboardInterrupt:
+        worker.stop("Interrupted")
+
+
+if __name__ == "__main__":
+    main()
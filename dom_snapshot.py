@@ -0,0 +1,196 @@
+import re
+from bs4 import BeautifulSoup
+from browser_driver import as_browser_driver, course_title_from_page_title, lecture_id_from_url
+from curriculum import CURRICULUM_ITEM_SELECTOR, PAGE_TYPE_SELECTORS, ARTICLE_BODY_SELECTORS, lecture_page
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+# Page regions serialized in a snapshot; for each region the outermost matching elements are kept
+SNAPSHOT_REGIONS = {
+    "curriculum": ["[data-purpose='curriculum-section-container']", "[class*='curriculum-item-link--active']",
+                   "[class*='curriculum-item-link--is-current']", "[aria-current='true']", ".item-link--active"],
+    "title": ["a[data-purpose='course-title-link']", ".course-title--course-title--3r1sL",
+              "[data-purpose='course-header-title']", ".ud-heading-xl", "h1", "[data-purpose='video-title']",
+              ".video-viewer--title-overlay--OoQ6p", ".video-viewer--title--Jk6xW"],
+    "transcript": ["[class*='transcript']", "[class*='captions']"],
+    # Lecture type markers and article bodies; the <video> element itself is tiny without its media
+    "content": [selector for selectors in PAGE_TYPE_SELECTORS.values() for selector in selectors]
+    + ARTICLE_BODY_SELECTORS,
+}
+
+# The same selector strategies the live lookups in ibm_udemy_transcript_scraper.py try, in the same order
+ACTIVE_LECTURE_SELECTORS = [".curriculum-item-link--active--NshF4", "[aria-current='true']",
+                            ".curriculum-item-link--is-current--2mKk4", ".item-link--active"]
+ITEM_TITLE_SELECTOR = "[data-purpose='item-title']"
+ITEM_NUMBER_SELECTOR = ".curriculum-item-link--item-number--3PmJf"
+VIDEO_TITLE_SELECTORS = [".video-viewer--title-overlay--OoQ6p", ".video-viewer--title--Jk6xW",
+                         "[data-purpose='video-title']", ".ud-heading-xl.clp-lead__title",
+                         ".course-overview--title--2-V0B"]
+COURSE_TITLE_SELECTORS = ["a[data-purpose='course-title-link']", ".course-title--course-title--3r1sL",
+                          ".ud-heading-xl", "[data-purpose='course-header-title']", "h1"]
+SECTION_TITLE_SELECTORS = ["span.ud-accordion-panel-heading", ".ud-heading-sm[data-purpose='section-title']",
+                           "[data-purpose='section-title']", ".ud-accordion-panel-toggler .ud-accordion-panel-title"]
+CUE_METHODS = [
+    ("div.transcript--cue-container--Vuwj6 p[data-purpose='transcript-cue'] span[data-purpose='cue-text']", "text"),
+    ("div.captions-display--captions-container--PqdGQ div", "text"),
+    ("[data-purpose='transcript-cue'] span", "text"),
+    (".transcript--transcript-panel--1EX49 p", "text"),
+    ("div.captions-display--captions-container--PqdGQ", "innerHTML"),
+    ("[class*='transcript-cue']", "text"),
+    ("[class*='transcript']", "innerHTML"),
+]
+
+SNAPSHOT_SCRIPT = """
+const out = {url: location.href, title: document.title, regions: {}};
+for (const [name, selectors] of Object.entries(arg)) {
+    // Document order puts ancestors first, so nested matches are already covered by their container
+    const picked = [];
+    for (const el of document.querySelectorAll(selectors.join(', '))) {
+        if (!picked.some(p => p.contains(el))) picked.push(el);
+    }
+    out.regions[name] = picked.map(el => el.outerHTML).join('');
+}
+return out;
+"""
+
+
+def take_snapshot(driver):
+    """Serialize the curriculum, title area and transcript panel of the open page in one script call."""
+    raw = as_browser_driver(driver).evaluate(SNAPSHOT_SCRIPT, SNAPSHOT_REGIONS)
+    return DomSnapshot(raw.get("url", ""), raw.get("title", ""), raw.get("regions") or {})
+
+
+def _split_number(title_text):
+    match = re.match(r'^(\d+)\.\s+(.*)', title_text)
+    return (match.group(1), match.group(2)) if match else (None, title_text)
+
+
+class DomSnapshot:
+    """A lecture page captured once and queried locally.
+
+    Every lookup runs against the parsed HTML, so the fallback chains cost no
+    browser round trips. Lookups return empty values when the snapshot has no
+    answer, and callers then fall back to the live DOM.
+    """
+
+    def __init__(self, url, page_title, regions):
+        self.url = url
+        self.page_title = page_title
+        self.regions = regions
+        html = "".join(f"<div data-snapshot-region='{name}'>{content}</div>" for name, content in regions.items())
+        self.soup = BeautifulSoup(f"<html><body>{html}</body></html>", HTML_PARSER)
+
+    def size(self):
+        """Characters of HTML captured."""
+        return sum(len(content) for content in self.regions.values())
+
+    @staticmethod
+    def _text(element):
+        return element.get_text(" ", strip=True)
+
+    def _first_text(self, selectors, root=None):
+        for selector in selectors:
+            for element in (self.soup if root is None else root).select(selector):
+                text = self._text(element)
+                if text:
+                    return text
+        return ""
+
+    def course_title(self):
+        """Course title from the title area, else from the document title."""
+        return self._first_text(COURSE_TITLE_SELECTORS) or course_title_from_page_title(self.page_title)
+
+    def _section_of(self, element):
+        for parent in element.parents:
+            section = self._first_text(SECTION_TITLE_SELECTORS, parent) if parent.name == "div" else ""
+            if section:
+                match = re.search(r'Section (\d+):', section)
+                return f"Section {match.group(1)}" if match else section
+        return ""
+
+    def lecture_info(self):
+        """Lecture number, title, section and full title, like get_detailed_lecture_info()."""
+        lecture_info = {"title": "", "section": "", "number": "", "full_title": ""}
+        url_number = lecture_id_from_url(self.url)
+
+        # Active curriculum item first; its section heading comes from the surrounding section panel
+        for indicator in ACTIVE_LECTURE_SELECTORS:
+            for active in self.soup.select(indicator):
+                title_text = self._first_text([ITEM_TITLE_SELECTOR], active)
+                if not title_text:
+                    continue
+                number, title = _split_number(title_text)
+                if number is None:
+                    number_text = self._first_text([ITEM_NUMBER_SELECTOR], active).rstrip('.')
+                    number = number_text or None
+                lecture_info["number"] = number or ""
+                lecture_info["title"] = title
+                lecture_info["full_title"] = f"{number}. {title}" if number else title
+                lecture_info["section"] = self._section_of(active)
+                return lecture_info
+
+        # Then the title shown over the video player, numbered from the URL if needed
+        title_text = self._first_text(VIDEO_TITLE_SELECTORS)
+        if title_text:
+            number, title = _split_number(title_text)
+            number = number or url_number
+            lecture_info["number"] = number or ""
+            lecture_info["title"] = title
+            lecture_info["full_title"] = f"{number}. {title}" if number else title
+            return lecture_info
+
+        # Last, the lecture id from the URL and the document title
+        if url_number:
+            title = course_title_from_page_title(self.page_title) or f"Lecture_{url_number}"
+            lecture_info["number"] = url_number
+            lecture_info["title"] = title
+            lecture_info["full_title"] = f"{url_number}. {title}"
+        return lecture_info
+
+    def lecture_page(self):
+        """Classified curriculum, lecture type and article text, like curriculum.read_lecture_page()."""
+        items = []
+        for element in self.soup.select(CURRICULUM_ITEM_SELECTOR):
+            link = element.select_one("a[href]") or element.find_parent("a", href=True)
+            use = element.select_one("svg use")
+            items.append({
+                "title": self._first_text([ITEM_TITLE_SELECTOR], element),
+                "href": link.get("href", "") if link else "",
+                "icon": (use.get("xlink:href") or use.get("href") or "") if use else "",
+                "meta": self._first_text(["[class*='metadata']", "[class*='bottom-row']"], element),
+                "current": element.get("aria-current") == "true"
+                or bool(re.search(r'is-current|--active', " ".join(element.get("class", []))))
+                or element.select_one("[aria-current='true']") is not None,
+            })
+        present = {item_type: bool(self.soup.select(", ".join(selectors)))
+                   for item_type, selectors in PAGE_TYPE_SELECTORS.items()}
+        article = self.soup.select_one(", ".join(ARTICLE_BODY_SELECTORS))
+        return lecture_page(items, present, article.get_text("\n") if article is not None else "")
+
+    def cues(self):
+        """Transcript lines, trying the cue selectors in the order the live extractor does."""
+        for selector, attribute in CUE_METHODS:
+            elements = self.soup.select(selector)
+            if not elements:
+                continue
+            if attribute == "innerHTML":
+                texts = [text.strip() for text in elements[0].stripped_strings if text.strip()]
+            else:
+                texts = [text for text in (self._text(element) for element in elements) if text]
+            if texts:
+                return texts
+
+        # Any transcript or captions container, line by line
+        for container in self.soup.select("[class*='transcript'], [class*='captions']"):
+            lines = [line.strip() for line in container.get_text("\n").split("\n") if line.strip()]
+            if lines:
+                return lines
+        return []
+
+    def close(self):
+        """Free the parse tree."""
+        self.soup.decompose()
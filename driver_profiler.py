@@ -0,0 +1,172 @@
+import os
+import sys
+import time
+import threading
+from selenium.webdriver.remote.webelement import WebElement
+
+# Driver methods/properties that cost one WebDriver round trip each
+DRIVER_COMMANDS = {
+    "get", "find_element", "find_elements", "execute_script", "execute_async_script", "execute_cdp_cmd",
+    "save_screenshot", "get_screenshot_as_png", "refresh", "back", "forward", "add_cookie", "get_cookies",
+    "delete_all_cookies", "close"
+}
+DRIVER_PROPERTIES = {"current_url", "title", "page_source", "window_handles", "current_window_handle"}
+ELEMENT_COMMANDS = {
+    "find_element", "find_elements", "is_displayed", "is_enabled", "is_selected", "get_attribute",
+    "get_dom_attribute", "get_property", "click", "send_keys", "clear", "submit", "value_of_css_property",
+    "screenshot"
+}
+ELEMENT_PROPERTIES = {"text", "tag_name", "location", "size", "rect"}
+
+_THIS_FILE = os.path.abspath(__file__)
+_PROJECT_DIR = os.path.dirname(_THIS_FILE)
+
+
+def _calling_method():
+    """Name of the nearest project function on the stack (e.g. get_detailed_lecture_info)."""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename != _THIS_FILE and filename.startswith(_PROJECT_DIR) and "site-packages" not in filename:
+            return frame.f_code.co_name
+        frame = frame.f_back
+    return "<external>"
+
+
+def _unwrap(value):
+    """Hand real WebElements back to Selenium when profiled ones are passed as arguments."""
+    if isinstance(value, ProfiledElement):
+        return value._element
+    if isinstance(value, (list, tuple)):
+        return type(value)(_unwrap(v) for v in value)
+    return value
+
+
+class DriverProfiler:
+    """Counts and times WebDriver round trips per lecture, calling method and command."""
+
+    def __init__(self):
+        self.lecture_id = None
+        self._stats = {}  # (lecture_id, caller, command) -> [count, seconds]
+        self._lock = threading.Lock()
+
+    def start_lecture(self, lecture_id):
+        """Attribute following commands to lecture_id."""
+        self.lecture_id = lecture_id
+
+    def record(self, caller, command, duration):
+        key = (self.lecture_id, caller, command)
+        with self._lock:
+            entry = self._stats.setdefault(key, [0, 0.0])
+            entry[0] += 1
+            entry[1] += duration
+
+    def _rows(self, lecture_id=None, all_lectures=True):
+        with self._lock:
+            items = list(self._stats.items())
+        totals = {}
+        for (lecture, caller, command), (count, seconds) in items:
+            if not all_lectures and lecture != lecture_id:
+                continue
+            entry = totals.setdefault((caller, command), [0, 0.0])
+            entry[0] += count
+            entry[1] += seconds
+        return sorted(((caller, command, count, seconds) for (caller, command), (count, seconds) in totals.items()),
+                      key=lambda row: row[3], reverse=True)
+
+    def lecture_report(self, lecture_id):
+        """Text report of the round trips spent on a single lecture."""
+        return self._format(self._rows(lecture_id, all_lectures=False), f"WebDriver calls for lecture {lecture_id}")
+
+    def run_report(self):
+        """Text report of all round trips in this run."""
+        return self._format(self._rows(), "WebDriver calls for the whole run")
+
+    def totals(self, lecture_id=None, all_lectures=True):
+        """(round trips, seconds) for a lecture or the whole run."""
+        rows = self._rows(lecture_id, all_lectures)
+        return sum(row[2] for row in rows), sum(row[3] for row in rows)
+
+    def _format(self, rows, heading):
+        count = sum(row[2] for row in rows)
+        seconds = sum(row[3] for row in rows)
+        lines = [f"{heading}: {count} round trips, {seconds:.2f}s",
+                 f"  {'method':<32}{'command':<22}{'calls':>7}{'seconds':>10}"]
+        for caller, command, calls, spent in rows:
+            lines.append(f"  {caller:<32}{command:<22}{calls:>7}{spent:>10.3f}")
+        return "\n".join(lines)
+
+
+class _Profiled:
+    """Shared proxy logic for drivers and elements."""
+
+    _commands = set()
+    _properties = set()
+
+    def __init__(self, target, profiler):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_profiler", profiler)
+
+    def _wrap_result(self, value):
+        if isinstance(value, list):
+            return [self._wrap_result(v) for v in value]
+        if isinstance(value, WebElement):
+            return ProfiledElement(value, self._profiler)
+        return value
+
+    def __getattr__(self, name):
+        target = object.__getattribute__(self, "_target")
+        profiler = object.__getattribute__(self, "_profiler")
+
+        if name in self._properties:
+            start = time.perf_counter()
+            value = getattr(target, name)
+            profiler.record(_calling_method(), name, time.perf_counter() - start)
+            return value
+
+        value = getattr(target, name)
+        if name not in self._commands or not callable(value):
+            return value
+
+        def profiled_command(*args, **kwargs):
+            caller = _calling_method()
+            start = time.perf_counter()
+            try:
+                return self._wrap_result(value(*_unwrap(args), **{k: _unwrap(v) for k, v in kwargs.items()}))
+            finally:
+                profiler.record(caller, name, time.perf_counter() - start)
+
+        return profiled_command
+
+    def __setattr__(self, name, value):
+        setattr(object.__getattribute__(self, "_target"), name, value)
+
+    def __eq__(self, other):
+        if isinstance(other, _Profiled):
+            other = object.__getattribute__(other, "_target")
+        return object.__getattribute__(self, "_target") == other
+
+    def __hash__(self):
+        return hash(object.__getattribute__(self, "_target"))
+
+
+class ProfiledElement(_Profiled):
+    """WebElement proxy that records element-level round trips."""
+
+    _commands = ELEMENT_COMMANDS
+    _properties = ELEMENT_PROPERTIES
+
+    @property
+    def _element(self):
+        return object.__getattribute__(self, "_target")
+
+
+class ProfiledDriver(_Profiled):
+    """WebDriver proxy that records every command issued through it."""
+
+    _commands = DRIVER_COMMANDS
+    _properties = DRIVER_PROPERTIES
+
+    @property
+    def wrapped_driver(self):
+        return object.__getattribute__(self, "_target")
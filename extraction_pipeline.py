@@ -0,0 +1,873 @@
+import os
+import time
+import zipfile
+import tempfile
+import threading
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from ibm_udemy_transcript_scraper import UdemyTranscriptExtractor, SUMMARY_MODEL, sanitize_filename
+from cancellation import CancellationToken, JobCancelled, DeadlineExceeded, run_cancellable
+from tracing import Tracer, process_tracer
+from transcript_collector import transcript_completeness
+from memory_monitor import TranscriptSpool, ZIP_SPOOL_MAX_BYTES
+from session_store import SessionStore, ensure_logged_in, capture_session, credential_id
+from browser_startup import launch_browser, BrowserPool
+from browser_driver import as_browser_driver, lecture_id_from_url
+from lecture_prefetcher import PREFETCH_DEPTH, BACKGROUND_TAB_ARGUMENTS
+from curriculum import SKIPPED_TYPES
+from playwright_engine import run_course, ENGINE_CONCURRENCY
+from artifact_store import ArtifactStore
+from summary_client import SummaryClient
+
+# Headless browsers kept warm for jobs, shared by every front end in the process
+BROWSER_POOL_SIZE = int(os.environ.get("UDEMY_BROWSER_POOL_SIZE", "1"))
+
+
+def create_zip_file(files_data):
+    """Create a zip file from (path, content) pairs, spilling to disk once it gets large"""
+    if hasattr(files_data, "items"):
+        files_data = files_data.items()
+    zip_file = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_BYTES)
+    with zipfile.ZipFile(zip_file, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for file_path, file_content in files_data:
+            zipf.writestr(file_path, file_content)
+    zip_file.seek(0)
+    return zip_file
+
+
+def init_cloud_browser():
+    """Initialize a browser compatible with Streamlit Cloud"""
+    options = Options()
+    
+    # Required for headless browser in cloud environment
+    options.add_argument("--headless=new")  # Using newer headless mode
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--window-size=1920,1080")  # Larger window size for better visibility
+    
+    # Anti-detection settings
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+    # Lets prefetched lectures load in background tabs
+    if PREFETCH_DEPTH:
+        for argument in BACKGROUND_TAB_ARGUMENTS:
+            options.add_argument(argument)
+    
+    # Realistic user agent
+    options.add_argument("user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    
+    try:
+        # Cached chromedriver first, then the system Chrome binary, then Playwright;
+        # whichever worked last time on this host is tried first
+        return launch_browser(options)
+    except Exception as e:
+        print(f"Browser initialization error: {str(e)}")
+        raise Exception(f"Failed to initialize browser: {str(e)}")
+
+
+def init_visible_browser():
+    """Initialize a visible browser for debugging and manual interaction"""
+    options = Options()
+    
+    # Basic settings for visible browser
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-extensions")
+    
+    # Anti-detection settings
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option("useAutomationExtension", False)
+    # Lets prefetched lectures load in background tabs
+    if PREFETCH_DEPTH:
+        for argument in BACKGROUND_TAB_ARGUMENTS:
+            options.add_argument(argument)
+    
+    # Realistic user agent
+    options.add_argument(
+        "user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    
+    try:
+        driver = launch_browser(options, strategies=("cached_driver", "system_chrome"))
+    except Exception as e:
+        print(f"Failed to initialize visible Chrome: {str(e)}")
+        raise Exception("Failed to initialize visible browser")
+    
+    return driver
+
+
+def handle_login(driver, course_url, udemy_email, udemy_password, status_queue):
+    """Handle the Udemy login process specifically selecting the second login option"""
+    try:
+        # Navigate to course URL first
+        driver.get(course_url)
+        status_queue.put(("status", "Navigated to course page. Looking for login elements..."))
+        time.sleep(3)
+        
+        # Look for login button or element
+        try:
+            login_btn = WebDriverWait(driver, 10).until(
+                EC.element_to_be_clickable(
+                    (By.XPATH, "//a[contains(@class, 'login') or contains(@data-purpose, 'header-login')]"))
+            )
+            login_btn.click()
+            status_queue.put(("status", "Clicked on login button."))
+            time.sleep(2)
+        except Exception as e:
+            status_queue.put(("status", f"Login button not found, might already be on login page: {str(e)}"))
+            
+        # Find and click on the second login option
+        try:
+            # Wait for login options to be visible
+            WebDriverWait(driver, 10).until(
+                EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'auth-method')]"))
+            )
+            
+            # Get all login options
+            login_options = driver.find_elements(By.XPATH, "//div[contains(@class, 'auth-method')] | //form[contains(@class, 'login-form')] | //button[contains(@class, 'auth-button')]")
+            
+            if len(login_options) > 1:
+                # Click the second option
+                login_options[1].click()
+                status_queue.put(("status", "Selected second login option."))
+            else:
+                # If we can't find auth method containers, try finding individual login buttons
+                login_buttons = driver.find_elements(By.XPATH, "//button[contains(@class, 'auth') or contains(text(), 'Log') or contains(text(), 'Sign')]")
+                if len(login_buttons) > 1:
+                    login_buttons[1].click()
+                    status_queue.put(("status", "Selected second login button."))
+                else:
+                    status_queue.put(("status", "Could not find multiple login options. Proceeding with available login form."))
+            
+            time.sleep(2)
+        except Exception as e:
+            status_queue.put(("status", f"Error selecting second login option: {str(e)}. Proceeding with available login form."))
+        
+        # Find and fill the email/username field
+        try:
+            # Try several possible field selectors
+            selectors = [
+                (By.NAME, "email"),
+                (By.ID, "email"),
+                (By.NAME, "username"),
+                (By.ID, "username"),
+                (By.ID, "user"),
+                (By.XPATH, "//input[@type='email']"),
+                (By.XPATH, "//input[@placeholder='Email' or @placeholder='Username' or @placeholder='Email or username']"),
+                (By.XPATH, "//input[contains(@class, 'email') or contains(@class, 'username')]")
+            ]
+            
+            email_field = None
+            for selector_type, selector_value in selectors:
+                try:
+                    email_field = WebDriverWait(driver, 3).until(
+                        EC.presence_of_element_located((selector_type, selector_value))
+                    )
+                    if email_field:
+                        break
+                except:
+                    continue
+            
+            if email_field:
+                email_field.clear()
+                email_field.send_keys(udemy_email)
+                status_queue.put(("status", "Entered email/username."))
+            else:
+                status_queue.put(("status", "Could not find email/username field."))
+                return False
+        except Exception as e:
+            status_queue.put(("status", f"Error entering email/username: {str(e)}"))
+            return False
+        
+        # Find and fill the password field
+        try:
+            # Try several possible field selectors for password
+            password_selectors = [
+                (By.NAME, "password"),
+                (By.ID, "password"),
+                (By.XPATH, "//input[@type='password']"),
+                (By.XPATH, "//input[@placeholder='Password']"),
+                (By.XPATH, "//input[contains(@class, 'password')]")
+            ]
+            
+            password_field = None
+            for selector_type, selector_value in password_selectors:
+                try:
+                    password_field = WebDriverWait(driver, 3).until(
+                        EC.presence_of_element_located((selector_type, selector_value))
+                    )
+                    if password_field:
+                        break
+                except:
+                    continue
+            
+            if password_field:
+                password_field.clear()
+                password_field.send_keys(udemy_password)
+                status_queue.put(("status", "Entered password."))
+            else:
+                status_queue.put(("status", "Could not find password field."))
+                return False
+        except Exception as e:
+            status_queue.put(("status", f"Error entering password: {str(e)}"))
+            return False
+        
+        # Find and click the submit button
+        try:
+            # Try several possible button selectors
+            button_selectors = [
+                (By.XPATH, "//button[@type='submit']"),
+                (By.XPATH, "//button[contains(text(), 'Log in') or contains(text(), 'Sign in') or contains(text(), 'Login')]"),
+                (By.XPATH, "//input[@type='submit']"),
+                (By.XPATH, "//button[contains(@class, 'login') or contains(@class, 'submit')]")
+            ]
+            
+            submit_button = None
+            for selector_type, selector_value in button_selectors:
+                try:
+                    submit_button = WebDriverWait(driver, 3).until(
+                        EC.element_to_be_clickable((selector_type, selector_value))
+                    )
+                    if submit_button:
+                        break
+                except:
+                    continue
+            
+            if submit_button:
+                submit_button.click()
+                status_queue.put(("status", "Clicked submit button. Waiting for login to complete..."))
+                time.sleep(8)  # Give enough time for login to complete
+            else:
+                status_queue.put(("status", "Could not find submit button."))
+                return False
+        except Exception as e:
+            status_queue.put(("status", f"Error clicking submit button: {str(e)}"))
+            return False
+        
+        # Check if login was successful by looking for user profile elements or course content
+        try:
+            # Wait for either course content or profile elements to be present
+            WebDriverWait(driver, 10).until(
+                EC.any_of(
+                    EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'course-content')]")),
+                    EC.presence_of_element_located((By.XPATH, "//a[contains(@class, 'user-profile')]")),
+                    EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'sidebar')]"))
+                )
+            )
+            status_queue.put(("status", "Login successful! Detected course elements."))
+            
+            # Navigate back to course URL to ensure we're on the right page
+            driver.get(course_url)
+            status_queue.put(("status", "Navigated back to course page after login."))
+            time.sleep(5)
+            
+            return True
+        except Exception as e:
+            status_queue.put(("status", f"Could not verify successful login: {str(e)}"))
+            return False
+            
+    except Exception as e:
+        status_queue.put(("status", f"Login process failed: {str(e)}"))
+        return False
+
+
+def navigate_to_first_lecture(driver, status_queue, cancel_token=None):
+    """Navigate to the first lecture of the course"""
+    token = cancel_token or CancellationToken()
+    try:
+        # Try to find and click "Start Course" or "Continue" button
+        button_selectors = [
+            (By.XPATH, "//button[contains(text(), 'Start') or contains(@data-purpose, 'start-course')]"),
+            (By.XPATH, "//a[contains(text(), 'Start') or contains(@data-purpose, 'start-course')]"),
+            (By.XPATH, "//button[contains(text(), 'Continue') or contains(@data-purpose, 'continue-course')]"),
+            (By.XPATH, "//a[contains(text(), 'Continue') or contains(@data-purpose, 'continue-course')]"),
+            (By.XPATH, "//button[contains(@class, 'start') or contains(@class, 'course-cta')]"),
+            (By.XPATH, "//a[contains(@class, 'start') or contains(@class, 'course-cta')]")
+        ]
+        
+        start_button = None
+        for selector_type, selector_value in button_selectors:
+            try:
+                start_button = WebDriverWait(driver, 3).until(
+                    EC.element_to_be_clickable((selector_type, selector_value))
+                )
+                if start_button:
+                    break
+            except:
+                continue
+        
+        if start_button:
+            start_button.click()
+            status_queue.put(("status", "Clicked on start/continue course button."))
+            token.sleep(5)
+            return True
+        
+        # If no button found, try to find and click on the first lecture directly
+        lecture_selectors = [
+            (By.XPATH, "//a[contains(@class, 'lecture') and contains(@class, 'item')]"),
+            (By.XPATH, "//div[contains(@class, 'lecture-item')]//a"),
+            (By.XPATH, "//div[contains(@class, 'curriculum-item')]//a"),
+            (By.XPATH, "//li[contains(@class, 'curriculum-item')]//a")
+        ]
+        
+        first_lecture = None
+        for selector_type, selector_value in lecture_selectors:
+            try:
+                lectures = driver.find_elements(selector_type, selector_value)
+                if lectures and len(lectures) > 0:
+                    first_lecture = lectures[0]
+                    break
+            except:
+                continue
+        
+        if first_lecture:
+            first_lecture.click()
+            status_queue.put(("status", "Clicked on first lecture directly."))
+            token.sleep(5)
+            return True
+        
+        status_queue.put(("status", "Could not find navigation elements to first lecture. May already be in lecture view."))
+        
+        # Check if we're already in a lecture view
+        try:
+            # Look for typical lecture page elements
+            WebDriverWait(driver, 5).until(
+                EC.any_of(
+                    EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'video-player')]")),
+                    EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'lecture-view')]")),
+                    EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'curriculum-navigation')]"))
+                )
+            )
+            status_queue.put(("status", "Already in lecture view."))
+            return True
+        except:
+            status_queue.put(("status", "Not in lecture view and couldn't navigate to first lecture."))
+            return False
+            
+    except Exception as e:
+        status_queue.put(("status", f"Error navigating to first lecture: {str(e)}"))
+        return False
+
+
+def modified_extract_all_transcripts(extractor, course_url, max_videos, status_queue):
+    """A modified version of extract_all_transcripts that stores data in memory rather than files"""
+    try:
+        # Store the initial URL
+        initial_url = extractor.driver.current_url
+
+        status_queue.put(("status", "Finding and enabling transcript panel..."))
+        with extractor.tracer.span("transcript_panel_open"):
+            panel_open = extractor.find_and_enable_transcript()
+        if panel_open:
+            status_queue.put(("status", "Successfully opened transcript panel"))
+        else:
+            status_queue.put(("status", "Could not open transcript panel automatically. Please open it manually."))
+            extractor._sleep(10)
+
+        # Get course title
+        course_title = extractor.get_course_title(extractor.take_snapshot())
+        if not course_title or course_title == f"udemy_course_{int(time.time())}":
+            status_queue.put(("status", "Couldn't detect course title automatically. Using default title."))
+            course_title = "udemy_course_" + str(int(time.time()))
+
+        status_queue.put(("status", f"Course title: {course_title}"))
+
+        video_count = 0
+        # Transcripts stay in memory until the memory budget says to spill them to disk
+        transcripts = TranscriptSpool(extractor.artifacts)
+
+        while max_videos == 0 or video_count < max_videos:
+            extractor.cancel_token.raise_if_cancelled()
+            current_url = extractor.driver.current_url
+            status_queue.put(("status", f"Processing video at URL: {current_url}"))
+            extractor.begin_lecture(current_url)
+            extractor.prefetcher.prefetch(current_url)
+
+            # Each lecture runs under its own deadline so one stuck page can't stall the job
+            try:
+                with extractor.lecture_scope():
+                    outcome = process_lecture_in_memory(extractor, current_url, video_count, max_videos,
+                                                        transcripts, status_queue)
+            except DeadlineExceeded:
+                if extractor.cancel_token.cancelled:
+                    raise
+                status_queue.put(("status", f"❌ Lecture exceeded its {extractor.lecture_timeout:.0f}s deadline. Skipping it."))
+                outcome = "timeout"
+
+            if outcome == "processed":
+                video_count += 1
+
+            # Raises MemoryBudgetExceeded (stopping the job) when over budget
+            if extractor.memory.check(extractor.tracer.lecture_id) and not transcripts.spilled:
+                transcripts.spill()
+                status_queue.put(("status", "Memory is running high, keeping transcripts on disk from now on."))
+
+            if max_videos > 0 and video_count >= max_videos:
+                status_queue.put(("status", f"✅ Completed processing {video_count} videos as requested."))
+                break
+
+            if max_videos == 0 or video_count < max_videos:
+                # Paced by the shared controller, which backs off for every job when the site pushes back
+                navigated = extractor.next_lecture(current_url)
+                if not navigated:
+                    status_queue.put(("status", "No more videos to process. Extraction complete."))
+                    break
+
+        status_queue.put(("status", f"✅ Completed processing {video_count} videos."))
+        return course_title, True, transcripts
+
+    except Exception as e:
+        status_queue.put(("status", f"❌ Error during extraction: {str(e)}"))
+        import traceback
+        traceback.print_exc()
+        status_queue.put(("status", f"Error details: {str(e)}"))
+        return None, False, None
+
+
+def process_lecture_in_memory(extractor, current_url, video_count, max_videos, transcripts, status_queue):
+    """Extract (and summarize) the current lecture into the transcripts list.
+
+    Returns "processed", "already_processed", "skipped" or "no_transcript".
+    """
+    # One DOM snapshot serves title and cues when snapshot mode is on (UDEMY_SNAPSHOT_MODE=1)
+    snapshot = extractor.take_snapshot()
+    try:
+        # Get lecture information
+        lecture_info = extractor.get_detailed_lecture_info(snapshot)
+        full_title = lecture_info["full_title"]
+
+        # Quizzes, exercises and resources have no transcript to look for
+        page = extractor.read_lecture_page(snapshot)
+        lecture_info["type"] = page["type"] if page else "unknown"
+        lecture_info["duration"] = page["duration"] if page else None
+        if lecture_info["type"] in SKIPPED_TYPES:
+            status_queue.put(("status", f"Skipping {lecture_info['type']}: {full_title or current_url}"))
+            return "skipped"
+
+        if not full_title or full_title.strip() == "":
+            status_queue.put(("status", "Failed to get a valid lecture title. Using fallback title."))
+            lecture_id = extractor.driver.current_url.split("/")[-1]
+            full_title = f"Lecture_{lecture_id}"
+
+        formatted_title = full_title
+
+        if formatted_title in extractor.processed_lectures:
+            status_queue.put(("status", f"Already processed lecture: {formatted_title}. Moving to next video..."))
+            return "already_processed"
+
+        status_queue.put(("progress", {
+            "current": video_count + 1,
+            "max": max_videos if max_videos > 0 else "unknown",
+            "title": formatted_title
+        }))
+
+        transcript_text = extractor.extract_lecture_content(lecture_info, page, formatted_title, video_count, snapshot)
+    finally:
+        if snapshot is not None:
+            snapshot.close()
+
+    if transcript_text is None:
+        extractor.processed_lectures.add(formatted_title)
+        return "skipped"
+
+    if not transcript_text:
+        status_queue.put(("status", f"❌ No transcript found for {formatted_title}"))
+        return "no_transcript"
+
+    safe_title = extractor.sanitize_filename(formatted_title)
+    transcript_content = "\n".join(transcript_text)
+
+    # Store transcript in memory
+    transcripts.append({
+        'title': safe_title,
+        'content': transcript_content,
+        'lecture_info': lecture_info
+    })
+
+    status_queue.put(("status", f"✅ Successfully extracted: {formatted_title}"))
+
+    if extractor.api_key and not lecture_info.get("complete", True):
+        status_queue.put(("status", f"⚠️ Transcript looks truncated ({lecture_info['truncated_reason']}), "
+                                    f"not summarizing: {formatted_title}"))
+    elif extractor.api_key:
+        summarize_transcript(
+            extractor.artifacts, transcripts, transcript_content, formatted_title, status_queue,
+            lambda: extractor.generate_notion_friendly_summary(transcript_content, formatted_title,
+                                                               lecture_info.get("number", ""))
+        )
+
+    extractor.processed_lectures.add(formatted_title)
+    extractor.processed_urls.add(current_url)
+    return "processed"
+
+
+def summarize_transcript(artifacts, transcripts, transcript_content, formatted_title, status_queue, generate):
+    """Attach notes to the latest transcript, reusing the summary of an identical transcript if one exists"""
+    try:
+        # Reuse the summary of an identical transcript from an earlier run/course
+        transcript_digest = artifacts.put(transcript_content)
+        summary_variant = artifacts.summary_variant(SUMMARY_MODEL, formatted_title)
+        summary = artifacts.get_summary(transcript_digest, summary_variant)
+        if summary:
+            status_queue.put(("status", f"Reusing existing notes for: {formatted_title}"))
+        else:
+            status_queue.put(("status", f"Generating high-end notes for: {formatted_title}"))
+            summary = generate()
+            if summary:
+                artifacts.put_summary(transcript_digest, summary, summary_variant)
+
+        if summary:
+            transcripts.set_summary(summary)
+            status_queue.put(("status", f"✅ Successfully summarized: {formatted_title}"))
+        else:
+            status_queue.put(("status", f"❌ Failed to generate notes for: {formatted_title}"))
+    except Exception as e:
+        status_queue.put(("status", f"❌ Error generating notes: {str(e)}"))
+
+
+# UDEMY_ENGINE=playwright uses the concurrent Playwright engine even when Selenium is available
+USE_PLAYWRIGHT_ENGINE = os.environ.get("UDEMY_ENGINE", "selenium").lower() == "playwright"
+
+
+def extract_with_playwright_engine(driver, max_videos, api_key, status_queue, token, tracer):
+    """Extract the course with the async Playwright engine, reusing the login of driver.
+
+    Returns (course_title, success, transcripts) like modified_extract_all_transcripts.
+    """
+    session_state = capture_session(driver)
+    lecture_url = as_browser_driver(driver).current_url
+    status_queue.put(("status", f"Extracting up to {ENGINE_CONCURRENCY} lectures at a time with Playwright..."))
+
+    def on_lecture(done, total, result):
+        status_queue.put(("progress", {"current": done, "max": total, "title": result["title"] or result["url"]}))
+        if result.get("error"):
+            status_queue.put(("status", f"❌ Failed to load {result['url']}: {result['error']}"))
+
+    # The engine runs its own event loop, kept off this thread (which may hold a sync Playwright page)
+    course_title, results = run_cancellable(run_course, token, lecture_url, session_state, max_videos,
+                                            on_lecture, tracer=tracer, cancel_token=token)
+
+    artifacts = ArtifactStore("udemy_transcripts")
+    transcripts = TranscriptSpool(artifacts)
+    client = SummaryClient(api_key, tracer=tracer) if api_key else None
+    for result in results:
+        token.raise_if_cancelled()
+        title = result["title"] or f"Lecture_{lecture_id_from_url(result['url'])}"
+        if not result["cues"]:
+            status_queue.put(("status", f"❌ No transcript found for {title}"))
+            continue
+        transcript_content = "\n".join(result["cues"])
+        lecture_info = {"full_title": title, "url": result["url"], "type": result.get("type"),
+                        "duration": result.get("duration")}
+        # Same check as the Selenium path: a truncated transcript is kept but never summarized
+        complete, reason = transcript_completeness(result["cues"], result.get("duration"),
+                                                   result.get("timed_out", False))
+        if not complete:
+            lecture_info["complete"] = False
+            lecture_info["truncated_reason"] = reason
+        transcripts.append({
+            'title': sanitize_filename(title),
+            'content': transcript_content,
+            'lecture_info': lecture_info
+        })
+        status_queue.put(("status", f"✅ Successfully extracted: {title}"))
+        if not complete:
+            status_queue.put(("status", f"⚠️ Transcript looks truncated ({reason})"
+                                        f"{', not summarizing' if client is not None else ''}: {title}"))
+        elif client is not None:
+            summarize_transcript(artifacts, transcripts, transcript_content, title, status_queue,
+                                 lambda: client.summarize(transcript_content, title, token=token))
+
+    course_title = sanitize_filename(course_title) if course_title else f"udemy_course_{int(time.time())}"
+    status_queue.put(("status", f"✅ Completed processing {len(transcripts)} videos."))
+    return course_title, True, transcripts
+
+
+def handle_ibm_login(driver, course_url, ibm_email, ibm_password, status_queue, cancel_token=None):
+    """Handle the IBM w3id login process for Udemy for Business"""
+    token = cancel_token or CancellationToken()
+    try:
+        # Check if we're using Playwright
+        is_playwright = hasattr(driver, 'goto')
+        
+        # Navigate to course URL first
+        if is_playwright:
+            driver.goto(course_url)
+        else:
+            driver.get(course_url)
+        status_queue.put(("status", "Navigated to course page. Looking for login elements..."))
+        token.sleep(3)
+        
+        # Look for login button or element
+        try:
+            if is_playwright:
+                # Playwright selectors
+                login_btn = driver.wait_for_selector("a[class*='login'], a[data-purpose*='header-login']", timeout=10000)
+                login_btn.click()
+            else:
+                # Selenium selectors
+                login_btn = WebDriverWait(driver, 10).until(
+                    EC.element_to_be_clickable(
+                        (By.XPATH, "//a[contains(@class, 'login') or contains(@data-purpose, 'header-login')]"))
+                )
+                login_btn.click()
+            status_queue.put(("status", "Clicked on login button."))
+            token.sleep(2)
+        except Exception as e:
+            status_queue.put(("status", f"Login button not found, might already be on login page: {str(e)}"))
+        
+        # Handle the IBM Security Verify screen - select "w3id Credentials" option
+        try:
+            if is_playwright:
+                # Wait for the w3id Credentials button
+                w3id_button = driver.wait_for_selector("#credsDiv", timeout=15000)
+                w3id_button.click()
+            else:
+                # Wait for the w3id Credentials button
+                w3id_button = WebDriverWait(driver, 15).until(
+                    EC.presence_of_element_located((By.ID, "credsDiv"))
+                )
+                w3id_button.click()
+            
+            status_queue.put(("status", "Selected w3id Credentials option"))
+            token.sleep(5)
+            
+        except Exception as e:
+            status_queue.put(("status", f"Error selecting w3id option: {str(e)}. Attempting to continue..."))
+        
+        # Now handle the username/password form
+        try:
+            if is_playwright:
+                # Fill email field
+                email_field = driver.wait_for_selector("#user-name-input", timeout=15000)
+                email_field.fill(ibm_email)
+                
+                # Fill password field
+                password_field = driver.wait_for_selector("#password-input", timeout=10000)
+                password_field.fill(ibm_password)
+                
+                # Click sign in button
+                submit_button = driver.wait_for_selector("#login-button", timeout=10000)
+                submit_button.click()
+            else:
+                # Fill email field
+                email_field = WebDriverWait(driver, 15).until(
+                    EC.presence_of_element_located((By.ID, "user-name-input"))
+                )
+                email_field.clear()
+                email_field.send_keys(ibm_email)
+                
+                # Fill password field
+                password_field = WebDriverWait(driver, 10).until(
+                    EC.presence_of_element_located((By.ID, "password-input"))
+                )
+                password_field.clear()
+                password_field.send_keys(ibm_password)
+                
+                # Click sign in button
+                submit_button = WebDriverWait(driver, 10).until(
+                    EC.element_to_be_clickable((By.ID, "login-button"))
+                )
+                submit_button.click()
+            
+            status_queue.put(("status", "Submitted login credentials. Waiting for login to complete..."))
+            token.sleep(10)  # Give enough time for login and potential redirects
+            
+        except Exception as e:
+            status_queue.put(("status", f"Error with username/password form: {str(e)}"))
+            return False
+        
+        # Check if login was successful
+        try:
+            if is_playwright:
+                # Wait for course elements
+                driver.wait_for_selector("div[class*='course-content'], a[class*='user-profile'], div[class*='sidebar']", timeout=15000)
+            else:
+                # Wait for course elements
+                WebDriverWait(driver, 15).until(
+                    EC.any_of(
+                        EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'course-content')]")),
+                        EC.presence_of_element_located((By.XPATH, "//a[contains(@class, 'user-profile')]")),
+                        EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'sidebar')]"))
+                    )
+                )
+            
+            status_queue.put(("status", "IBM login successful! Detected course elements."))
+            
+            # Navigate back to course URL to ensure we're on the right page
+            if is_playwright:
+                driver.goto(course_url)
+            else:
+                driver.get(course_url)
+            status_queue.put(("status", "Navigated back to course page after login."))
+            token.sleep(5)
+            
+            return True
+        except Exception as e:
+            status_queue.put(("status", f"Could not verify successful IBM login: {str(e)}"))
+            return False
+            
+    except Exception as e:
+        status_queue.put(("status", f"IBM login process failed: {str(e)}"))
+        return False
+
+
+def release_browser(driver):
+    """Close a Selenium driver or Playwright page"""
+    if hasattr(driver, 'goto'):
+        driver.close()
+        driver.context.browser.close()
+    else:
+        driver.quit()
+
+
+def extraction_thread(driver, course_url, max_videos, api_key, status_queue, ibm_email, ibm_password,
+                      cancel_token=None, tracer=None, session_store=None):
+    """Run extraction in a separate thread with IBM login handling"""
+    token = cancel_token or CancellationToken()
+    tracer = tracer or Tracer(parent=process_tracer)
+    # Quitting the browser on cancel makes any in-progress WebDriver call fail immediately
+    unregister_release = token.on_cancel(lambda: release_browser(driver))
+    try:
+        status_queue.put(("status", "Starting IBM w3id login process..."))
+        
+        browser = as_browser_driver(driver)
+        browser.goto(course_url)
+        status_queue.put(("status", f"Navigated to course page using {'Playwright' if browser.is_playwright else 'Selenium'}"))
+        
+        # Reuse the saved session of these exact credentials if it still works, else run the IBM w3id login
+        with tracer.span("login"):
+            login_success = ensure_logged_in(
+                driver, course_url,
+                lambda: handle_ibm_login(driver, course_url, ibm_email, ibm_password, status_queue, token),
+                session_store or SessionStore(), account=credential_id(ibm_email, ibm_password),
+                status=lambda message: status_queue.put(("status", message)), token=token
+            )
+        
+        if not login_success:
+            status_queue.put(("error", "IBM login process failed. Please check your credentials and try again."))
+            return
+        
+        status_queue.put(("status", "Login successful. Navigating to first lecture..."))
+        
+        # Navigate to first lecture
+        token.raise_if_cancelled()
+        with tracer.span("first_lecture_navigation"):
+            navigation_success = navigate_to_first_lecture(driver, status_queue, token)
+        
+        if not navigation_success:
+            status_queue.put(("error", "Failed to navigate to first lecture. Please check the course URL and try again."))
+            return
+        
+        if as_browser_driver(driver).is_playwright or USE_PLAYWRIGHT_ENGINE:
+            # The Selenium extractor cannot drive a Playwright page; the async engine extracts lectures concurrently
+            status_queue.put(("status", "Successfully navigated to first lecture. Starting the Playwright engine..."))
+            course_title, success, transcripts = extract_with_playwright_engine(driver, max_videos, api_key,
+                                                                                status_queue, token, tracer)
+        else:
+            status_queue.put(("status", "Successfully navigated to first lecture. Initializing extractor..."))
+
+            # Initialize extractor with the existing driver (it does not launch a browser of its own)
+            extractor = UdemyTranscriptExtractor(headless=True, summarize=True, api_key=api_key, cancel_token=token,
+                                                 tracer=tracer, driver=driver)
+
+            status_queue.put(("status", "Extractor initialized. Beginning extraction process..."))
+
+            # Call modified extraction function
+            course_title, success, transcripts = modified_extract_all_transcripts(extractor, course_url, max_videos,
+                                                                                  status_queue)
+
+            memory_report = extractor.memory.report()
+            print(memory_report)
+            status_queue.put(("status", memory_report.splitlines()[0]))
+
+            driver_report = extractor.driver_report()
+            if driver_report:
+                print(driver_report)
+                status_queue.put(("status", driver_report.splitlines()[0]))
+
+        if success and transcripts:
+            status_queue.put(("status", f"Successfully extracted {len(transcripts)} transcripts."))
+            
+            with tracer.span("file_write"):
+                # Files are streamed into the archive one lecture at a time
+                zip_file = create_zip_file(prepare_files_data(course_title, transcripts))
+
+            # Only per-lecture metadata travels with the result, the text lives in the zip
+            status_queue.put(("success", {
+                "course_title": course_title,
+                "transcripts": transcripts.manifest(),
+                "zip_file": zip_file
+            }))
+        else:
+            status_queue.put(("error", "Extraction failed. No transcripts were extracted."))
+    except JobCancelled as e:
+        status_queue.put(("error", f"Job stopped: {str(e)}"))
+    except Exception as e:
+        import traceback
+        error_details = traceback.format_exc()
+        status_queue.put(("error", f"Error during extraction: {str(e)}\n\nError details:\n{error_details}"))
+    finally:
+        unregister_release()
+        # Close the browser
+        try:
+            release_browser(driver)
+            status_queue.put(("status", "Browser closed."))
+        except Exception as e:
+            status_queue.put(("status", f"Error closing browser: {str(e)}"))
+        # Signal that the thread is done
+        status_queue.put(("done", None))
+
+
+def prepare_files_data(course_title, transcripts):
+    """Yield (archive path, content) pairs for every transcript and summary"""
+    for transcript in transcripts:
+        # Store transcript
+        yield f"{course_title}/{transcript['title']}.txt", transcript['content']
+
+        # Store summary if available
+        if transcript.get('summary'):
+            yield f"{course_title}/summaries/{transcript['title']}_summary.md", transcript['summary']
+
+
+_browser_pool = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_browser_pool():
+    """Process-wide pool of pre-launched headless browsers"""
+    global _browser_pool
+    with _browser_pool_lock:
+        if _browser_pool is None:
+            _browser_pool = BrowserPool(init_cloud_browser, size=BROWSER_POOL_SIZE).start()
+        return _browser_pool
+
+
+def run_extraction_job(job):
+    """Job manager runner: start a browser and run the extraction pipeline for one job"""
+    params = job.params
+    try:
+        job.put(("status", "Initializing browser..."))
+        with job.tracer.span("browser_start"):
+            if params["headless"]:
+                driver = get_browser_pool().acquire()
+            else:
+                driver = init_visible_browser()
+        job.put(("status", "Browser initialized successfully."))
+    except Exception as e:
+        job.put(("error", f"Failed to initialize browser: {str(e)}"))
+        job.put(("done", None))
+        return
+
+    try:
+        extraction_thread(driver, params["course_url"], params["max_videos"], job.secrets.get("api_key"), job,
+                          job.secrets.get("ibm_email"), job.secrets.get("ibm_password"), job.cancel_token, job.tracer)
+    finally:
+        try:
+            job.tracer.export_json(os.path.join("udemy_transcripts", ".traces", f"{job.id}.json"))
+        except Exception as e:
+            print(f"Could not write trace for job {job.id}: {str(e)}")
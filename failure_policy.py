@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import random
+import shutil
+import threading
+
+# What can go wrong in an unattended run, each handled by its own policy
+FAILURE_KINDS = ("login", "transcript_panel", "no_transcript", "lecture_timeout", "lecture_error", "navigation")
+ACTIONS = ("retry", "skip", "abort")
+# Without a human to ask, a failed lecture is retried a couple of times and then skipped.
+# A run that cannot log in is stopped; one that cannot find a Next button ends there (as on the last lecture).
+DEFAULT_RULES = {
+    "login": {"action": "abort"},
+    "transcript_panel": {"action": "retry", "retries": 2, "then": "skip"},
+    "no_transcript": {"action": "retry", "retries": 1, "then": "skip"},
+    "lecture_timeout": {"action": "retry", "retries": 1, "then": "skip"},
+    "lecture_error": {"action": "retry", "retries": 2, "then": "skip"},
+    "navigation": {"action": "retry", "retries": 1, "then": "skip"},
+}
+DEAD_LETTER_PATH = os.path.join("udemy_transcripts", "dead_letter.jsonl")
+
+
+class FailureAborted(Exception):
+    """Raised when a failure policy says to stop the run."""
+
+    def __init__(self, kind, message):
+        super().__init__(f"{kind}: {message}")
+        self.kind = kind
+
+
+class FailurePolicy:
+    """Per-failure-kind decisions for non-interactive runs: retry N times with backoff, skip, or abort.
+
+    Rules look like ``{"action": "retry", "retries": 2, "then": "skip", "backoff": 5}``;
+    ``then`` is what happens once the retries are used up.
+    """
+
+    def __init__(self, rules=None, backoff=5.0, backoff_max=120.0):
+        self.rules = {kind: dict(rule) for kind, rule in DEFAULT_RULES.items()}
+        for kind, rule in (rules or {}).items():
+            if kind not in FAILURE_KINDS:
+                raise ValueError(f"Unknown failure kind '{kind}', expected one of {', '.join(FAILURE_KINDS)}")
+            rule = {"action": rule} if isinstance(rule, str) else dict(rule)
+            for key in ("action", "then"):
+                if rule.get(key, "skip") not in ACTIONS:
+                    raise ValueError(f"Unknown action '{rule[key]}' for {kind}, expected one of {', '.join(ACTIONS)}")
+            self.rules[kind] = rule
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+
+    @classmethod
+    def from_spec(cls, default_action=None, retries=None, rules=None, **options):
+        """Policy from config/CLI values: an action and retry count applied to every kind, then per-kind rules."""
+        merged = {}
+        if default_action or retries is not None:
+            for kind in FAILURE_KINDS:
+                rule = dict(DEFAULT_RULES[kind])
+                if default_action:
+                    rule = {"action": default_action, "then": "skip" if default_action == "retry" else default_action}
+                if retries is not None:
+                    rule["retries"] = retries
+                merged[kind] = rule
+        merged.update(rules or {})
+        return cls(merged, **options)
+
+    def decide(self, kind, attempt):
+        """Action for the attempt-th failure (1-based) of this kind on the current item."""
+        rule = self.rules.get(kind, {"action": "skip"})
+        action = rule.get("action", "skip")
+        if action == "retry" and attempt > int(rule.get("retries", 1)):
+            return rule.get("then", "skip")
+        return action
+
+    def delay(self, kind, attempt):
+        """Jittered exponential backoff before the next retry."""
+        base = float(self.rules.get(kind, {}).get("backoff", self.backoff))
+        return min(self.backoff_max, base * 2 ** (attempt - 1)) * random.uniform(0.8, 1.2)
+
+    def describe(self):
+        parts = []
+        for kind in FAILURE_KINDS:
+            rule = self.rules[kind]
+            if rule.get("action") == "retry":
+                parts.append(f"{kind}=retry x{rule.get('retries', 1)} then {rule.get('then', 'skip')}")
+            else:
+                parts.append(f"{kind}={rule.get('action', 'skip')}")
+        return ", ".join(parts)
+
+
+class DeadLetterQueue:
+    """Append-only JSONL file of lectures that failed for good, to be retried in a later run."""
+
+    def __init__(self, path=DEAD_LETTER_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def add(self, url, kind, error, attempts=1, course_url=None, title=None):
+        record = {"url": url, "course_url": course_url, "title": title, "kind": kind, "error": str(error),
+                  "attempts": attempts, "failed_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        print(f"Dead-lettered {url} ({kind}): {error}")
+
+    def entries(self):
+        """Every record in the file, skipping lines that cannot be parsed."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return []
+        entries = []
+        for line in lines:
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue
+        return entries
+
+    def urls(self):
+        """Unique lecture URLs in the file, leaving them in it."""
+        urls = []
+        for entry in self.entries():
+            if entry.get("url") and entry["url"] not in urls:
+                urls.append(entry["url"])
+        return urls
+
+    def remove(self, urls):
+        """Drop the records of urls once a retry run has taken them over; failures of that run are appended again.
+
+        The file as it was is kept next to it as a ``.bak``.
+        """
+        urls = set(urls)
+        with self._lock:
+            entries = self.entries()
+            remaining = [entry for entry in entries if entry.get("url") not in urls]
+            if len(remaining) == len(entries):
+                return
+            shutil.copyfile(self.path, f"{self.path}.{int(time.time() * 1000)}.bak")
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for entry in remaining:
+                    f.write(json.dumps(entry) + "\n")
+            os.replace(tmp_path, self.path)
+
+
+def load_config(path):
+    """Read a JSON run config; keys match the command line options (e.g. "max_videos", "failure_policy")."""
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    if not isinstance(config, dict):
+        raise ValueError(f"{path} must contain a JSON object")
+    return {key.replace("-", "_"): value for key, value in config.items()}
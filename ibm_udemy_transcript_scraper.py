@@ -4,24 +4,69 @@ import re
 import sys
 import requests
 import json
+import argparse
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
-from webdriver_manager.chrome import ChromeDriverManager
 from bs4 import BeautifulSoup
-import random
-
-# Add random delays between actions
-time.sleep(random.uniform(2, 5))
+from contextlib import contextmanager
+from artifact_store import ArtifactStore
+from tracing import Tracer, process_tracer, start_metrics_server
+from driver_profiler import DriverProfiler, ProfiledDriver
+from summary_client import SummaryClient, SUMMARY_MODEL, chat_completions_url
+from memory_monitor import MemoryMonitor
+from session_store import SessionStore, ensure_logged_in, inject_session, probe_logged_in
+from browser_startup import launch_browser
+from browser_driver import lecture_id_from_url, LECTURE_LINK_SELECTOR
+from dom_snapshot import take_snapshot
+from transcript_collector import collect_transcript, transcript_completeness
+from panel_state import TranscriptPanel
+from pacing import process_pacer
+from curriculum import read_lecture_page, summarize_curriculum, SKIPPED_TYPES
+from lecture_prefetcher import LecturePrefetcher, PREFETCH_DEPTH, BACKGROUND_TAB_ARGUMENTS
+from failure_policy import (FailurePolicy, FailureAborted, DeadLetterQueue, load_config, ACTIONS,
+                            DEAD_LETTER_PATH)
+from cancellation import (CancellationToken, JobCancelled, DeadlineExceeded, cancellable_input,
+                          DEFAULT_JOB_TIMEOUT, DEFAULT_LECTURE_TIMEOUT)
+
+# Nobody can answer a prompt in headless runs, so prompts fall back to their default after this long
+HEADLESS_PROMPT_TIMEOUT = 60
+# Read each lecture from one serialized DOM snapshot parsed locally instead of dozens of live queries
+SNAPSHOT_MODE = os.environ.get("UDEMY_SNAPSHOT_MODE") == "1"
+
+
+def sanitize_filename(filename):
+    """Sanitize a string to make it suitable as a filename."""
+    # Remove invalid filename characters
+    sanitized = re.sub(r'[\\/*?:"<>|]', "", filename)
+    # Replace spaces and other problematic characters
+    sanitized = re.sub(r'[\s-]+', '_', sanitized)
+    # Ensure the filename isn't too long
+    if len(sanitized) > 100:
+        sanitized = sanitized[:100]
+    return sanitized
 
 class UdemyTranscriptExtractor:
-    def __init__(self, headless=False, summarize=False, api_key=None):
+    def __init__(self, headless=False, summarize=False, api_key=None, cancel_token=None,
+                 lecture_timeout=DEFAULT_LECTURE_TIMEOUT, tracer=None, profile_driver=None, api_base=None,
+                 memory_monitor=None, session_store=None, driver=None, snapshot_mode=None,
+                 prefetch_depth=PREFETCH_DEPTH, interactive=True, failure_policy=None, dead_letter=None,
+                 pacer=None):
         """Initialize the Udemy transcript extractor."""
+        # Per-phase timing spans; aggregates also feed the process-wide metrics
+        self.tracer = tracer or Tracer(parent=process_tracer)
+
+        # Opt-in WebDriver round-trip profiling (also enabled with UDEMY_PROFILE_DRIVER=1)
+        if profile_driver is None:
+            profile_driver = os.environ.get("UDEMY_PROFILE_DRIVER") == "1"
+        self.profiler = DriverProfiler() if profile_driver else None
+
+        # RSS sampled per lecture against UDEMY_MEMORY_BUDGET_MB (allocator tracking with UDEMY_MEMORY_PROFILE=1)
+        self.memory = memory_monitor or MemoryMonitor().start()
+
         self.options = Options()
         if headless:
             self.options.add_argument("--headless")
@@ -35,24 +80,190 @@ class UdemyTranscriptExtractor:
         self.options.add_argument("--disable-blink-features=AutomationControlled")
         self.options.add_experimental_option("excludeSwitches", ["enable-automation"])
         self.options.add_experimental_option("useAutomationExtension", False)
+        if prefetch_depth:
+            for argument in BACKGROUND_TAB_ARGUMENTS:
+                self.options.add_argument(argument)
 
-        service = Service(ChromeDriverManager().install())
-        self.driver = webdriver.Chrome(service=service, options=self.options)
-
-        # Execute CDP commands to prevent detection
-        self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-            "source": """
-            Object.defineProperty(navigator, 'webdriver', {
-                get: () => undefined
+        if driver is not None:
+            # Reuse a browser the caller already started (and logged in with)
+            self.driver = driver
+        else:
+            with self.tracer.span("browser_start"):
+                self.driver = launch_browser(self.options, strategies=("cached_driver", "system_chrome"))
+
+            # Execute CDP commands to prevent detection
+            self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
+                "source": """
+                Object.defineProperty(navigator, 'webdriver', {
+                    get: () => undefined
+                })
+                """
             })
-            """
-        })
 
         self.wait = WebDriverWait(self.driver, 30)
+        # Next lectures load in background tabs while the current one is extracted
+        self.prefetcher = LecturePrefetcher(self.driver, depth=prefetch_depth)
+        # Remembers the toggle that opened the panel and re-applies it when a navigation closes it
+        self.transcript_panel = TranscriptPanel(self.driver)
+        # Navigation pace adapts to how the site responds; shared by every extractor in the process
+        self.pacer = pacer or process_pacer
         self.processed_urls = set()  # Track processed URLs
         self.processed_lectures = set()  # Also track by lecture title
         self.summarize = summarize
         self.api_key = api_key
+        # Summaries go to OPENAI_API_BASE unless api_base points elsewhere (e.g. a local mock server)
+        self.summary_client = SummaryClient(api_key, api_base=api_base, tracer=self.tracer)
+        self.artifacts = ArtifactStore("udemy_transcripts")
+        self.headless = headless
+        # Saved (encrypted) login sessions; UDEMY_SESSION_REUSE=0 forces a manual login every run
+        if session_store is None and os.environ.get("UDEMY_SESSION_REUSE", "1") != "0":
+            session_store = SessionStore()
+        self.session_store = session_store
+        self.snapshot_mode = SNAPSHOT_MODE if snapshot_mode is None else snapshot_mode
+
+        # Unattended runs never prompt; failures follow the policy and end up in the dead-letter file
+        self.interactive = interactive
+        if failure_policy is None and not interactive:
+            failure_policy = FailurePolicy()
+        self.failure_policy = failure_policy
+        if dead_letter is None and not interactive:
+            dead_letter = DeadLetterQueue()
+        self.dead_letter = dead_letter
+        self.course_url = None
+
+        # Cooperative cancellation: the job token, plus a per-lecture child token while a lecture runs
+        self.cancel_token = cancel_token or CancellationToken()
+        self.lecture_timeout = lecture_timeout
+        self.lecture_token = None
+        self.cancel_token.on_cancel(self._release_browser)
+
+    @property
+    def driver(self):
+        return self._driver
+
+    @driver.setter
+    def driver(self, driver):
+        # Drivers handed in later (e.g. by the Streamlit app) get profiled as well
+        if self.profiler is not None and not isinstance(driver, ProfiledDriver):
+            driver = ProfiledDriver(driver, self.profiler)
+        self._driver = driver
+
+    def begin_lecture(self, current_url):
+        """Attribute subsequent spans and WebDriver calls to the lecture at current_url."""
+        if self.profiler is not None and self.profiler.lecture_id is not None:
+            print(self.profiler.lecture_report(self.profiler.lecture_id))
+        lecture_id = lecture_id_from_url(current_url)
+        self.tracer.lecture_id = lecture_id
+        if self.profiler is not None:
+            self.profiler.start_lecture(lecture_id)
+
+    def driver_report(self):
+        """Per-run WebDriver round-trip report, or None when profiling is off."""
+        if self.profiler is None:
+            return None
+        return self.profiler.run_report()
+
+    def take_snapshot(self):
+        """One-round-trip snapshot of the open lecture, or None when snapshot mode is off or it fails."""
+        if not self.snapshot_mode:
+            return None
+        try:
+            with self.tracer.span("dom_snapshot"):
+                return take_snapshot(self.driver)
+        except Exception as e:
+            print(f"DOM snapshot failed, using live lookups: {str(e)}")
+            return None
+
+    def read_lecture_page(self, snapshot=None):
+        """Curriculum item types and the open lecture's type/duration/article text, or None if unreadable."""
+        try:
+            with self.tracer.span("lecture_type"):
+                if snapshot is not None:
+                    return snapshot.lecture_page()
+                return read_lecture_page(self.driver)
+        except Exception as e:
+            print(f"Could not read the lecture type: {str(e)}")
+            return None
+
+    def collect_transcript(self):
+        """Scroll-and-collect every cue of the open panel, or None when there is no panel or it fails."""
+        try:
+            collected = collect_transcript(self.driver)
+        except Exception as e:
+            print(f"Scroll-and-collect failed, reading the rendered cues: {str(e)}")
+            return None
+        if not collected["found"] or not collected["cues"]:
+            return None
+        print(f"Collected {len(collected['cues'])} transcript segments over {collected['steps']} scroll steps.")
+        return collected
+
+    def ensure_transcript_panel(self):
+        """Cheap probe after a navigation; reopens the panel with the known toggle only if it closed."""
+        try:
+            with self.tracer.span("transcript_panel_probe"):
+                result = self.transcript_panel.ensure_open()
+        except Exception as e:
+            print(f"Could not check the transcript panel: {str(e)}")
+            return False
+        state = result.get("state")
+        if state == "reopened":
+            print(f"Transcript panel had closed, reopened it ({result.get('cues')} cues "
+                  f"after {result.get('waited_ms')} ms)")
+        elif state == "no_cues":
+            print(f"Transcript panel shows no cues after {self.transcript_panel.timeout:.0f}s")
+        return state in ("open", "reopened")
+
+    @property
+    def token(self):
+        """Token of the innermost running scope (current lecture, else the whole job)."""
+        return self.lecture_token or self.cancel_token
+
+    @contextmanager
+    def lecture_scope(self):
+        """Run the current lecture under its own deadline."""
+        with self.cancel_token.child(self.lecture_timeout) as token:
+            self.lecture_token = token
+            try:
+                yield token
+            finally:
+                self.lecture_token = None
+
+    def _sleep(self, seconds):
+        """Sleep that is cut short when the job is cancelled."""
+        self.token.sleep(seconds)
+
+    def _input(self, prompt=""):
+        """Prompt that never outlives the job deadline and times out in headless runs."""
+        if not self.interactive:
+            # Every prompt has a default for when nobody answers; use it straight away
+            print(f"{prompt}(non-interactive, using the default)")
+            return ""
+        return cancellable_input(prompt, self.token, timeout=HEADLESS_PROMPT_TIMEOUT if self.headless else None)
+
+    def _handle_failure(self, kind, attempt, url, error, title=None, record=True):
+        """Apply the failure policy to a failed attempt: returns "retry" or "skip", or raises FailureAborted.
+
+        Without a policy (interactive runs) failures are skipped as before.
+        """
+        action = self.failure_policy.decide(kind, attempt) if self.failure_policy is not None else "skip"
+        if action == "retry":
+            delay = self.failure_policy.delay(kind, attempt)
+            print(f"{kind} (attempt {attempt}): {error}. Retrying in {delay:.0f}s...")
+            self._sleep(delay)
+            return "retry"
+        if record and self.dead_letter is not None:
+            self.dead_letter.add(url, kind, error, attempts=attempt, course_url=self.course_url, title=title)
+        if action == "abort":
+            raise FailureAborted(kind, error)
+        return "skip"
+
+    def _release_browser(self):
+        """Quit the browser as soon as the job is cancelled; pending WebDriver calls then fail fast."""
+        try:
+            self.driver.quit()
+            print("Browser released after cancellation.")
+        except Exception as e:
+            print(f"Error releasing browser: {str(e)}")
 
     def wait_for_manual_login(self, url):
         """Navigate to URL and wait for manual login process and CAPTCHA solving."""
@@ -68,142 +279,207 @@ class UdemyTranscriptExtractor:
         print("3. Navigate to the first video of the course")
         print("The script will wait for you to complete these steps.")
         print("After you've completed all steps, press Enter to continue...")
-        input()
+        self._input()
         print("Continuing with transcript extraction...")
 
-    def wait_for_cloudflare_to_clear(self):
-        """Wait until Cloudflare check is completed"""
-        max_wait = 60  # seconds
-        for _ in range(max_wait):
-            if "challenge" in self.driver.current_url or "cloudflare" in self.driver.current_url:
-                time.sleep(1)
-            else:
+    def ensure_logged_in(self, url):
+        """Log in by restoring a saved session, falling back to the manual login flow.
+
+        Returns False when a non-interactive run could not log in.
+        """
+        logged_in_manually = []
+        account = os.environ.get("UDEMY_ACCOUNT")
+
+        def manual_login():
+            if not self.interactive:
+                # Nobody can log in by hand; only a saved session (maybe saved since by another worker) works
+                attempt = 0
+                while True:
+                    attempt += 1
+                    if self._handle_failure("login", attempt, url, "No valid saved login session") != "retry":
+                        return False
+                    if self.reprobe_login(url, account):
+                        return True
+            logged_in_manually.append(True)
+            self.wait_for_manual_login(url)
+            self._sleep(5)  # Allow page to load fully
+            return True
+
+        if not ensure_logged_in(self.driver, url, manual_login, self.session_store,
+                                account=account, token=self.cancel_token):
+            print("Could not log in.")
+            return False
+        # The manual flow ends on the first video; a restored session only gets us to the course URL
+        if not logged_in_manually and lecture_id_from_url(self.driver.current_url) is None:
+            if not self.interactive:
+                self.open_first_lecture()
                 return True
-        return False
+            print("Logged in with the saved session. Navigate to the first video of the course, then press Enter...")
+            self._input()
+        return True
 
-    def extract_all_transcripts(self, course_url, max_videos=0):
-        """Extract transcripts from all videos in sequence with improved tracking."""
+    def reprobe_login(self, url, account=None):
+        """Restore the saved session again, if there is one, and check whether the browser is logged in."""
         try:
-            # Wait for manual login first
-            self.wait_for_manual_login(course_url)
-            time.sleep(5)  # Allow page to load fully
+            state = self.session_store.load(account) if self.session_store is not None else None
+            if state:
+                inject_session(self.driver, state)
+            return probe_logged_in(self.driver, url)
+        except Exception as e:
+            print(f"Login check failed: {str(e)}")
+            return False
+
+    def open_first_lecture(self):
+        """Go to the first lecture linked from the current course page."""
+        links = self.driver.execute_script(
+            "return Array.from(document.querySelectorAll(arguments[0]), a => a.href);", LECTURE_LINK_SELECTOR)
+        if links:
+            print(f"Opening the first lecture: {links[0]}")
+            self.driver.get(links[0])
+            self._sleep(3)
+        else:
+            print("No lecture link found on the course page.")
 
-            print("Opening transcript panel for the first time...")
-            if self.find_and_enable_transcript():
+    def wait_for_cloudflare_to_clear(self):
+        """Wait until Cloudflare check is completed"""
+        return self.pacer.wait_for_challenge(self.driver, self.token)
+
+    def prepare_run(self, course_url):
+        """Log in, open the transcript panel and create the output folders; returns (output_dir, summary_dir)."""
+        self.course_url = course_url
+        # Reuse a saved login when it still works, otherwise wait for manual login
+        with self.tracer.span("login"):
+            if not self.ensure_logged_in(course_url):
+                # Carrying on logged out would only fail every lecture
+                raise FailureAborted("login", "Could not log in to Udemy")
+
+        page = self.read_lecture_page()
+        if page and page["items"]:
+            counts, video_seconds = summarize_curriculum(page["items"])
+            print("Curriculum: " + ", ".join(f"{count} {kind}" for kind, count in sorted(counts.items()))
+                  + f" ({video_seconds / 3600:.1f}h of video)")
+        # Quizzes and articles have no transcript panel; it gets opened on the first video instead
+        first_is_video = not page or page["type"] in ("video", "unknown")
+
+        print("Opening transcript panel for the first time...")
+        attempt = 0
+        while first_is_video:
+            attempt += 1
+            with self.tracer.span("transcript_panel_open"):
+                panel_open = self.find_and_enable_transcript()
+            if panel_open:
                 print("Successfully opened transcript panel")
-            else:
+                break
+            if self.interactive:
                 print("Could not open transcript panel. Please open it manually and press Enter to continue...")
-                input()
-
-            # Try to get course title or prompt for it if not found
-            course_title = self.get_course_title()
-            if course_title == f"udemy_course_{int(time.time())}":
-                print("\nCouldn't detect course title automatically.")
-                manual_course = input("Please enter the course title manually: ").strip()
-                if manual_course:
-                    course_title = self.sanitize_filename(manual_course)
-                    print(f"Using manual course title: {course_title}")
-
-            print(f"Course title: {course_title}")
-
-            # Create output directories
-            output_dir = os.path.join("udemy_transcripts", course_title)
-            os.makedirs(output_dir, exist_ok=True)
+                self._input()
+                break
+            if self._handle_failure("transcript_panel", attempt, self.driver.current_url,
+                                    "Could not open the transcript panel", record=False) != "retry":
+                break
+            self.driver.refresh()
+            self._sleep(3)
+
+        # Try to get course title or prompt for it if not found
+        course_title = self.get_course_title(self.take_snapshot())
+        if course_title == f"udemy_course_{int(time.time())}":
+            print("\nCouldn't detect course title automatically.")
+            manual_course = self._input("Please enter the course title manually: ").strip()
+            if manual_course:
+                course_title = self.sanitize_filename(manual_course)
+                print(f"Using manual course title: {course_title}")
+
+        print(f"Course title: {course_title}")
+
+        # Create output directories
+        output_dir = os.path.join("udemy_transcripts", course_title)
+        os.makedirs(output_dir, exist_ok=True)
+
+        summary_dir = None
+        if self.summarize:
+            summary_dir = os.path.join(output_dir, "summaries")
+            os.makedirs(summary_dir, exist_ok=True)
+        return output_dir, summary_dir
+
+    def process_lecture_with_policy(self, current_url, output_dir, summary_dir, video_count):
+        """process_current_lecture() under the lecture deadline, retried/skipped/aborted per the failure policy."""
+        attempt = 0
+        while True:
+            attempt += 1
+            # Each lecture runs under its own deadline so one stuck page can't stall the run
+            try:
+                with self.lecture_scope():
+                    outcome = self.process_current_lecture(current_url, output_dir, summary_dir, video_count)
+                if outcome != "no_transcript":
+                    return outcome
+                kind, error = "no_transcript", "No transcript found"
+            except DeadlineExceeded:
+                if self.cancel_token.cancelled:
+                    raise
+                print(f"Lecture exceeded its {self.lecture_timeout:.0f}s deadline.")
+                outcome = "timeout"
+                kind, error = "lecture_timeout", f"Exceeded the {self.lecture_timeout:.0f}s lecture deadline"
+            except (JobCancelled, FailureAborted):
+                raise
+            except Exception as e:
+                if self.failure_policy is None:
+                    raise
+                outcome = "error"
+                kind, error = "lecture_error", str(e)
+            if kind != "no_transcript":
+                # Timeouts and errors piling up are back-pressure too; a lecture without captions is not
+                self.pacer.observe("error")
+
+            if self._handle_failure(kind, attempt, current_url, error) != "retry":
+                print(f"Skipping lecture: {error}")
+                return outcome
+            # Start the retry from a freshly loaded page
+            self.driver.refresh()
+            self._sleep(3)
+            self.ensure_transcript_panel()
 
-            if self.summarize:
-                summary_dir = os.path.join(output_dir, "summaries")
-                os.makedirs(summary_dir, exist_ok=True)
+    def extract_all_transcripts(self, course_url, max_videos=0):
+        """Extract transcripts from all videos in sequence with improved tracking."""
+        try:
+            output_dir, summary_dir = self.prepare_run(course_url)
 
             video_count = 0
 
             while max_videos == 0 or video_count < max_videos:
+                self.cancel_token.raise_if_cancelled()
                 current_url = self.driver.current_url
                 print(f"Current URL: {current_url}")
+                self.begin_lecture(current_url)
+                self.prefetcher.prefetch(current_url)
 
-                # Get lecture information with enhanced detection
-                lecture_info = self.get_detailed_lecture_info()
-                full_title = lecture_info["full_title"]
-
-                # Ensure we have a valid title
-                if not full_title or full_title.strip() == "":
-                    print("Failed to get a valid lecture title. Please provide one manually:")
-                    manual_number = input("Enter lecture number (e.g. '88'): ").strip()
-                    manual_title = input("Enter lecture title (e.g. 'Replication'): ").strip()
-
-                    if manual_number and manual_title:
-                        full_title = f"{manual_number}. {manual_title}"
-                        print(f"Using manual title: {full_title}")
-                    else:
-                        # Use URL component as last resort
-                        lecture_id = re.search(r'/lecture/(\d+)', current_url).group(1) if re.search(r'/lecture/(\d+)',
-                                                                                                     current_url) else str(
-                            int(time.time()))
-                        full_title = f"Lecture_{lecture_id}"
-                        print(f"Using fallback title: {full_title}")
-
-                # Use the full title format for files
-                formatted_title = full_title
-
-                if formatted_title in self.processed_lectures:
-                    print(f"Already processed lecture: {formatted_title}. Trying to move to next video...")
-                    if not self.navigate_to_next_video():
-                        print("No more videos to process. Exiting.")
-                        break
-                    time.sleep(3)
-                    continue
-
-                print(f"\n[{video_count + 1}] Processing video: {formatted_title}")
-
-                transcript_text = self.extract_transcript_text()
-
-                if transcript_text:
-                    safe_title = self.sanitize_filename(formatted_title)
-                    filename = f"{safe_title}.txt"
-                    filepath = os.path.join(output_dir, filename)
-
-                    with open(filepath, 'w', encoding='utf-8') as f:
-                        f.write("\n".join(transcript_text))
-
-                    print(f"Transcript saved to: {filepath}")
+                outcome = self.process_lecture_with_policy(current_url, output_dir, summary_dir, video_count)
 
-                    if self.summarize and self.api_key:
-                        try:
-                            print(f"Generating summary for: {formatted_title}")
-                            summary = self.generate_notion_friendly_summary(
-                                "\n".join(transcript_text),
-                                formatted_title,  # Pass the full lecture title with number
-                                lecture_info.get("number", "")
-                            )
-
-                            if summary:
-                                # Use the same naming scheme for summary files
-                                summary_filename = f"{safe_title}_summary.md"
-                                summary_filepath = os.path.join(summary_dir, summary_filename)
-
-                                with open(summary_filepath, 'w', encoding='utf-8') as f:
-                                    f.write(summary)
-
-                                print(f"Summary saved to: {summary_filepath}")
-                            else:
-                                print(f"Failed to generate summary for: {formatted_title}")
-                        except Exception as e:
-                            print(f"Error generating summary: {str(e)}")
-
-                    self.processed_lectures.add(formatted_title)
-                    self.processed_urls.add(current_url)
+                if outcome == "processed":
                     video_count += 1
-                else:
-                    print(f"No transcript found for {formatted_title}")
+                # Transcripts are already on disk here, so going over budget just stops the run cleanly
+                self.memory.check(self.tracer.lecture_id)
 
-                if not self.navigate_to_next_video():
+                navigated = self.next_lecture(current_url)
+                if not navigated:
                     print("No more videos to process. Exiting.")
                     break
 
-                time.sleep(3)
-
             print(f"\nCompleted processing {video_count} videos.")
+            if self.prefetcher.enabled:
+                print(f"Prefetched lectures used: {self.prefetcher.hits}, navigated normally: {self.prefetcher.misses}")
+            print(f"Pacing: {self.pacer.describe()}")
+            print(f"Transcript panel reopened after {self.transcript_panel.reopened} of "
+                  f"{self.transcript_panel.probes} navigations")
             return True
 
+        except JobCancelled as e:
+            print(f"Extraction stopped: {str(e)}")
+            return False
+
+        except FailureAborted as e:
+            print(f"Run aborted by failure policy: {str(e)}")
+            return False
+
         except Exception as e:
             print(f"Error extracting transcripts: {str(e)}")
             import traceback
@@ -212,87 +488,210 @@ class UdemyTranscriptExtractor:
             print("Error screenshot saved as error_screenshot.png")
             return False
 
-    def generate_notion_friendly_summary(self, transcript_text, lecture_title, lecture_number):
-        """Generate a Notion-friendly summary of the transcript using GPT-4."""
-        prompt = f"""Create a visually appealing, well-structured summary of this lecture transcript that will look great in Notion. The lecture title is: {lecture_title}.
-
-    Follow these specific formatting guidelines for Notion:
-
-    1. Start with a large H1 header showing the exact lecture title: {lecture_title} 
-    2. Create a clear table of contents with H2 headers for main sections 
-    3. Use proper Markdown formatting that Notion supports:
-       - H1, H2, H3 headers for hierarchy (use # syntax)
-       - Bold text using **double asterisks** for important concepts
-       - Create clean bullet points and numbered lists where appropriate
-       - Use `code blocks` for any technical terms, commands, or syntax
-       - Create toggle lists for detailed explanations (use the > format)
-       - Use proper block quotes for important quotations (use > for this)
-       - Add horizontal dividers (---) between major sections
-       - Use emojis to highlight key areas (📌, 🔑, ⚠️, 💡, etc.)
-
-    4. Structure the content as follows:
-       - Brief overview (2-3 sentences)
-       - Key concepts with clear explanations
-       - Important definitions highlighted
-       - Step-by-step processes where applicable
-       - Visual hierarchy that makes the summary scannable
-       - A "Key Takeaways" section at the end
-
-    5. Make the summary visually engaging with:
-       - Consistent formatting
-       - Strategic use of whitespace
-       - Font variations (bold, italic) to guide the eye
-       - Emoji icons (sparingly) as visual markers
-
-    Create this summary specifically to look outstanding when imported into Notion. Prioritize clarity, visual structure, and professional appearance.
-
-    Transcript:
-    """
-
-        url = "https://api.openai.com/v1/chat/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
+    def next_lecture(self, current_url):
+        """Move on to the next lecture (a prefetched tab if there is one), with the navigation failure policy."""
+        attempt = 0
+        while True:
+            attempt += 1
+            with self.pacer.slot(self.token):
+                self.pacer.wait(self.token)
+                started = time.perf_counter()
+                with self.tracer.span("next_lecture_navigation"):
+                    navigated = self.prefetcher.advance(current_url) or self.navigate_to_next_video()
+                if navigated:
+                    self.pacer.check_page(self.driver, time.perf_counter() - started, self.token)
+            if navigated:
+                self.ensure_transcript_panel()
+                return True
+            # On the last lecture there is no Next button either, so skipping just ends the run
+            if self._handle_failure("navigation", attempt, current_url, "Could not move to the next lecture",
+                                    record=False) != "retry":
+                return False
 
-        data = {
-            "model": "gpt-4o-mini",  # Changed from "gpt-4" to "gpt-4o-mini"
-            "messages": [
-                {"role": "system",
-                 "content": "You are an expert educational content specialist with deep expertise in knowledge synthesis, information architecture, and technical communication. Your specialty is transforming complex educational content into beautifully structured, comprehensive summaries optimized for Notion. You excel at identifying core concepts, establishing clear hierarchical relationships between ideas, highlighting key terminology with proper definitions, and creating visually engaging layouts that enhance learning retention. You incorporate learning psychology principles by including memorable examples, analogies, and visual cues throughout your summaries. For technical content, you ensure precise explanations of processes and concepts. You maintain academic rigor while making complex topics accessible, and you're skilled at creating summaries that serve as both quick reference materials and comprehensive study guides."},
-                {"role": "user", "content": prompt + transcript_text}
-            ],
-            "temperature": 0.7,
-            "max_tokens": 2500
-        }
+    def extract_lecture_urls(self, urls, taken_from=None):
+        """Extract specific lectures of one course (e.g. from the dead-letter file) by opening each URL.
 
+        With ``taken_from`` (the DeadLetterQueue the URLs were read from) they only leave that
+        file once the run has logged in, so a failed launch or login keeps them queued.
+        """
         try:
-            response = requests.post(url, headers=headers, data=json.dumps(data))
-            response.raise_for_status()
+            output_dir, summary_dir = self.prepare_run(urls[0])
+            if taken_from is not None:
+                taken_from.remove(urls)
+            processed = 0
+            for index, url in enumerate(urls):
+                self.cancel_token.raise_if_cancelled()
+                if lecture_id_from_url(self.driver.current_url) != lecture_id_from_url(url):
+                    self.driver.get(url)
+                    self._sleep(3)
+                    self.ensure_transcript_panel()
+                self.begin_lecture(url)
+                if self.process_lecture_with_policy(url, output_dir, summary_dir, index) == "processed":
+                    processed += 1
+                self.memory.check(self.tracer.lecture_id)
+
+            print(f"\nRetried {len(urls)} lectures, {processed} extracted.")
+            return True
 
-            result = response.json()
-            if "choices" in result and len(result["choices"]) > 0:
-                return result["choices"][0]["message"]["content"]
-            else:
-                print("Unexpected API response format")
+        except JobCancelled as e:
+            print(f"Extraction stopped: {str(e)}")
+            return False
+
+        except FailureAborted as e:
+            print(f"Run aborted by failure policy: {str(e)}")
+            return False
+
+        except Exception as e:
+            print(f"Error retrying lectures: {str(e)}")
+            import traceback
+            traceback.print_exc()
+            return False
+
+    def process_current_lecture(self, current_url, output_dir, summary_dir, video_count):
+        """Extract, save and optionally summarize the lecture currently open in the browser.
+
+        Returns "processed", "already_processed", "skipped" (quizzes, exercises, resources) or "no_transcript".
+        """
+        # In snapshot mode title and cues both come from a single DOM snapshot
+        snapshot = self.take_snapshot()
+        try:
+            # Get lecture information with enhanced detection
+            lecture_info = self.get_detailed_lecture_info(snapshot)
+            full_title = lecture_info["full_title"]
+
+            # Quizzes, exercises and resources have no transcript; don't spend the selector cascade on them
+            page = self.read_lecture_page(snapshot)
+            lecture_info["type"] = page["type"] if page else "unknown"
+            lecture_info["duration"] = page["duration"] if page else None
+            if lecture_info["type"] in SKIPPED_TYPES:
+                print(f"Skipping {lecture_info['type']}: {full_title or current_url}")
+                return "skipped"
+
+            # Ensure we have a valid title
+            if not full_title or full_title.strip() == "":
+                print("Failed to get a valid lecture title. Please provide one manually:")
+                manual_number = self._input("Enter lecture number (e.g. '88'): ").strip()
+                manual_title = self._input("Enter lecture title (e.g. 'Replication'): ").strip()
+
+                if manual_number and manual_title:
+                    full_title = f"{manual_number}. {manual_title}"
+                    print(f"Using manual title: {full_title}")
+                else:
+                    # Use URL component as last resort
+                    lecture_id = re.search(r'/lecture/(\d+)', current_url).group(1) if re.search(r'/lecture/(\d+)',
+                                                                                                 current_url) else str(
+                        int(time.time()))
+                    full_title = f"Lecture_{lecture_id}"
+                    print(f"Using fallback title: {full_title}")
+
+            # Use the full title format for files
+            formatted_title = full_title
+
+            if formatted_title in self.processed_lectures:
+                print(f"Already processed lecture: {formatted_title}. Trying to move to next video...")
+                return "already_processed"
+
+            transcript_text = self.extract_lecture_content(lecture_info, page, formatted_title, video_count, snapshot)
+        finally:
+            # Every path, early returns included, releases the parsed snapshot
+            if snapshot is not None:
+                snapshot.close()
+
+        if transcript_text is None:
+            self.processed_lectures.add(formatted_title)
+            return "skipped"
+
+        if not transcript_text:
+            print(f"No transcript found for {formatted_title}")
+            return "no_transcript"
+
+        safe_title = self.sanitize_filename(formatted_title)
+        filename = f"{safe_title}.txt"
+        filepath = os.path.join(output_dir, filename)
+        transcript_content = "\n".join(transcript_text)
+
+        # Identical lectures across courses/re-runs share a single blob
+        with self.tracer.span("file_write"):
+            transcript_digest = self.artifacts.store_file(output_dir, filename, transcript_content)
+
+        print(f"Transcript saved to: {filepath}")
+
+        if self.summarize and self.api_key and not lecture_info.get("complete", True):
+            # A summary of half a lecture is worse than none; a later run can capture it fully
+            print(f"Not summarizing partial transcript of: {formatted_title}")
+        elif self.summarize and self.api_key:
+            try:
+                summary_variant = self.artifacts.summary_variant(SUMMARY_MODEL, formatted_title)
+                summary = self.artifacts.get_summary(transcript_digest, summary_variant)
+                if summary:
+                    print(f"Reusing existing summary for: {formatted_title}")
+                else:
+                    print(f"Generating summary for: {formatted_title}")
+                    summary = self.generate_notion_friendly_summary(
+                        transcript_content,
+                        formatted_title,  # Pass the full lecture title with number
+                        lecture_info.get("number", "")
+                    )
+                    if summary:
+                        self.artifacts.put_summary(transcript_digest, summary, summary_variant)
+
+                if summary:
+                    # Use the same naming scheme for summary files
+                    summary_filename = f"{safe_title}_summary.md"
+                    summary_filepath = os.path.join(summary_dir, summary_filename)
+
+                    with self.tracer.span("file_write"):
+                        self.artifacts.store_file(output_dir, os.path.join("summaries", summary_filename),
+                                                  summary, kind="summary")
+
+                    print(f"Summary saved to: {summary_filepath}")
+                else:
+                    print(f"Failed to generate summary for: {formatted_title}")
+            except Exception as e:
+                print(f"Error generating summary: {str(e)}")
+
+        self.processed_lectures.add(formatted_title)
+        self.processed_urls.add(current_url)
+        return "processed"
+
+    def extract_lecture_content(self, lecture_info, page, formatted_title, video_count, snapshot=None):
+        """Lines of text for the open lecture: cues for videos, the body for articles (None if it is empty).
+
+        Sets lecture_info["complete"] to False (with a "truncated_reason") when a video's
+        transcript looks cut short for its duration.
+        """
+        lecture_info["complete"] = True
+        if page and page["type"] == "article":
+            print(f"\n[{video_count + 1}] Processing article: {formatted_title}")
+            if not page["article_lines"]:
+                print(f"Article has no text, skipping: {formatted_title}")
                 return None
-        except requests.exceptions.RequestException as e:
-            print(f"API request failed: {str(e)}")
-            if hasattr(e, 'response') and e.response:
-                print(f"Response status: {e.response.status_code}")
-                print(f"Response body: {e.response.text}")
-            return None
+            return page["article_lines"]
+
+        print(f"\n[{video_count + 1}] Processing video: {formatted_title}")
+        with self.tracer.span("cue_extraction"):
+            # Virtualized panels only render the visible cues, so scroll through the whole list first
+            collected = self.collect_transcript()
+            if collected:
+                transcript_text, timed_out = collected["cues"], collected["timed_out"]
+            else:
+                transcript_text, timed_out = self.extract_transcript_text(snapshot), False
+        if transcript_text:
+            complete, reason = transcript_completeness(transcript_text, lecture_info.get("duration"), timed_out)
+            if not complete:
+                print(f"Transcript looks truncated: {reason}")
+                lecture_info["complete"] = False
+                lecture_info["truncated_reason"] = reason
+        return transcript_text
+
+    def generate_notion_friendly_summary(self, transcript_text, lecture_title, lecture_number):
+        """Generate a Notion-friendly summary of the transcript using GPT-4."""
+        # Retries on 429/5xx happen inside the client; cancelling the job stops waiting at once
+        return self.summary_client.summarize(transcript_text, lecture_title, token=self.token)
 
     def sanitize_filename(self, filename):
         """Sanitize a string to make it suitable as a filename."""
-        # Remove invalid filename characters
-        sanitized = re.sub(r'[\\/*?:"<>|]', "", filename)
-        # Replace spaces and other problematic characters
-        sanitized = re.sub(r'[\s-]+', '_', sanitized)
-        # Ensure the filename isn't too long
-        if len(sanitized) > 100:
-            sanitized = sanitized[:100]
-        return sanitized
+        return sanitize_filename(filename)
 
     def navigate_to_next_video(self):
         """Click the 'Next' button to navigate to the next video."""
@@ -316,6 +715,7 @@ class UdemyTranscriptExtractor:
             ]
 
             for selector in next_button_selectors:
+                self.token.raise_if_cancelled()
                 try:
                     next_buttons = self.driver.find_elements(By.CSS_SELECTOR, selector)
                     if next_buttons:
@@ -325,14 +725,14 @@ class UdemyTranscriptExtractor:
                                     # Scroll to the button to make sure it's in view
                                     self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});",
                                                                button)
-                                    time.sleep(0.5)
+                                    self._sleep(0.5)
 
                                     # Click using JavaScript for more reliable clicking
                                     self.driver.execute_script("arguments[0].click();", button)
                                     print(f"Successfully clicked 'Next' button with selector: {selector}")
                                     found_and_clicked = True
                                     break
-                            except:
+                            except Exception:
                                 continue
                         if found_and_clicked:
                             break
@@ -353,6 +753,7 @@ class UdemyTranscriptExtractor:
                     ]
 
                     for xpath in next_xpath_selectors:
+                        self.token.raise_if_cancelled()
                         elements = self.driver.find_elements(By.XPATH, xpath)
                         if elements:
                             for elem in elements:
@@ -361,12 +762,12 @@ class UdemyTranscriptExtractor:
                                         # Scroll and click
                                         self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});",
                                                                    elem)
-                                        time.sleep(0.5)
+                                        self._sleep(0.5)
                                         self.driver.execute_script("arguments[0].click();", elem)
                                         print(f"Successfully clicked element with XPath: {xpath}")
                                         found_and_clicked = True
                                         break
-                                except:
+                                except Exception:
                                     continue
                             if found_and_clicked:
                                 break
@@ -383,16 +784,16 @@ class UdemyTranscriptExtractor:
                     print("\nCould not find 'Next' button automatically. You have options:")
                     print("1. Manually navigate to the next video and continue")
                     print("2. Stop extraction")
-                    choice = input("Enter choice (1 or 2): ")
+                    choice = self._input("Enter choice (1 or 2): ")
 
                     if choice == "1":
                         print("Please navigate to the next video in the browser window.")
                         print("After navigating, press Enter to continue...")
-                        input()
+                        self._input()
                         found_and_clicked = True
                     else:
                         return False
-                except:
+                except Exception:
                     return False
 
             # Check if navigation was successful by waiting for URL change
@@ -403,9 +804,9 @@ class UdemyTranscriptExtractor:
                 if self.driver.current_url != current_url:
                     print("Successfully navigated to next video")
                     # Wait to make sure the page loads properly
-                    time.sleep(2)
+                    self._sleep(2)
                     return True
-                time.sleep(1)
+                self._sleep(1)
                 wait_time += 1
 
             if found_and_clicked:
@@ -436,6 +837,7 @@ class UdemyTranscriptExtractor:
         ]
 
         for selector in toggle_selectors:
+            self.token.raise_if_cancelled()
             try:
                 print(f"Looking for transcript toggle with selector: {selector}")
                 elements = self.driver.find_elements(By.CSS_SELECTOR, selector)
@@ -444,7 +846,8 @@ class UdemyTranscriptExtractor:
                     print(f"Found {len(elements)} potential transcript buttons, clicking the first one...")
                     # Try to click using JavaScript for more reliable clicking
                     self.driver.execute_script("arguments[0].click();", elements[0])
-                    time.sleep(2)
+                    self._sleep(2)
+                    self.transcript_panel.remember(selector)
                     return True
             except Exception as e:
                 print(f"Selector {selector} not found or couldn't be clicked. Error: {str(e)}")
@@ -459,11 +862,11 @@ class UdemyTranscriptExtractor:
                 for elem in all_elements[:5]:  # Try first 5 to avoid clicking too many
                     try:
                         self.driver.execute_script("arguments[0].click();", elem)
-                        time.sleep(1)
+                        self._sleep(1)
                         print("Clicked an element containing 'transcript'")
-                    except:
+                    except Exception:
                         pass
-        except:
+        except Exception:
             pass
 
         # Check if transcript is already visible
@@ -479,7 +882,7 @@ class UdemyTranscriptExtractor:
                 if self.driver.find_elements(By.CSS_SELECTOR, container):
                     print(f"Transcript panel appears to be already visible (found {container}).")
                     return True
-        except:
+        except Exception:
             pass
 
         print("Could not find or enable transcript panel. Taking a screenshot for debugging...")
@@ -488,11 +891,18 @@ class UdemyTranscriptExtractor:
         print("\nPlease check the screenshot to see the current state of the page.")
         print("If you can see the transcript button, you can try to click it manually.")
         print("After clicking the transcript button manually, press Enter to continue...")
-        input()
+        self._input()
         return True
 
-    def extract_transcript_text(self):
+    def extract_transcript_text(self, snapshot=None):
         """Try multiple methods to extract transcript text."""
+        # Parsed locally from the snapshot when there is one; the live methods only run if it has no cues
+        if snapshot is not None:
+            transcript_text = snapshot.cues()
+            if transcript_text:
+                print(f"Extracted {len(transcript_text)} transcript segments from the DOM snapshot.")
+                return transcript_text
+
         # Array of text content
         transcript_text = []
 
@@ -536,6 +946,7 @@ class UdemyTranscriptExtractor:
         ]
 
         for method in methods:
+            self.token.raise_if_cancelled()
             try:
                 print(f"Trying to extract transcript with selector: {method['selector']}")
 
@@ -547,6 +958,9 @@ class UdemyTranscriptExtractor:
                         # Parse the HTML to extract text
                         soup = BeautifulSoup(html_content, 'html.parser')
                         texts = [text.strip() for text in soup.stripped_strings if text.strip()]
+                        # Free the parse tree right away, it is many times the size of the text
+                        soup.decompose()
+                        del soup, html_content
                         if texts:
                             transcript_text = texts
                 else:
@@ -587,20 +1001,27 @@ class UdemyTranscriptExtractor:
         print("All automated methods failed. You can try to manually copy the transcript.")
         print("If you can see the transcript on the page, press Enter to take a screenshot")
         print("and then try to extract the text from the screenshot...")
-        input()
+        self._input()
         self.driver.save_screenshot("transcript_content_debug.png")
         print("Screenshot saved as transcript_content_debug.png")
 
         return []
 
-    def get_detailed_lecture_info(self):
+    def get_detailed_lecture_info(self, snapshot=None):
         """Get detailed lecture info including title, section, and lecture number with improved targeting."""
+        if snapshot is not None:
+            lecture_info = snapshot.lecture_info()
+            if lecture_info["full_title"]:
+                print(f"Found lecture info in DOM snapshot: '{lecture_info['full_title']}'")
+                return lecture_info
+
         lecture_info = {
             "title": "",
             "section": "",
             "number": "",
             "full_title": ""
         }
+        self.token.raise_if_cancelled()
 
         # Method 1: Look for the active/current lecture element specifically
         try:
@@ -645,7 +1066,7 @@ class UdemyTranscriptExtractor:
                                     # If we found valid info, return it immediately
                                     if lecture_info["full_title"]:
                                         return lecture_info
-                        except:
+                        except Exception:
                             continue
         except Exception as e:
             print(f"Active element approach failed: {str(e)}")
@@ -762,8 +1183,8 @@ class UdemyTranscriptExtractor:
         # If all methods fail, prompt for manual input
         if not lecture_info["full_title"]:
             print("\nCouldn't detect lecture title automatically.")
-            manual_number = input("Enter lecture number (e.g. '3'): ").strip()
-            manual_title = input("Enter lecture title (e.g. 'Provisioning a Snowflake Trial Account'): ").strip()
+            manual_number = self._input("Enter lecture number (e.g. '3'): ").strip()
+            manual_title = self._input("Enter lecture title (e.g. 'Provisioning a Snowflake Trial Account'): ").strip()
 
             if manual_number and manual_title:
                 lecture_info["number"] = manual_number
@@ -873,13 +1294,20 @@ class UdemyTranscriptExtractor:
                 else:
                     # Generate a timestamp-based title as last resort
                     lecture_info["title"] = f"lecture_{int(time.time())}"
-            except:
+            except Exception:
                 lecture_info["title"] = f"lecture_{int(time.time())}"
 
         return lecture_info
 
-    def get_course_title(self):
+    def get_course_title(self, snapshot=None):
         """Get the course title using multiple selectors and JavaScript."""
+        if snapshot is not None:
+            course_title = snapshot.course_title()
+            snapshot.close()
+            if course_title:
+                print(f"Found course title in DOM snapshot: {course_title}")
+                return self.sanitize_filename(course_title)
+
         # Try using JavaScript first
         try:
             course_title_js = """
@@ -913,7 +1341,7 @@ class UdemyTranscriptExtractor:
                             if title:
                                 print(f"Found course title with selector {selector}: {title}")
                                 return self.sanitize_filename(title)
-            except:
+            except Exception:
                 pass
 
         # Look for title in page title
@@ -924,7 +1352,7 @@ class UdemyTranscriptExtractor:
                 title = re.sub(r'\s*\|.*$', '', page_title).strip()
                 print(f"Using page title: {title}")
                 return self.sanitize_filename(title)
-        except:
+        except Exception:
             pass
 
         # Final fallback - use timestamp
@@ -932,7 +1360,11 @@ class UdemyTranscriptExtractor:
 
     def close(self):
         """Close the browser."""
-        self.driver.quit()
+        try:
+            self.driver.quit()
+        except Exception as e:
+            # Already released, e.g. after a cancellation
+            print(f"Browser was already closed: {str(e)}")
         print("Browser closed.")
         print('-----------------------')
         print("From Houssini With Love")
@@ -942,16 +1374,16 @@ class UdemyTranscriptExtractor:
 
 
 
-def validate_api_key(api_key):
+def validate_api_key(api_key, api_base=None):
     """Validate the OpenAI API key by making a simple test request."""
-    url = "https://api.openai.com/v1/chat/completions"
+    url = chat_completions_url(api_base)
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {api_key}"
     }
 
     data = {
-        "model": "gpt-4o-mini",  # Changed from "gpt-4" to "gpt-4o-mini"
+        "model": SUMMARY_MODEL,
         "messages": [
             {"role": "user", "content": "Hello"}
         ],
@@ -970,37 +1402,84 @@ def validate_api_key(api_key):
         return False
 
 
-def main():
+def parse_args(argv=None):
+    """Command line options; values from --config fill in whatever was not given on the command line."""
+    parser = argparse.ArgumentParser(description="Extract (and optionally summarize) Udemy course transcripts.")
+    parser.add_argument("url", nargs="?", help="Udemy course or lecture URL")
+    parser.add_argument("--config", help="JSON file with any of these options, plus \"failure_policy\" rules")
+    parser.add_argument("--max-videos", type=int, help="Maximum number of videos to process (0 for all)")
+    parser.add_argument("--summarize", action="store_true", default=None, help="Generate summaries")
+    parser.add_argument("--api-key", help="OpenAI API key (defaults to OPENAI_API_KEY)")
+    parser.add_argument("--api-base", help="OpenAI-compatible API base URL")
+    parser.add_argument("--headless", action="store_true", default=None, help="Run the browser headless")
+    parser.add_argument("--profile-driver", action="store_true", default=None,
+                        help="Report WebDriver round trips per lecture")
+    parser.add_argument("--non-interactive", action="store_true", default=None,
+                        help="Never prompt; failures follow the failure policy (needs a saved login session)")
+    parser.add_argument("--on-failure", choices=ACTIONS,
+                        help="Action for every kind of failure (per-kind rules go in the config file)")
+    parser.add_argument("--retries", type=int, help="Retries per failure before the fallback action")
+    parser.add_argument("--dead-letter", help=f"Where failed lectures are recorded (default {DEAD_LETTER_PATH})")
+    parser.add_argument("--retry-dead-letter", action="store_true", default=None,
+                        help="Retry the lectures recorded in the dead-letter file instead of a course")
+    args = parser.parse_args(argv)
+
+    if args.config:
+        for key, value in load_config(args.config).items():
+            if getattr(args, key, None) is None:
+                setattr(args, key, value)
+    return args
+
+
+def main(argv=None):
     """Main function to handle user input and control the transcript extraction."""
-    # Check if URL was provided as command line argument
-    if len(sys.argv) > 1:
-        url = sys.argv[1]
-    else:
+    args = parse_args(argv)
+    interactive = not args.non_interactive
+    url = args.url
+
+    if args.retry_dead_letter:
+        # Only read here; each course's lectures leave the file once its retry run has logged in
+        retry_urls = DeadLetterQueue(args.dead_letter or DEAD_LETTER_PATH).urls()
+        if not retry_urls:
+            print("The dead-letter file is empty, nothing to retry.")
+            return
+        print(f"Retrying {len(retry_urls)} dead-lettered lectures.")
+    elif not url:
+        if not interactive:
+            sys.exit("A course URL is required in non-interactive mode.")
         # Prompt for URL if not provided as argument
         url = input("Enter Udemy course URL: ")
 
-    # Ask user how many videos to process with clear instructions
-    try:
-        user_input = input("Enter the maximum number of videos to process (enter 0 for all videos): ")
-        if user_input.strip() == "0" or user_input.strip() == "":
+    max_videos = args.max_videos
+    if max_videos is None and interactive:
+        # Ask user how many videos to process with clear instructions
+        try:
+            user_input = input("Enter the maximum number of videos to process (enter 0 for all videos): ")
+            if user_input.strip() == "0" or user_input.strip() == "":
+                max_videos = 0
+                print("Will process all available videos.")
+            else:
+                max_videos = int(user_input)
+                print(f"Will process up to {max_videos} videos.")
+        except ValueError:
+            print("Invalid input, defaulting to process all videos.")
             max_videos = 0
-            print("Will process all available videos.")
-        else:
-            max_videos = int(user_input)
-            print(f"Will process up to {max_videos} videos.")
-    except ValueError:
-        print("Invalid input, defaulting to process all videos.")
-        max_videos = 0
+    max_videos = max_videos or 0
 
-    # Ask if the user wants to generate summaries
-    summarize_input = input("Do you want to generate summaries for the lectures using GPT-4? (y/n): ").lower()
-    summarize = summarize_input == 'y' or summarize_input == 'yes'
+    summarize = args.summarize
+    if summarize is None and interactive:
+        # Ask if the user wants to generate summaries
+        summarize_input = input("Do you want to generate summaries for the lectures using GPT-4? (y/n): ").lower()
+        summarize = summarize_input == 'y' or summarize_input == 'yes'
+    summarize = bool(summarize)
 
     api_key = None
     if summarize:
-        api_key = input("Please provide your OpenAI API key: ").strip()
+        api_key = args.api_key or os.environ.get("OPENAI_API_KEY")
+        if not api_key and interactive:
+            api_key = input("Please provide your OpenAI API key: ").strip()
         print("Validating API key...")
-        if not validate_api_key(api_key):
+        if not api_key or not validate_api_key(api_key, args.api_base):
             print("Invalid API key or API connection failed. Proceeding without summarization.")
             summarize = False
             api_key = None
@@ -1008,19 +1487,60 @@ def main():
             print("API key validated successfully.")
 
     # Initialize the extractor
-    headless = "--headless" in sys.argv
-    if headless:
+    headless = bool(args.headless)
+    if headless and interactive:
         print("Warning: Headless mode is not recommended when manual login is required.")
         print("Continue with headless mode anyway? (y/n)")
         if input().lower() != 'y':
             headless = False
 
-    extractor = UdemyTranscriptExtractor(headless=headless, summarize=summarize, api_key=api_key)
+    failure_policy = None
+    if not interactive or args.on_failure or args.retries is not None or getattr(args, "failure_policy", None):
+        failure_policy = FailurePolicy.from_spec(args.on_failure, args.retries, getattr(args, "failure_policy", None))
+        print(f"Failure policy: {failure_policy.describe()}")
+    dead_letter = None
+    if args.dead_letter or args.retry_dead_letter:
+        # Retried lectures are removed from the file, so those failing again must always go back into it
+        dead_letter = DeadLetterQueue(args.dead_letter or DEAD_LETTER_PATH)
+
+    # The whole run is bounded by the job deadline (UDEMY_JOB_TIMEOUT)
+    cancel_token = CancellationToken(timeout=DEFAULT_JOB_TIMEOUT)
+    metrics_port = int(os.environ.get("UDEMY_METRICS_PORT", "0"))
+    if metrics_port:
+        start_metrics_server(process_tracer, metrics_port)
+
+    extractor = UdemyTranscriptExtractor(headless=headless, summarize=summarize, api_key=api_key,
+                                         cancel_token=cancel_token, api_base=args.api_base,
+                                         profile_driver=args.profile_driver, interactive=interactive,
+                                         failure_policy=failure_policy, dead_letter=dead_letter)
 
     try:
-        # Extract transcripts from all videos in sequence
-        extractor.extract_all_transcripts(url, max_videos=max_videos)
+        if args.retry_dead_letter:
+            # One pass per course, so each gets its own output folder
+            by_course = {}
+            for retry_url in retry_urls:
+                by_course.setdefault(retry_url.split("/learn/")[0], []).append(retry_url)
+            for course_urls in by_course.values():
+                extractor.extract_lecture_urls(course_urls, taken_from=dead_letter)
+        else:
+            # Extract transcripts from all videos in sequence
+            extractor.extract_all_transcripts(url, max_videos=max_videos)
+    except KeyboardInterrupt:
+        print("\nInterrupted, stopping extraction...")
+        cancel_token.cancel("Interrupted by user")
     finally:
+        cancel_token.close()
+        trace_path = extractor.tracer.export_json(os.path.join("udemy_transcripts", ".traces",
+                                                              f"trace_{int(time.time())}.json"))
+        print("\nTime spent per phase:")
+        print(extractor.tracer.format_breakdown())
+        print(f"Trace written to {trace_path}")
+        if summarize:
+            print(f"Summary API calls: {extractor.summary_client.stats()}")
+        print(extractor.memory.report())
+        extractor.memory.stop()
+        if extractor.profiler is not None:
+            print(extractor.driver_report())
         # Close the browser
         extractor.close()
 
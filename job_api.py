@@ -0,0 +1,292 @@
+import os
+import sys
+import hmac
+import json
+import shutil
+import argparse
+import ipaddress
+from urllib.parse import urlsplit, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from job_manager import JobManager, JobRejected
+from job_registry import JobRegistry, make_job_key
+from cancellation import DEFAULT_JOB_TIMEOUT
+from tracing import process_tracer, start_metrics_server, METRICS_HOST
+from session_store import credential_id
+from extraction_pipeline import run_extraction_job
+
+API_PORT = int(os.environ.get("UDEMY_API_PORT", "8765"))
+# Loopback only by default: jobs may run on the server's own credentials (IBM_EMAIL, OPENAI_API_KEY)
+API_HOST = os.environ.get("UDEMY_API_HOST", "127.0.0.1")
+# Bearer token required on every request when set; binding beyond loopback refuses to start without it
+API_TOKEN = os.environ.get("UDEMY_API_TOKEN")
+# Seconds between SSE keep-alive comments, so proxies don't drop an idle stream
+SSE_KEEPALIVE = 15
+DOWNLOAD_CHUNK_SIZE = 256 * 1024
+
+
+def job_status(manager, job):
+    """JSON-safe status of a job: state, timestamps, queue position, latest progress and result summary."""
+    progress = None
+    last_status = None
+    events, _ = job.events.read(0)
+    for message in events:
+        if isinstance(message, tuple) and message[0] == "progress":
+            progress = message[1]
+        elif isinstance(message, tuple) and message[0] == "status":
+            last_status = message[1]
+    status = {
+        "id": job.id,
+        "status": job.status,
+        "params": job.params,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "queue_position": manager.queue_position(job),
+        "progress": progress,
+        "message": last_status,
+        "error": job.error,
+    }
+    if job.result is not None:
+        status["course_title"] = job.result.get("course_title")
+        status["transcripts"] = job.result.get("transcripts")
+        status["artifact"] = f"/jobs/{job.id}/artifact"
+    return status
+
+
+def event_payload(job, message):
+    """(event type, JSON-safe data) for one job event; the result's zip file is replaced by its URL."""
+    if not isinstance(message, tuple):
+        return "status", str(message)
+    msg_type, content = message
+    if msg_type == "success":
+        content = {"course_title": content.get("course_title"),
+                   "transcripts": len(content.get("transcripts") or []),
+                   "artifact": f"/jobs/{job.id}/artifact"}
+    return msg_type, content
+
+
+class JobApiHandler(BaseHTTPRequestHandler):
+    """REST + SSE front end of a JobManager (see ``serve()`` for the routes)."""
+
+    manager = None
+    registry = None
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, code, data):
+        body = json.dumps(data, default=str).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _authorized(self):
+        if not API_TOKEN:
+            return True
+        supplied = (self.headers.get("Authorization") or "").encode("utf-8")
+        if hmac.compare_digest(supplied, f"Bearer {API_TOKEN}".encode("utf-8")):
+            return True
+        self._send_json(401, {"error": "Missing or wrong bearer token"})
+        return False
+
+    def _route(self):
+        parts = [part for part in urlsplit(self.path).path.split("/") if part]
+        job = None
+        if len(parts) >= 2 and parts[0] == "jobs":
+            job = self.manager.get(parts[1])
+            if job is None:
+                self._send_json(404, {"error": f"No job {parts[1]}"})
+                return parts, None, False
+        return parts, job, True
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        parts, job, found = self._route()
+        if not found:
+            return
+        if parts in (["health"], []):
+            self._send_json(200, {"ok": True, "jobs": self.manager.stats()})
+        elif len(parts) == 2:
+            self._send_json(200, job_status(self.manager, job))
+        elif parts[2:] == ["events"]:
+            self._stream_events(job)
+        elif parts[2:] == ["artifact"]:
+            self._send_artifact(job)
+        else:
+            self._send_json(404, {"error": "Not found"})
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        if [part for part in urlsplit(self.path).path.split("/") if part] != ["jobs"]:
+            self._send_json(404, {"error": "Not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            request = json.loads(self.rfile.read(length) or b"{}")
+            course_url = request["course_url"].strip()
+            max_videos = int(request.get("max_videos", 0))
+        except (ValueError, KeyError, AttributeError, TypeError):
+            self._send_json(400, {"error": "Expected JSON with course_url (and optionally max_videos, "
+                                           "api_key, ibm_email, ibm_password)"})
+            return
+        secrets = {
+            "api_key": request.get("api_key") or os.environ.get("OPENAI_API_KEY"),
+            "ibm_email": request.get("ibm_email") or os.environ.get("IBM_EMAIL"),
+            "ibm_password": request.get("ibm_password") or os.environ.get("IBM_PASSWORD"),
+        }
+        # Same key as the Streamlit app (credentials and whether notes are wanted included), so finished
+        # results in the shared registry are reused; running jobs are only joined within this process
+        key = make_job_key(course_url, account=credential_id(secrets["ibm_email"], secrets["ibm_password"]),
+                           max_videos=max_videos, summarize=bool(secrets["api_key"]))
+        try:
+            job = self.manager.submit({"course_url": course_url, "max_videos": max_videos, "headless": True},
+                                      secrets=secrets, key=key)
+        except JobRejected as e:
+            self._send_json(503, {"error": str(e)})
+            return
+        self._send_json(202, {"id": job.id, "status": job.status, "url": f"/jobs/{job.id}",
+                              "events": f"/jobs/{job.id}/events"})
+
+    def do_DELETE(self):
+        if not self._authorized():
+            return
+        parts, job, found = self._route()
+        if not found:
+            return
+        if len(parts) != 2:
+            self._send_json(404, {"error": "Not found"})
+            return
+        cancelled = self.manager.cancel(job.id, force=True)
+        self._send_json(200, {"id": job.id, "cancelled": cancelled})
+
+    def _stream_events(self, job):
+        """Server-sent events from the job's event log; resumes after Last-Event-ID (or ?cursor=)."""
+        query = parse_qs(urlsplit(self.path).query)
+        try:
+            cursor = int(self.headers.get("Last-Event-ID") or query.get("cursor", ["0"])[0])
+        except ValueError:
+            cursor = 0
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        try:
+            while True:
+                events, next_cursor = job.events.read(cursor, max_events=1)
+                if not events:
+                    if job.finished:
+                        # Everything up to "done" was sent already (the client resumed past the end)
+                        return
+                    if not job.events.wait(cursor, timeout=SSE_KEEPALIVE):
+                        self.wfile.write(b": keep-alive\n\n")
+                        self.wfile.flush()
+                    continue
+                cursor = next_cursor
+                event_type, data = event_payload(job, events[0])
+                self.wfile.write(f"id: {cursor}\nevent: {event_type}\ndata: {json.dumps(data, default=str)}\n\n"
+                                 .encode("utf-8"))
+                self.wfile.flush()
+                if event_type == "done":
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            # The client went away; the job keeps running
+            return
+
+    def _send_artifact(self, job):
+        """Stream the notes archive from disk in chunks, never holding it in memory."""
+        path = os.path.join(self.registry.root, job.id, "artifact.zip")
+        if job.status != "succeeded" or not os.path.exists(path):
+            self._send_json(409 if not job.finished else 404,
+                            {"error": "The job has no artifact yet" if not job.finished else "The job has no artifact"})
+            return
+        title = (job.result or {}).get("course_title") or job.id
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self.send_response(200)
+            self.send_header("Content-Type", "application/zip")
+            self.send_header("Content-Length", str(size))
+            self.send_header("Content-Disposition", f'attachment; filename="{title}.zip"')
+            self.end_headers()
+            try:
+                shutil.copyfileobj(f, self.wfile, DOWNLOAD_CHUNK_SIZE)
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+
+def is_loopback(host):
+    """True for localhost and loopback addresses."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def serve(host=API_HOST, port=API_PORT, manager=None, registry=None):
+    """Run the job API until interrupted.
+
+    Routes::
+
+        POST   /jobs                 submit {"course_url", "max_videos", "api_key", "ibm_email", "ibm_password"}
+        GET    /jobs/<id>            status, progress and result summary
+        GET    /jobs/<id>/events     progress as server-sent events (resumable with Last-Event-ID)
+        GET    /jobs/<id>/artifact   the notes archive (zip)
+        DELETE /jobs/<id>            cancel
+        GET    /health               worker pool utilisation
+
+    Listening on anything but loopback requires UDEMY_API_TOKEN.
+    """
+    if not API_TOKEN and not is_loopback(host):
+        raise ValueError(f"Refusing to serve on {host} without UDEMY_API_TOKEN: anyone who can reach it "
+                         f"could run jobs with this server's credentials")
+    registry = registry or JobRegistry()
+    manager = manager or JobManager(
+        run_extraction_job,
+        job_timeout=DEFAULT_JOB_TIMEOUT,
+        max_workers=int(os.environ.get("EXTRACTION_WORKERS", "2")),
+        max_queued=int(os.environ.get("EXTRACTION_MAX_QUEUED", "20")),
+        registry=registry
+    )
+    handler = type("BoundJobApiHandler", (JobApiHandler,), {"manager": manager, "registry": registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    print(f"Job API listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nShutting down the job API...")
+    finally:
+        server.server_close()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP API for submitting and following extraction jobs.")
+    parser.add_argument("--host", default=API_HOST,
+                        help="Interface to listen on (anything but loopback needs UDEMY_API_TOKEN)")
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--metrics-port", type=int, default=int(os.environ.get("UDEMY_METRICS_PORT", "9108")),
+                        help="Prometheus metrics port (0 to disable)")
+    parser.add_argument("--metrics-host", default=METRICS_HOST,
+                        help="Interface the metrics endpoint listens on (default UDEMY_METRICS_HOST or loopback)")
+    args = parser.parse_args(argv)
+    if not API_TOKEN and not is_loopback(args.host):
+        sys.exit(f"Set UDEMY_API_TOKEN before listening on {args.host}.")
+    if args.metrics_port:
+        try:
+            start_metrics_server(process_tracer, args.metrics_port, args.metrics_host)
+        except OSError as e:
+            print(f"Could not start metrics endpoint on port {args.metrics_port}: {str(e)}")
+    serve(args.host, args.port)
+
+
+if __name__ == "__main__":
+    main()
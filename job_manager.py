@@ -0,0 +1,326 @@
+import time
+import uuid
+import threading
+from collections import deque
+from cancellation import CancellationToken
+from tracing import Tracer, process_tracer
+
+
+class JobRejected(Exception):
+    """Raised when the job queue is full and a new job cannot be admitted."""
+
+
+class JobEvents:
+    """Bounded, append-only event log that any number of sessions can follow."""
+
+    def __init__(self, max_events=5000):
+        self.max_events = max_events
+        self._events = deque(maxlen=max_events)
+        self._next_seq = 0
+        self._cond = threading.Condition()
+
+    def put(self, message):
+        """Append an event (same call shape as queue.Queue.put)."""
+        with self._cond:
+            self._events.append((self._next_seq, message))
+            self._next_seq += 1
+            self._cond.notify_all()
+
+    def read(self, cursor=0, max_events=None):
+        """Return (events, new_cursor) for all events at or after cursor.
+
+        Subscribers that fell behind the retained window skip to the oldest retained event.
+        """
+        with self._cond:
+            events = []
+            for seq, message in self._events:
+                if seq < cursor:
+                    continue
+                events.append(message)
+                cursor = seq + 1
+                if max_events and len(events) >= max_events:
+                    break
+            return events, cursor
+
+    def wait(self, cursor, timeout=None):
+        """Block until there is an event at or after cursor, or timeout."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self._next_seq > cursor, timeout)
+
+
+class Job:
+    """A single extraction job and its event stream."""
+
+    def __init__(self, params, secrets=None, key=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.key = key
+        self.params = params
+        # Credentials are kept apart from params and dropped once the job ends
+        self.secrets = secrets or {}
+        self.status = "queued"
+        self.events = JobEvents()
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        # Sessions currently following the job; it is only cancelled once all of them gave up
+        self.subscribers = 1
+        self.cancel_token = CancellationToken()
+        # Per-phase timings of this job, also aggregated into the process-wide metrics
+        self.tracer = Tracer(parent=process_tracer)
+        # Outcome events of a running job, published by the manager once the outcome is recorded
+        self._held = []
+
+    def put(self, message):
+        """Status-queue compatible entry point used by the extraction pipeline."""
+        if isinstance(message, tuple):
+            msg_type, content = message
+            if msg_type == "success":
+                self.result = content
+            elif msg_type == "error":
+                self.error = content
+            # Followers must not see the outcome before the artifact is saved and the status switched
+            if self.status == "running" and msg_type in ("success", "done"):
+                if msg_type == "success":
+                    self._held.append(message)
+                return
+        self.events.put(message)
+
+    def publish_outcome(self):
+        """Publish the withheld success (if the job succeeded) followed by the final "done" event."""
+        held, self._held = self._held, []
+        if self.status == "succeeded":
+            for message in held:
+                self.events.put(message)
+        self.events.put(("done", None))
+
+    @property
+    def finished(self):
+        return self.status in ("succeeded", "failed")
+
+    @classmethod
+    def restore(cls, record, result=None):
+        """Rebuild a finished job from its registry record."""
+        job = cls(record["params"], key=record.get("key"))
+        job.id = record["id"]
+        job.created_at = record.get("created_at")
+        job.started_at = record.get("started_at")
+        job.finished_at = record.get("finished_at")
+        if record["status"] == "succeeded" and result is not None:
+            job.status = "succeeded"
+            job.put(("status", "Serving previously extracted results."))
+            job.put(("success", result))
+        else:
+            # Queued/running records from an earlier process were interrupted by its restart
+            job.status = "failed"
+            job.put(("error", record.get("error") or "The job was interrupted before it finished."))
+        job.put(("done", None))
+        return job
+
+
+class JobManager:
+    """Process-wide queue of extraction jobs executed on a fixed-size worker pool.
+
+    ``runner(job)`` does the actual work and reports progress through ``job.put``.
+    Its "success" and "done" events are held back and published by the worker
+    only after the result is saved and the job is marked finished.
+    At most ``max_workers`` jobs (and therefore browsers) run at once and at most
+    ``max_queued`` jobs may wait; further submissions are rejected.
+
+    Jobs submitted with a ``key`` are deduplicated: an identical request joins the
+    in-flight job, and with a ``registry`` a completed job is served from disk.
+    """
+
+    def __init__(self, runner, max_workers=2, max_queued=20, max_finished=100, registry=None, job_timeout=None):
+        self.runner = runner
+        self.job_timeout = job_timeout
+        self.registry = registry
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.max_finished = max_finished
+        self._jobs = {}
+        self._active_by_key = {}
+        self._pending = deque()
+        self._running = set()
+        self._cond = threading.Condition()
+        self._workers = []
+        for i in range(max_workers):
+            worker = threading.Thread(target=self._worker_loop, name=f"extraction-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, params, secrets=None, key=None):
+        """Queue a new job, or return an identical in-flight or completed one.
+
+        Raises JobRejected when a new job is needed but the queue is full.
+        """
+        job_id = None
+        with self._cond:
+            active = self._join_active(key)
+            if active is not None:
+                return active
+            if key and self.registry is not None:
+                job_id = self.registry.latest_id_for_key(key)
+
+        # Loading a finished result copies its zip, which must not hold up other submits, polls and workers
+        record, result = self.registry.load_job(job_id) if job_id else (None, None)
+
+        with self._cond:
+            # An identical request may have started the job while the result was loading
+            active = self._join_active(key)
+            if active is not None:
+                return active
+            if record and record["status"] == "succeeded" and result is not None:
+                job = Job.restore(record, result)
+                self._jobs[job.id] = job
+                return job
+
+            if len(self._pending) >= self.max_queued:
+                raise JobRejected(
+                    f"Server is busy: {len(self._pending)} jobs are already waiting. Please try again later.")
+            job = Job(params, secrets, key=key)
+            self._jobs[job.id] = job
+            if key:
+                self._active_by_key[key] = job
+            self._pending.append(job)
+            job.put(("status", "Job queued, waiting for a free worker..."))
+            self._save(job)
+            self._cond.notify()
+            return job
+
+    def _join_active(self, key):
+        """Subscribe to the in-flight job with this key, if any (called with the lock held)."""
+        active = self._active_by_key.get(key) if key else None
+        if active is None or active.finished or active.cancel_token.cancelled:
+            return None
+        active.subscribers += 1
+        active.put(("status", "Another session joined this job."))
+        return active
+
+    def get(self, job_id):
+        """Look up a job by id, falling back to the registry for older jobs."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+        if job is not None or not job_id or self.registry is None:
+            return job
+
+        # Like submit(), the result zip is loaded without holding the lock
+        record, result = self.registry.load_job(job_id)
+        if record is None:
+            return None
+        with self._cond:
+            job = self._jobs.get(record["id"])
+            if job is None:
+                job = Job.restore(record, result)
+                self._jobs[job.id] = job
+            return job
+
+    def _save(self, job):
+        if self.registry is None:
+            return
+        try:
+            self.registry.save_job(job)
+        except Exception as e:
+            print(f"Could not persist job {job.id}: {str(e)}")
+
+    def _save_result(self, job):
+        if self.registry is None:
+            return
+        try:
+            self.registry.save_result(job)
+        except Exception as e:
+            print(f"Could not persist the result of job {job.id}: {str(e)}")
+
+    def cancel(self, job_id, force=False):
+        """Drop one subscriber from a job and cancel it once nobody is following it.
+
+        Queued jobs are removed from the queue; running jobs are cancelled cooperatively,
+        which also quits their browser.
+        """
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.finished:
+                return False
+            job.subscribers -= 1
+            if job.subscribers > 0 and not force:
+                job.put(("status", "A session left this job; it keeps running for the others."))
+                return False
+
+            if job in self._pending:
+                self._pending.remove(job)
+                job.status = "failed"
+                job.finished_at = time.time()
+                job.secrets = {}
+                if self._active_by_key.get(job.key) is job:
+                    del self._active_by_key[job.key]
+                job.put(("error", "Job cancelled before it started."))
+                job.put(("done", None))
+                queued = True
+            else:
+                queued = False
+
+        if queued:
+            self._save(job)
+        else:
+            job.cancel_token.cancel("Cancelled by user")
+        return True
+
+    def queue_position(self, job):
+        """1-based position of a queued job, or 0 if it is not waiting."""
+        with self._cond:
+            for position, pending in enumerate(self._pending, start=1):
+                if pending is job:
+                    return position
+            return 0
+
+    def stats(self):
+        """Snapshot of pool utilisation for display."""
+        with self._cond:
+            return {
+                "running": len(self._running),
+                "queued": len(self._pending),
+                "max_workers": self.max_workers,
+                "max_queued": self.max_queued
+            }
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                job = self._pending.popleft()
+                self._running.add(job)
+                job.status = "running"
+                job.started_at = time.time()
+                # The job deadline starts when a worker picks the job up, not while it waits
+                job.cancel_token = CancellationToken(timeout=self.job_timeout)
+            self._save(job)
+
+            try:
+                self.runner(job)
+            except Exception as e:
+                job.put(("error", f"Job failed: {str(e)}"))
+            finally:
+                succeeded = job.result is not None and not job.error
+                if succeeded:
+                    # The artifact is on disk before anyone can see the job as succeeded
+                    self._save_result(job)
+                with self._cond:
+                    self._running.discard(job)
+                    job.status = "succeeded" if succeeded else "failed"
+                    job.finished_at = time.time()
+                    job.secrets = {}
+                    job.cancel_token.close()
+                    if self._active_by_key.get(job.key) is job:
+                        del self._active_by_key[job.key]
+                    self._prune_finished()
+                self._save(job)
+                job.publish_outcome()
+
+    def _prune_finished(self):
+        finished = [j for j in self._jobs.values() if j.finished]
+        if len(finished) <= self.max_finished:
+            return
+        finished.sort(key=lambda j: j.finished_at)
+        for job in finished[:len(finished) - self.max_finished]:
+            del self._jobs[job.id]
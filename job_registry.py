@@ -0,0 +1,150 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from urllib.parse import urlsplit, urlunsplit
+from memory_monitor import ZIP_SPOOL_MAX_BYTES
+from artifact_store import exclusive_file
+
+
+def normalize_course_url(course_url):
+    """Normalize a course URL so equivalent links map to the same job."""
+    parts = urlsplit(course_url.strip())
+    path = parts.path.rstrip("/")
+    return urlunsplit((parts.scheme.lower() or "https", parts.netloc.lower(), path, "", ""))
+
+
+def make_job_key(course_url, account=None, **options):
+    """Stable key identifying identical extraction requests.
+
+    ``account`` is the credential proof of the login (``session_store.credential_id``)
+    and goes in as a hash, so a job is only joined or reused by requests that know
+    the same email and password, never run on or served from someone else's login.
+    """
+    request = {"course_url": normalize_course_url(course_url), "options": options}
+    if account:
+        request["account"] = hashlib.sha256(account.strip().lower().encode("utf-8")).hexdigest()
+    payload = json.dumps(request, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# Finished results (and their zip files) are shared by every session following the job and by the
+# registry persisting them; every read of a result zip seeks the same file object, so all go through this lock
+_zip_lock = threading.Lock()
+
+
+def read_zip_file(zip_file):
+    """Return the bytes of a result zip file."""
+    with _zip_lock:
+        zip_file.seek(0)
+        return zip_file.read()
+
+
+def copy_zip_file(zip_file, dest):
+    """Copy a result zip file into the open file dest."""
+    with _zip_lock:
+        zip_file.seek(0)
+        shutil.copyfileobj(zip_file, dest)
+
+
+class JobRegistry:
+    """Disk-backed registry of jobs and their results.
+
+    Layout under ``root``::
+
+        index.json                  job key -> latest job id
+        <job_id>/job.json           status, params and timestamps
+        <job_id>/result.json        course title, transcripts and files
+        <job_id>/artifact.zip       the downloadable notes archive
+    """
+
+    def __init__(self, root=os.path.join("udemy_transcripts", ".jobs")):
+        self.root = root
+        self.index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _write_json(self, path, data):
+        # Per writer, so the app, the job API and workers sharing the registry never write the same tmp file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def _read_json(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def save_job(self, job):
+        """Persist job metadata (never credentials) and index it by key."""
+        job_dir = os.path.join(self.root, job.id)
+        os.makedirs(job_dir, exist_ok=True)
+        record = {
+            "id": job.id,
+            "key": job.key,
+            "params": job.params,
+            "status": job.status,
+            "error": job.error,
+            "created_at": job.created_at,
+            "started_at": job.started_at,
+            "finished_at": job.finished_at
+        }
+        # The index lock is also held by other processes sharing the registry
+        with exclusive_file(self.index_path, self._lock):
+            self._write_json(os.path.join(job_dir, "job.json"), record)
+            if job.key:
+                index = self._read_json(self.index_path) or {}
+                index[job.key] = job.id
+                self._write_json(self.index_path, index)
+
+    def save_result(self, job):
+        """Persist a successful job's result so it can be served again later."""
+        result = job.result
+        job_dir = os.path.join(self.root, job.id)
+        os.makedirs(job_dir, exist_ok=True)
+        zip_file = result.get("zip_file")
+        if zip_file is not None:
+            # Readers (the API streams this file) only ever see a complete archive
+            zip_path = os.path.join(job_dir, "artifact.zip")
+            tmp_path = f"{zip_path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                copy_zip_file(zip_file, f)
+            os.replace(tmp_path, zip_path)
+        serializable = {k: v for k, v in result.items() if k != "zip_file"}
+        self._write_json(os.path.join(job_dir, "result.json"), serializable)
+
+    def load_job(self, job_id):
+        """Return (record, result) for a job id; result is None unless it succeeded."""
+        job_dir = os.path.join(self.root, os.path.basename(job_id))
+        record = self._read_json(os.path.join(job_dir, "job.json"))
+        if record is None:
+            return None, None
+        result = None
+        if record["status"] == "succeeded":
+            result = self._read_json(os.path.join(job_dir, "result.json"))
+            zip_path = os.path.join(job_dir, "artifact.zip")
+            if result is not None and os.path.exists(zip_path):
+                zip_file = tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_MAX_BYTES)
+                with open(zip_path, "rb") as f:
+                    shutil.copyfileobj(f, zip_file)
+                zip_file.seek(0)
+                result["zip_file"] = zip_file
+        return record, result
+
+    def latest_id_for_key(self, key):
+        """Id of the latest job registered under key, or None."""
+        with self._lock:
+            index = self._read_json(self.index_path) or {}
+        return index.get(key)
+
+    def latest_for_key(self, key):
+        """Return (record, result) for the latest job registered under key."""
+        job_id = self.latest_id_for_key(key)
+        if not job_id:
+            return None, None
+        return self.load_job(job_id)
@@ -0,0 +1,118 @@
+import os
+from browser_driver import LECTURE_LINK_SELECTOR
+
+# Lectures opened ahead in background tabs (0 turns prefetching off)
+PREFETCH_DEPTH = int(os.environ.get("UDEMY_PREFETCH_DEPTH", 1))
+# Chrome throttles hidden tabs; without these a background tab barely loads until it is shown
+BACKGROUND_TAB_ARGUMENTS = ["--disable-background-timer-throttling", "--disable-renderer-backgrounding",
+                            "--disable-backgrounding-occluded-windows"]
+
+CURRICULUM_URLS_SCRIPT = """
+return Array.from(document.querySelectorAll(arguments[0]), a => a.href.split('?')[0].split('#')[0]);
+"""
+
+
+def _clean_url(url):
+    return (url or "").split("?")[0].split("#")[0]
+
+
+class LecturePrefetcher:
+    """Loads the next lectures in background tabs of the same browser.
+
+    ``prefetch(current_url)`` opens the next ``depth`` lectures of the curriculum
+    sidebar in new tabs while the current one is being extracted; ``advance()``
+    then closes the current tab and switches to the already loaded next one
+    instead of clicking "Next" and waiting for the page. The caller checks the
+    transcript panel afterwards, as after any navigation. Selenium only: tabs of
+    a Playwright page are left alone and ``advance()`` always defers to the
+    caller's normal navigation.
+    """
+
+    def __init__(self, driver, depth=PREFETCH_DEPTH):
+        self.driver = driver
+        self.depth = depth
+        self.enabled = depth > 0 and not hasattr(driver, "goto")
+        self._tabs = {}  # lecture url -> window handle
+        self.hits = 0
+        self.misses = 0
+
+    def _upcoming(self, current_url):
+        try:
+            urls = self.driver.execute_script(CURRICULUM_URLS_SCRIPT, LECTURE_LINK_SELECTOR) or []
+        except Exception as e:
+            print(f"Could not read the curriculum for prefetching: {str(e)}")
+            return []
+        curriculum = []
+        for url in urls:
+            if url not in curriculum:
+                curriculum.append(url)
+        current = _clean_url(current_url)
+        if current not in curriculum:
+            return []
+        index = curriculum.index(current)
+        return curriculum[index + 1:index + 1 + self.depth]
+
+    def prefetch(self, current_url):
+        """Open the lectures after current_url in background tabs (already open ones are kept)."""
+        if not self.enabled:
+            return
+        upcoming = self._upcoming(current_url)
+        # Tabs for lectures that are no longer ahead of us are just wasted memory
+        for url in list(self._tabs):
+            if url not in upcoming:
+                self._close_tab(self._tabs.pop(url))
+        for url in upcoming:
+            if url in self._tabs:
+                continue
+            try:
+                before = set(self.driver.window_handles)
+                # window.open leaves Selenium attached to the current tab
+                self.driver.execute_script("window.open(arguments[0], '_blank');", url)
+                opened = set(self.driver.window_handles) - before
+                if opened:
+                    self._tabs[url] = opened.pop()
+                    print(f"Prefetching next lecture in background: {url}")
+            except Exception as e:
+                print(f"Could not prefetch {url}: {str(e)}")
+
+    def _close_tab(self, handle):
+        current = self.driver.current_window_handle
+        try:
+            self.driver.switch_to.window(handle)
+            self.driver.close()
+        except Exception:
+            pass
+        finally:
+            self.driver.switch_to.window(current)
+
+    def advance(self, current_url):
+        """Switch to the prefetched tab of the next lecture.
+
+        Returns True when it did, or False when there is no prefetched tab and
+        the caller should navigate the usual way.
+        """
+        if not self.enabled:
+            return False
+        upcoming = self._upcoming(current_url)
+        handle = self._tabs.pop(upcoming[0], None) if upcoming else None
+        if handle is None or handle not in self.driver.window_handles:
+            self.misses += 1
+            return False
+        # Close the finished lecture and continue in the tab that has already loaded
+        self.driver.close()
+        self.driver.switch_to.window(handle)
+        self.hits += 1
+        print(f"Switched to prefetched lecture: {upcoming[0]}")
+        return True
+
+    def close(self):
+        """Close every prefetched tab."""
+        for handle in self._tabs.values():
+            try:
+                self._close_tab(handle)
+            except Exception:
+                pass
+        self._tabs.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "open_tabs": len(self._tabs)}
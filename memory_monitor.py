@@ -0,0 +1,192 @@
+import os
+import time
+import resource
+import threading
+import tracemalloc
+from collections import deque
+from cancellation import JobCancelled
+
+# Process RSS budget in MB (0 disables it). Above SPILL_RATIO of it transcripts move to disk,
+# above the budget itself the job is stopped before the host starts swapping.
+MEMORY_BUDGET_MB = float(os.environ.get("UDEMY_MEMORY_BUDGET_MB", 0))
+MEMORY_SPILL_RATIO = float(os.environ.get("UDEMY_MEMORY_SPILL_RATIO", 0.75))
+# tracemalloc slows allocation-heavy code down noticeably, so allocator tracking is opt-in
+MEMORY_PROFILE = os.environ.get("UDEMY_MEMORY_PROFILE") == "1"
+# Result archives stay in memory up to this size and are backed by a temp file beyond it
+ZIP_SPOOL_MAX_BYTES = int(float(os.environ.get("UDEMY_ZIP_SPOOL_MB", 8)) * 1024 * 1024)
+
+
+class MemoryBudgetExceeded(JobCancelled):
+    """Raised when the process RSS goes over the configured memory budget."""
+
+
+def current_rss_mb():
+    """Resident set size of this process in MB (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if os.uname().sysname == "Darwin" else peak / 1024
+
+
+class MemoryMonitor:
+    """Per-lecture RSS sampling, tracemalloc allocator reports and a memory budget.
+
+    Call ``check(lecture_id)`` after every lecture: it records a sample and returns
+    True once memory is high enough that in-memory data should be spilled to disk,
+    or raises MemoryBudgetExceeded when the budget itself is exceeded.
+    """
+
+    def __init__(self, budget_mb=None, spill_ratio=MEMORY_SPILL_RATIO, trace=None, max_samples=2000):
+        self.budget_mb = MEMORY_BUDGET_MB if budget_mb is None else budget_mb
+        self.spill_ratio = spill_ratio
+        self.trace = MEMORY_PROFILE if trace is None else trace
+        self.samples = deque(maxlen=max_samples)
+        self.spilling = False
+        self._baseline = None
+        self._started_tracing = False
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Start tracemalloc (when tracing is enabled) and take the baseline snapshot."""
+        if self.trace:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(10)
+                self._started_tracing = True
+            self._baseline = tracemalloc.take_snapshot()
+        self.sample("start")
+        return self
+
+    def stop(self):
+        """Stop tracemalloc if this monitor started it."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def sample(self, lecture_id=None):
+        """Record the current RSS (and traced Python heap) for a lecture."""
+        entry = {"lecture_id": lecture_id, "time": time.time(), "rss_mb": round(current_rss_mb(), 1)}
+        if self.trace and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            entry["traced_mb"] = round(current / (1024 * 1024), 1)
+            entry["traced_peak_mb"] = round(peak / (1024 * 1024), 1)
+        with self._lock:
+            self.samples.append(entry)
+        return entry
+
+    def check(self, lecture_id=None):
+        """Sample memory and enforce the budget; returns True when data should be spilled."""
+        entry = self.sample(lecture_id)
+        if not self.budget_mb:
+            return False
+        if entry["rss_mb"] >= self.budget_mb:
+            print(self.report())
+            raise MemoryBudgetExceeded(f"Memory budget exceeded: RSS {entry['rss_mb']:.0f} MB "
+                                       f"over the {self.budget_mb:.0f} MB budget")
+        if not self.spilling and entry["rss_mb"] >= self.budget_mb * self.spill_ratio:
+            print(f"RSS {entry['rss_mb']:.0f} MB is over {self.spill_ratio:.0%} of the memory budget, "
+                  f"spilling to disk")
+            self.spilling = True
+        return self.spilling
+
+    def top_allocators(self, limit=10):
+        """Source lines that allocated the most memory since start(), as (where, size_kb, count)."""
+        if not (self.trace and tracemalloc.is_tracing()):
+            return []
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+        if self._baseline is not None:
+            stats = snapshot.compare_to(self._baseline, "lineno")
+            rows = [(stat, stat.size_diff, stat.count_diff) for stat in stats]
+        else:
+            rows = [(stat, stat.size, stat.count) for stat in snapshot.statistics("lineno")]
+        rows.sort(key=lambda row: row[1], reverse=True)
+        top = []
+        for stat, size, count in rows[:limit]:
+            frame = stat.traceback[0]
+            top.append((f"{frame.filename}:{frame.lineno}", round(size / 1024, 1), count))
+        return top
+
+    def report(self, limit=10):
+        """Text report: RSS growth across lectures and, when tracing, the top allocators."""
+        with self._lock:
+            samples = list(self.samples)
+        if not samples:
+            return "Memory: no samples recorded"
+        first, last = samples[0], samples[-1]
+        peak = max(sample["rss_mb"] for sample in samples)
+        lectures = max(1, len(samples) - 1)
+        lines = [f"Memory: RSS {first['rss_mb']:.0f} MB -> {last['rss_mb']:.0f} MB (peak {peak:.0f} MB, "
+                 f"{(last['rss_mb'] - first['rss_mb']) / lectures:+.2f} MB per lecture over {len(samples) - 1} lectures)"]
+        if self.budget_mb:
+            lines.append(f"  budget {self.budget_mb:.0f} MB, spilling to disk: {'yes' if self.spilling else 'no'}")
+        allocators = self.top_allocators(limit)
+        if allocators:
+            lines.append(f"  {'top allocators since start':<70}{'KB':>10}{'blocks':>9}")
+            for where, size_kb, count in allocators:
+                lines.append(f"  {where[-70:]:<70}{size_kb:>10.1f}{count:>9}")
+        return "\n".join(lines)
+
+
+class TranscriptSpool:
+    """List of extracted transcripts that can move its text out of memory.
+
+    Entries keep their title and lecture info in memory; once ``spill()`` is
+    called, transcript and summary text live only in the artifact store and
+    are read back one entry at a time while the archive is built.
+    """
+
+    def __init__(self, artifacts):
+        self.artifacts = artifacts
+        self.spilled = False
+        self._entries = []
+
+    def __len__(self):
+        return len(self._entries)
+
+    def append(self, entry):
+        self._entries.append(dict(entry))
+        if self.spilled:
+            self._spill_entry(self._entries[-1])
+
+    def set_summary(self, summary):
+        """Attach a summary to the most recently added transcript."""
+        entry = self._entries[-1]
+        entry["summary"] = summary
+        if self.spilled:
+            self._spill_entry(entry)
+
+    def _spill_entry(self, entry):
+        for field in ("content", "summary"):
+            if field in entry:
+                entry[f"{field}_sha256"] = self.artifacts.put(entry.pop(field))
+
+    def spill(self):
+        """Move all transcript and summary text to disk; later entries go straight to disk."""
+        if not self.spilled:
+            for entry in self._entries:
+                self._spill_entry(entry)
+            self.spilled = True
+
+    def __iter__(self):
+        """Yield complete entries, loading spilled text back from disk one at a time."""
+        for entry in self._entries:
+            loaded = dict(entry)
+            for field in ("content", "summary"):
+                digest = loaded.pop(f"{field}_sha256", None)
+                if digest:
+                    loaded[field] = self.artifacts.get(digest)
+            yield loaded
+
+    def summary_count(self):
+        return sum(1 for entry in self._entries if "summary" in entry or "summary_sha256" in entry)
+
+    def manifest(self):
+        """Lightweight per-lecture metadata (no text) for job results."""
+        return [{"title": entry["title"], "lecture_info": entry.get("lecture_info"),
+                 "has_summary": "summary" in entry or "summary_sha256" in entry}
+                for entry in self._entries]
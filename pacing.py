@@ -0,0 +1,188 @@
+import os
+import time
+import random
+import threading
+from collections import deque
+from contextlib import contextmanager
+from browser_driver import as_browser_driver
+
+# Gap between lecture navigations: starts at PACING_INITIAL_DELAY, shrinks by PACING_STEP after every
+# healthy navigation and doubles on back-pressure (additive increase / multiplicative decrease of the rate)
+PACING_MIN_DELAY = float(os.environ.get("UDEMY_PACING_MIN_DELAY", 0.5))
+PACING_MAX_DELAY = float(os.environ.get("UDEMY_PACING_MAX_DELAY", 60))
+PACING_INITIAL_DELAY = float(os.environ.get("UDEMY_PACING_INITIAL_DELAY", 3))
+PACING_STEP = float(os.environ.get("UDEMY_PACING_STEP", 0.25))
+# Navigations allowed at once across every extractor in the process (batch workers, app jobs)
+PACING_MAX_CONCURRENCY = int(os.environ.get("UDEMY_PACING_MAX_CONCURRENCY", 4))
+# Healthy navigations in a row before one more concurrent navigation is allowed
+PACING_SUCCESSES_PER_SLOT = 10
+# Share of failed lectures in the recent window that counts as back-pressure
+PACING_ERROR_RATE = 0.3
+# How long to wait for a Cloudflare/anti-bot challenge to clear before giving up
+CHALLENGE_TIMEOUT = 60
+
+PAGE_STATE_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+return {
+    url: location.href,
+    title: document.title,
+    status: nav && nav.responseStatus ? nav.responseStatus : 0,
+    text: document.body ? document.body.innerText.slice(0, 500) : ''
+};
+"""
+CHALLENGE_MARKERS = ("just a moment", "attention required", "checking your browser", "verify you are human",
+                     "cf-challenge", "challenge-platform")
+THROTTLE_MARKERS = ("too many requests", "access denied", "rate limit", "403 forbidden")
+
+
+def classify_page(state):
+    """"challenge", "throttled" or "ok" for the result of PAGE_STATE_SCRIPT."""
+    url = (state.get("url") or "").lower()
+    title = (state.get("title") or "").lower()
+    text = (state.get("text") or "").lower()
+    if "challenge" in url or "cloudflare" in url or any(m in title or m in text for m in CHALLENGE_MARKERS):
+        return "challenge"
+    if state.get("status") in (403, 429) or any(m in title for m in THROTTLE_MARKERS):
+        return "throttled"
+    return "ok"
+
+
+class Pacer:
+    """AIMD controller for navigation pace and concurrency.
+
+    Every navigation reports an outcome with ``observe()``: "ok" (with its
+    latency), "challenge", "throttled" (429/403) or "error". Healthy
+    navigations shrink the gap from ``wait()`` step by step and, in a long
+    enough streak, allow one more concurrent ``slot()``; back-pressure doubles
+    the gap and halves the concurrency at once. Slow navigations (latency well
+    above the best seen) hold the pace where it is.
+    """
+
+    def __init__(self, min_delay=PACING_MIN_DELAY, max_delay=PACING_MAX_DELAY, initial_delay=PACING_INITIAL_DELAY,
+                 step=PACING_STEP, max_concurrency=PACING_MAX_CONCURRENCY):
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.delay = min(max(initial_delay, min_delay), max_delay)
+        self.step = step
+        self.max_concurrency = max(1, max_concurrency)
+        self.concurrency = self.max_concurrency
+        self._active = 0
+        self._streak = 0
+        self._recent = deque(maxlen=20)  # True for failed lectures
+        self._latency = None
+        self._best_latency = None
+        self.counts = {"ok": 0, "slow": 0, "challenge": 0, "throttled": 0, "error": 0}
+        self._cond = threading.Condition()
+
+    def wait(self, token=None):
+        """Sleep the current gap, with jitter so parallel workers don't move in lockstep."""
+        with self._cond:
+            delay = self.delay * random.uniform(0.8, 1.2)
+        if token is not None:
+            token.sleep(delay)
+        else:
+            time.sleep(delay)
+
+    @contextmanager
+    def slot(self, token=None):
+        """Hold one of the currently allowed concurrent navigations."""
+        with self._cond:
+            while self._active >= self.concurrency:
+                if token is not None:
+                    token.raise_if_cancelled()
+                self._cond.wait(1)
+            self._active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._active -= 1
+                self._cond.notify_all()
+
+    def observe(self, outcome, latency=None):
+        """Adjust the pace for one navigation outcome."""
+        with self._cond:
+            if outcome in ("challenge", "throttled"):
+                self._back_off(outcome)
+                return
+            if outcome == "error":
+                self._recent.append(True)
+                self.counts["error"] += 1
+                if len(self._recent) >= 5 and sum(self._recent) / len(self._recent) >= PACING_ERROR_RATE:
+                    self._back_off("error rate")
+                    self._recent.clear()
+                return
+            self._recent.append(False)
+            if latency is not None:
+                self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+                self._best_latency = latency if self._best_latency is None else min(self._best_latency, latency)
+                if latency > max(3 * self._best_latency, 5):
+                    # The site is slowing down: don't speed up, but no need to back off yet
+                    self.counts["slow"] += 1
+                    self._streak = 0
+                    return
+            self.counts["ok"] += 1
+            self.delay = max(self.min_delay, self.delay - self.step)
+            self._streak += 1
+            if self._streak >= PACING_SUCCESSES_PER_SLOT and self.concurrency < self.max_concurrency:
+                self.concurrency += 1
+                self._streak = 0
+                self._cond.notify_all()
+
+    def _back_off(self, reason):
+        if reason in self.counts:
+            self.counts[reason] += 1
+        self.delay = min(self.max_delay, max(self.delay * 2, 2 * self.min_delay))
+        self.concurrency = max(1, self.concurrency // 2)
+        self._streak = 0
+        print(f"Pacing: backing off after {reason}, {self.delay:.1f}s between lectures, "
+              f"{self.concurrency} at a time")
+
+    def check_page(self, driver, latency=None, token=None):
+        """Classify the page just navigated to, wait out a challenge, and record the outcome.
+
+        Returns False when a challenge did not clear in time.
+        """
+        try:
+            outcome = classify_page(as_browser_driver(driver).evaluate(PAGE_STATE_SCRIPT) or {})
+        except Exception as e:
+            print(f"Pacing: could not read the page state: {str(e)}")
+            return True
+        self.observe(outcome, latency)
+        if outcome == "challenge":
+            return self.wait_for_challenge(driver, token)
+        return True
+
+    def wait_for_challenge(self, driver, token=None, timeout=CHALLENGE_TIMEOUT):
+        """Poll until a challenge page is gone, backing off between polls; True if it cleared."""
+        deadline = time.time() + timeout
+        interval = 1
+        while time.time() < deadline:
+            try:
+                state = as_browser_driver(driver).evaluate(PAGE_STATE_SCRIPT) or {}
+            except Exception:
+                state = {}
+            if state and classify_page(state) != "challenge":
+                return True
+            pause = min(interval, max(0, deadline - time.time()))
+            if token is not None:
+                token.sleep(pause)
+            else:
+                time.sleep(pause)
+            interval = min(interval * 2, 8)
+        print(f"Pacing: challenge page did not clear within {timeout}s")
+        return False
+
+    def stats(self):
+        with self._cond:
+            return dict(self.counts, delay=round(self.delay, 2), concurrency=self.concurrency,
+                        latency=round(self._latency, 2) if self._latency is not None else None)
+
+    def describe(self):
+        s = self.stats()
+        return (f"pace {s['delay']}s, {s['concurrency']} at a time | {s['ok']} ok, {s['slow']} slow, "
+                f"{s['challenge']} challenges, {s['throttled']} throttled, {s['error']} errors")
+
+
+# Shared by every extractor in the process, so parallel jobs back off together
+process_pacer = Pacer()
@@ -0,0 +1,83 @@
+import os
+from browser_driver import as_browser_driver, TRANSCRIPT_PANEL_SELECTORS, TRANSCRIPT_TOGGLE_SELECTORS, CUE_SELECTORS
+
+# How long to wait for cues to render after a navigation or a re-applied toggle
+PANEL_READY_TIMEOUT = float(os.environ.get("UDEMY_PANEL_READY_TIMEOUT", 8))
+
+# Probe the panel and, only if it is closed, click the toggle (known-good one first), then wait
+# for cues with a MutationObserver. Never clicks an open panel, which would close it.
+ENSURE_PANEL_SCRIPT = """
+const [panelSelectors, cueSelectors, toggleSelectors, timeoutMs] = arg;
+const find = selectors => {
+    for (const selector of selectors) {
+        const el = document.querySelector(selector);
+        if (el) return [selector, el];
+    }
+    return [null, null];
+};
+const cueCount = () => document.querySelectorAll(cueSelectors.join(', ')).length;
+return new Promise(resolve => {
+    const start = Date.now();
+    let toggle = null;
+    if (!find(panelSelectors)[1]) {
+        const [selector, button] = find(toggleSelectors);
+        if (!button) { resolve({state: 'no_toggle', toggle: null, cues: 0, waited_ms: 0}); return; }
+        if (typeof button.click === 'function') button.click();
+        else button.dispatchEvent(new MouseEvent('click', {bubbles: true}));
+        toggle = selector;
+    }
+    let timer = null;
+    const done = state => {
+        observer.disconnect();
+        clearTimeout(timer);
+        resolve({state: state, toggle: toggle, cues: cueCount(), waited_ms: Date.now() - start});
+    };
+    const check = () => { if (cueCount() > 0) done(toggle ? 'reopened' : 'open'); };
+    const observer = new MutationObserver(check);
+    observer.observe(document.body, {childList: true, subtree: true});
+    timer = setTimeout(() => done('no_cues'), timeoutMs);
+    check();
+});
+"""
+
+
+class TranscriptPanel:
+    """Keeps the transcript panel open across lecture navigation.
+
+    ``find_and_enable_transcript`` hunts for a toggle once and records the
+    selector that worked with ``remember()``. After every navigation
+    ``ensure_open()`` then probes the panel and, only if Udemy closed it,
+    re-applies that toggle and waits for cues, all in one script call.
+    """
+
+    def __init__(self, driver, timeout=PANEL_READY_TIMEOUT):
+        self.driver = driver
+        self.timeout = timeout
+        self.known_toggle = None
+        self.probes = 0
+        self.reopened = 0
+
+    def remember(self, selector):
+        if selector and selector != self.known_toggle:
+            print(f"Transcript toggle that works on this course: {selector}")
+            self.known_toggle = selector
+
+    def ensure_open(self):
+        """Probe and, if needed, reopen the panel; returns the script's state dict.
+
+        ``state`` is "open", "reopened", "no_cues" (panel shown but no cues in time) or
+        "no_toggle" (closed and nothing to click, e.g. on a quiz or article).
+        """
+        toggles = [self.known_toggle] if self.known_toggle else []
+        toggles += [selector for selector in TRANSCRIPT_TOGGLE_SELECTORS if selector != self.known_toggle]
+        result = as_browser_driver(self.driver).evaluate(
+            ENSURE_PANEL_SCRIPT,
+            [TRANSCRIPT_PANEL_SELECTORS, CUE_SELECTORS, toggles, int(self.timeout * 1000)]) or {}
+        self.probes += 1
+        if result.get("state") == "reopened":
+            self.reopened += 1
+            self.remember(result.get("toggle"))
+        return result
+
+    def stats(self):
+        return {"probes": self.probes, "reopened": self.reopened, "known_toggle": self.known_toggle}
@@ -0,0 +1,270 @@
+import os
+import json
+import time
+import asyncio
+from browser_driver import (TRANSCRIPT_TOGGLE_SELECTORS, TRANSCRIPT_PANEL_SELECTORS, CUE_SELECTORS,
+                            COURSE_TITLE_SELECTOR, CURRENT_LECTURE_TITLE_SELECTOR, LECTURE_LINK_SELECTOR,
+                            course_title_from_page_title, lecture_id_from_url)
+from curriculum import (LECTURE_PAGE_SCRIPT, CURRICULUM_ITEM_SELECTOR, PAGE_TYPE_SELECTORS, ARTICLE_BODY_SELECTORS,
+                        SKIPPED_TYPES, raw_lecture_page)
+from transcript_collector import COLLECT_SCRIPT, COLLECT_TIMEOUT, COLLECT_SETTLE_MS
+from cancellation import CancellationToken, JobCancelled
+
+# Lectures extracted at once (one page each) and browser contexts they are spread over
+ENGINE_CONCURRENCY = int(os.environ.get("UDEMY_ENGINE_CONCURRENCY", 8))
+ENGINE_CONTEXTS = int(os.environ.get("UDEMY_ENGINE_CONTEXTS", 2))
+# Resource types never needed to read a transcript
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+BLOCKED_URL_PARTS = ("google-analytics", "googletagmanager", "doubleclick", "hotjar", "segment.io")
+
+
+class AsyncPage:
+    """Async counterpart of browser_driver.BrowserDriver over a Playwright Page."""
+
+    is_playwright = True
+
+    def __init__(self, page):
+        self.page = page
+
+    async def goto(self, url):
+        await self.page.goto(url, wait_until="domcontentloaded")
+
+    @property
+    def current_url(self):
+        return self.page.url
+
+    async def title(self):
+        return await self.page.title()
+
+    async def query_texts(self, selector):
+        return [text.strip() for text in await self.page.locator(selector).all_inner_texts()]
+
+    async def exists(self, selector):
+        return await self.page.locator(selector).count() > 0
+
+    async def click_first(self, selectors):
+        for selector in selectors:
+            locator = self.page.locator(selector).first
+            if await locator.count():
+                await locator.click()
+                return selector
+        return None
+
+    async def wait_for(self, selector, timeout=10):
+        try:
+            await self.page.locator(selector).first.wait_for(timeout=timeout * 1000)
+            return True
+        except Exception:
+            return False
+
+    async def evaluate(self, script, arg=None):
+        return await self.page.evaluate(f"(arg) => {{ {script} }}", arg)
+
+    async def close(self):
+        await self.page.close()
+
+
+class PlaywrightEngine:
+    """Extracts many lectures concurrently from one headless Chromium on a single event loop.
+
+    Lectures are spread over a few browser contexts (each with the saved login
+    session), every lecture gets its own page, and images, media, fonts and
+    trackers are blocked by request interception.
+    """
+
+    def __init__(self, session_state=None, concurrency=ENGINE_CONCURRENCY, contexts=ENGINE_CONTEXTS,
+                 headless=True, block_resources=True, cue_timeout=20, tracer=None, cancel_token=None):
+        self.session_state = session_state
+        self.concurrency = max(1, concurrency)
+        self.context_count = max(1, contexts)
+        self.headless = headless
+        self.block_resources = block_resources
+        self.cue_timeout = cue_timeout
+        self.tracer = tracer
+        self.cancel_token = cancel_token or CancellationToken()
+        self._playwright = None
+        self._browser = None
+        self._contexts = []
+        self._next_context = 0
+
+    async def start(self):
+        from playwright.async_api import async_playwright
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        for _ in range(self.context_count):
+            context = await self._browser.new_context(viewport={"width": 1920, "height": 1080})
+            if self.session_state and self.session_state.get("cookies"):
+                await context.add_cookies([self._playwright_cookie(c) for c in self.session_state["cookies"]])
+                local_storage = self.session_state.get("local_storage") or {}
+                if local_storage:
+                    await context.add_init_script(
+                        "const saved = " + json.dumps(local_storage) + ";"
+                        "const items = saved[location.origin] || {};"
+                        "for (const [k, v] of Object.entries(items)) localStorage.setItem(k, v);")
+            if self.block_resources:
+                await context.route("**/*", self._route)
+            self._contexts.append(context)
+        return self
+
+    @staticmethod
+    def _playwright_cookie(cookie):
+        converted = {k: cookie[k] for k in ("name", "value", "domain", "path", "secure", "httpOnly") if k in cookie}
+        converted.setdefault("path", "/")
+        if cookie.get("expiry"):
+            converted["expires"] = cookie["expiry"]
+        return converted
+
+    @staticmethod
+    async def _route(route):
+        request = route.request
+        if request.resource_type in BLOCKED_RESOURCE_TYPES or any(p in request.url for p in BLOCKED_URL_PARTS):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def close(self):
+        try:
+            if self._browser is not None:
+                await self._browser.close()
+        finally:
+            if self._playwright is not None:
+                await self._playwright.stop()
+
+    async def new_page(self):
+        """Open a page in the next context (round robin)."""
+        context = self._contexts[self._next_context % len(self._contexts)]
+        self._next_context += 1
+        return AsyncPage(await context.new_page())
+
+    async def list_lectures(self, lecture_url):
+        """Course title and lecture URLs, in curriculum order, from any lecture page."""
+        page = await self.new_page()
+        try:
+            await page.goto(lecture_url)
+            await page.wait_for(LECTURE_LINK_SELECTOR, timeout=30)
+            course_title = (await page.query_texts(COURSE_TITLE_SELECTOR) or [""])[0]
+            if not course_title:
+                course_title = course_title_from_page_title(await page.title())
+            urls = await page.evaluate(
+                "return Array.from(document.querySelectorAll(arg), a => a.href);", LECTURE_LINK_SELECTOR)
+            # Quizzes, exercises and resources never get a page opened for them
+            items = raw_lecture_page(await page.evaluate(
+                LECTURE_PAGE_SCRIPT, [CURRICULUM_ITEM_SELECTOR, PAGE_TYPE_SELECTORS, ARTICLE_BODY_SELECTORS]))["items"]
+            skipped = {item["href"].split("?")[0].split("#")[0] for item in items if item["type"] in SKIPPED_TYPES}
+            start_url = lecture_url.split("?")[0].split("#")[0]
+            curriculum = []
+            for url in urls or []:
+                url = url.split("?")[0].split("#")[0]
+                if url not in curriculum and url not in skipped:
+                    curriculum.append(url)
+            # Like the sequential extractor, start at the given lecture and continue in curriculum order
+            if start_url in curriculum:
+                return course_title, curriculum[curriculum.index(start_url):]
+            return course_title, [start_url] + curriculum
+        finally:
+            await page.close()
+
+    async def extract_lecture(self, url):
+        """Open one lecture in its own page and return its title and transcript cues."""
+        self.cancel_token.raise_if_cancelled()
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return await self._extract_lecture(url)
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            if self.tracer is not None:
+                # Spans overlap here, so they are recorded directly rather than with span()
+                self.tracer.record("cue_extraction", start, time.perf_counter() - start, status,
+                                   lecture_id_from_url(url), {"engine": "playwright"})
+
+    async def _extract_lecture(self, url):
+        page = await self.new_page()
+        try:
+            await page.goto(url)
+            # Articles have no transcript panel; their body text is taken instead
+            await page.wait_for(", ".join(sum(PAGE_TYPE_SELECTORS.values(), [])), timeout=self.cue_timeout)
+            lecture = raw_lecture_page(await page.evaluate(
+                LECTURE_PAGE_SCRIPT, [CURRICULUM_ITEM_SELECTOR, PAGE_TYPE_SELECTORS, ARTICLE_BODY_SELECTORS]))
+            if lecture["type"] in SKIPPED_TYPES or lecture["type"] == "article":
+                title = (await page.query_texts(CURRENT_LECTURE_TITLE_SELECTOR) or [""])[0]
+                return {"url": url, "title": title, "cues": lecture["article_lines"], "type": lecture["type"]}
+            panel = ", ".join(TRANSCRIPT_PANEL_SELECTORS)
+            if not await page.wait_for(panel, timeout=3):
+                await page.wait_for(", ".join(TRANSCRIPT_TOGGLE_SELECTORS), timeout=self.cue_timeout)
+                await page.click_first(TRANSCRIPT_TOGGLE_SELECTORS)
+            cues = []
+            timed_out = False
+            if await page.wait_for(", ".join(CUE_SELECTORS), timeout=self.cue_timeout):
+                # Scroll the whole (possibly virtualized) cue list in-page, else read what is rendered
+                collected = await page.evaluate(COLLECT_SCRIPT, [TRANSCRIPT_PANEL_SELECTORS, CUE_SELECTORS,
+                                                                 int(COLLECT_TIMEOUT * 1000), COLLECT_SETTLE_MS])
+                cues = [cue for cue in (collected or {}).get("cues") or [] if cue]
+                timed_out = bool((collected or {}).get("timed_out"))
+                for selector in ([] if cues else CUE_SELECTORS):
+                    cues = [text for text in await page.query_texts(selector) if text]
+                    if cues:
+                        break
+            title = (await page.query_texts(CURRENT_LECTURE_TITLE_SELECTOR) or [""])[0]
+            # Duration and timed_out let callers tell a complete transcript from a truncated one
+            return {"url": url, "title": title, "cues": cues, "type": lecture["type"],
+                    "duration": lecture["duration"], "timed_out": timed_out}
+        finally:
+            await page.close()
+
+    async def extract_course(self, lecture_url, max_lectures=0, on_lecture=None):
+        """Extract every lecture of the course concurrently; results come back in course order.
+
+        ``on_lecture(index, total, result)`` is called as each lecture finishes.
+        """
+        course_title, urls = await self.list_lectures(lecture_url)
+        if max_lectures:
+            urls = urls[:max_lectures]
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = [None] * len(urls)
+        done = 0
+
+        async def worker(index, url):
+            nonlocal done
+            async with semaphore:
+                self.cancel_token.raise_if_cancelled()
+                try:
+                    result = await self.extract_lecture(url)
+                except JobCancelled:
+                    raise
+                except Exception as e:
+                    result = {"url": url, "title": "", "cues": [], "error": str(e)}
+            results[index] = result
+            done += 1
+            if on_lecture is not None:
+                on_lecture(done, len(urls), result)
+
+        tasks = [asyncio.ensure_future(worker(index, url)) for index, url in enumerate(urls)]
+        # Cancelling the job cancels every in-flight lecture task at once
+        loop = asyncio.get_running_loop()
+        unregister = self.cancel_token.on_cancel(lambda: loop.call_soon_threadsafe(
+            lambda: [task.cancel() for task in tasks]))
+        try:
+            await asyncio.gather(*tasks)
+        except asyncio.CancelledError:
+            self.cancel_token.raise_if_cancelled()
+            raise
+        finally:
+            unregister()
+        return course_title, results
+
+
+def run_course(lecture_url, session_state=None, max_lectures=0, on_lecture=None, **engine_options):
+    """Blocking entry point: run the async engine on its own event loop (e.g. from a worker thread)."""
+
+    async def main():
+        engine = PlaywrightEngine(session_state=session_state, **engine_options)
+        await engine.start()
+        try:
+            return await engine.extract_course(lecture_url, max_lectures, on_lecture)
+        finally:
+            await engine.close()
+
+    return asyncio.run(main())
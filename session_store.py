@@ -0,0 +1,277 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlsplit
+
+# Saved logins are reused for at most this long, even if their cookies claim to live longer
+SESSION_MAX_AGE = float(os.environ.get("UDEMY_SESSION_MAX_AGE", 12 * 60 * 60))
+# Cookies whose expiry bounds the life of a Udemy login
+AUTH_COOKIES = {"access_token", "dj_session_id", "ud_user_jwt"}
+# Page elements that only render for a logged-in user / only for a logged-out one
+LOGGED_IN_SELECTORS = ["div[class*='course-content']", "a[class*='user-profile']", "div[class*='sidebar']",
+                       "[data-purpose='curriculum-section-container']"]
+LOGGED_OUT_SELECTORS = ["a[data-purpose*='header-login']", "#credsDiv", "#user-name-input"]
+# PBKDF2 rounds for the credential proof that keys saved sessions and shared jobs
+CREDENTIAL_ROUNDS = int(os.environ.get("UDEMY_CREDENTIAL_ROUNDS", "200000"))
+
+_account_locks = {}
+_account_locks_guard = threading.Lock()
+
+
+def _account_lock(account):
+    """Process-wide lock per account, so parallel workers log in once and the rest reuse it."""
+    with _account_locks_guard:
+        return _account_locks.setdefault(account, threading.Lock())
+
+
+def credential_id(email, password):
+    """Stable proof of an email+password pair, used as the account of saved sessions and shared jobs.
+
+    Someone who only knows the email of another user gets a different id, so they can
+    neither load that user's saved login nor join their jobs.
+    """
+    email = (email or "").strip().lower()
+    digest = hashlib.pbkdf2_hmac("sha256", (password or "").encode("utf-8"),
+                                 f"udemy-session:{email}".encode("utf-8"), CREDENTIAL_ROUNDS)
+    return digest.hex()
+
+
+def _origin(url):
+    parts = urlsplit(url or "")
+    return f"{parts.scheme}://{parts.netloc}" if parts.scheme and parts.netloc else None
+
+
+def _is_playwright(target):
+    return hasattr(target, "goto")
+
+
+class SessionStore:
+    """Encrypted, on-disk store of authenticated browser sessions (cookies + localStorage).
+
+    One file per account under ``root``, encrypted with Fernet. The key comes from
+    ``UDEMY_SESSION_KEY`` or a key file created next to the sessions with 0600
+    permissions. Without the ``cryptography`` package nothing is persisted, since
+    session cookies must never be written in the clear.
+    """
+
+    def __init__(self, root=os.path.join("udemy_transcripts", ".session"), key=None, max_age=SESSION_MAX_AGE):
+        self.root = root
+        self.max_age = max_age
+        self._fernet = None
+        try:
+            from cryptography.fernet import Fernet
+            os.makedirs(root, mode=0o700, exist_ok=True)
+            self._fernet = Fernet(key or os.environ.get("UDEMY_SESSION_KEY") or self._load_or_create_key(Fernet))
+        except ImportError:
+            print("cryptography is not installed, logins will not be saved between runs.")
+        except Exception as e:
+            print(f"Session store unavailable, logins will not be saved: {str(e)}")
+
+    @property
+    def enabled(self):
+        return self._fernet is not None
+
+    def _load_or_create_key(self, fernet_cls):
+        key_path = os.path.join(self.root, "session.key")
+        try:
+            with open(key_path, "rb") as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            pass
+        key = fernet_cls.generate_key()
+        # O_EXCL: if another worker created the key first, use theirs
+        try:
+            fd = os.open(key_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        except FileExistsError:
+            with open(key_path, "rb") as f:
+                return f.read().strip()
+        with os.fdopen(fd, "wb") as f:
+            f.write(key)
+        return key
+
+    def _path(self, account):
+        digest = hashlib.sha256((account or "default").strip().lower().encode("utf-8")).hexdigest()[:24]
+        return os.path.join(self.root, f"{digest}.session")
+
+    def save(self, account, state):
+        """Encrypt and persist a captured session state for account."""
+        if not self.enabled or not state or not state.get("cookies"):
+            return False
+        state = dict(state, saved_at=time.time())
+        path = self._path(account)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(self._fernet.encrypt(json.dumps(state).encode("utf-8")))
+        os.replace(tmp_path, path)
+        return True
+
+    def load(self, account):
+        """Return the saved state for account, or None if missing, unreadable or expired."""
+        if not self.enabled:
+            return None
+        try:
+            with open(self._path(account), "rb") as f:
+                # ttl makes Fernet reject anything saved longer than max_age ago
+                state = json.loads(self._fernet.decrypt(f.read(), ttl=int(self.max_age)))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Saved session is expired or unreadable, a fresh login is needed: {type(e).__name__}")
+            self.invalidate(account)
+            return None
+
+        expires_at = session_expiry(state)
+        if expires_at is not None and expires_at <= time.time() + 60:
+            print("Saved session cookies have expired, a fresh login is needed.")
+            self.invalidate(account)
+            return None
+        return state
+
+    def invalidate(self, account):
+        """Forget the saved session of account."""
+        try:
+            os.remove(self._path(account))
+        except OSError:
+            pass
+
+
+def session_expiry(state):
+    """Earliest expiry (epoch seconds) of the auth cookies in a state, or None if unknown."""
+    expiries = [cookie["expiry"] for cookie in state.get("cookies", [])
+                if cookie.get("name") in AUTH_COOKIES and cookie.get("expiry")]
+    return min(expiries) if expiries else None
+
+
+def capture_session(driver):
+    """Capture cookies and localStorage from a Selenium driver or Playwright page."""
+    if _is_playwright(driver):
+        storage = driver.context.storage_state()
+        cookies = []
+        for cookie in storage.get("cookies", []):
+            converted = {k: cookie[k] for k in ("name", "value", "domain", "path", "secure", "httpOnly") if k in cookie}
+            if cookie.get("expires", -1) > 0:
+                converted["expiry"] = int(cookie["expires"])
+            cookies.append(converted)
+        local_storage = {entry["origin"]: {item["name"]: item["value"] for item in entry.get("localStorage", [])}
+                         for entry in storage.get("origins", [])}
+        return {"cookies": cookies, "local_storage": local_storage, "origin": _origin(driver.url)}
+
+    origin = _origin(driver.current_url)
+    local_storage = {}
+    try:
+        items = driver.execute_script("return Object.assign({}, window.localStorage);")
+        if origin and items:
+            local_storage[origin] = items
+    except Exception as e:
+        print(f"Could not read localStorage: {str(e)}")
+    return {"cookies": driver.get_cookies(), "local_storage": local_storage, "origin": origin}
+
+
+def inject_session(target, state):
+    """Load a saved state into a Selenium driver, Playwright page or requests session."""
+    cookies = state.get("cookies", [])
+
+    if hasattr(target, "mount") and hasattr(target, "cookies"):  # requests.Session
+        for cookie in cookies:
+            target.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain"),
+                               path=cookie.get("path", "/"))
+        return
+
+    origin = state.get("origin")
+    if _is_playwright(target):
+        converted = []
+        for cookie in cookies:
+            entry = {k: cookie[k] for k in ("name", "value", "domain", "path", "secure", "httpOnly") if k in cookie}
+            entry.setdefault("path", "/")
+            if cookie.get("expiry"):
+                entry["expires"] = cookie["expiry"]
+            converted.append(entry)
+        target.context.add_cookies(converted)
+        for storage_origin, items in state.get("local_storage", {}).items():
+            if _origin(target.url) != storage_origin:
+                target.goto(storage_origin)
+            target.evaluate("items => { for (const [k, v] of Object.entries(items)) localStorage.setItem(k, v); }",
+                            items)
+        return
+
+    # Selenium only accepts cookies for the domain of the page currently loaded
+    if origin and _origin(target.current_url) != origin:
+        target.get(origin)
+    for cookie in cookies:
+        cookie = {k: v for k, v in cookie.items() if k in ("name", "value", "domain", "path", "secure",
+                                                          "httpOnly", "expiry", "sameSite")}
+        if cookie.get("sameSite") not in (None, "Strict", "Lax", "None"):
+            cookie.pop("sameSite")
+        try:
+            target.add_cookie(cookie)
+        except Exception:
+            # Cookies of other domains (e.g. the SSO provider) cannot be set from this page
+            pass
+    items = state.get("local_storage", {}).get(origin)
+    if items:
+        target.execute_script("for (const [k, v] of Object.entries(arguments[0])) localStorage.setItem(k, v);", items)
+
+
+def probe_logged_in(driver, url, timeout=15):
+    """Load url and report whether the page shows a logged-in user."""
+    if _is_playwright(driver):
+        driver.goto(url)
+        try:
+            driver.wait_for_selector(", ".join(LOGGED_IN_SELECTORS + LOGGED_OUT_SELECTORS), timeout=timeout * 1000)
+        except Exception:
+            return False
+        return driver.query_selector(", ".join(LOGGED_OUT_SELECTORS)) is None
+
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    driver.get(url)
+    try:
+        WebDriverWait(driver, timeout).until(
+            lambda d: d.find_elements(By.CSS_SELECTOR, ", ".join(LOGGED_IN_SELECTORS + LOGGED_OUT_SELECTORS)))
+    except Exception:
+        return False
+    return not driver.find_elements(By.CSS_SELECTOR, ", ".join(LOGGED_OUT_SELECTORS))
+
+
+def ensure_logged_in(driver, url, login, store, account=None, status=print, token=None):
+    """Reuse a saved session when a probe confirms it still works, otherwise run login().
+
+    ``login`` performs the interactive/SSO login and returns True on success; the
+    resulting session is then saved for every later run and parallel worker.
+    Logins of the same account are serialized, so concurrent workers wait for the
+    first one and reuse its session instead of all running SSO at once.
+    """
+    lock = _account_lock(account or "default")
+    # Poll so a worker waiting for another one's login can still be cancelled
+    while not lock.acquire(timeout=1):
+        if token is not None:
+            token.raise_if_cancelled()
+    try:
+        state = store.load(account) if store is not None else None
+        if state:
+            try:
+                inject_session(driver, state)
+                if probe_logged_in(driver, url):
+                    status("Reused saved login session.")
+                    return True
+                status("Saved login session is no longer valid, logging in again...")
+            except Exception as e:
+                status(f"Could not reuse saved login session: {str(e)}")
+            store.invalidate(account)
+
+        if not login():
+            return False
+
+        if store is not None and store.enabled:
+            try:
+                if store.save(account, capture_session(driver)):
+                    status("Login session saved for later runs.")
+            except Exception as e:
+                status(f"Could not save login session: {str(e)}")
+        return True
+    finally:
+        lock.release()
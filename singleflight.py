@@ -0,0 +1,90 @@
+import json
+import hashlib
+import threading
+from cancellation import JobCancelled
+
+
+def request_key(*parts):
+    """Stable hash of a request's identifying parts (anything JSON-serializable)."""
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    def __init__(self, retry=False):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # This call re-runs one that failed, on behalf of that call's waiters
+        self.retry = retry
+
+
+class SingleFlight:
+    """Coalesces identical calls that are in flight at the same time.
+
+    The first caller for a key runs ``fn``; callers arriving with the same key
+    before it returns wait for that result instead of making their own call.
+    Only in-flight calls are shared, so this complements a result cache
+    rather than replacing it. If the leading call fails (returns None or
+    raises) or is cancelled (its job was stopped), its waiters re-enter the
+    flight: the first becomes the new leader and the others share its call, so
+    a failure costs one shared retry. A failed retry is shared as it is, rather
+    than every waiter trying again one after another; only a cancelled call
+    never counts against the waiters.
+    """
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "coalesced": 0}
+
+    def do(self, key, fn, token=None):
+        """Return (result, shared): fn()'s result and whether it came from another caller's call."""
+        retry = False
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight(retry)
+                    self._stats["calls"] += 1
+
+            if leader:
+                try:
+                    flight.result = fn()
+                    return flight.result, False
+                except BaseException as e:
+                    flight.error = e
+                    raise
+                finally:
+                    with self._lock:
+                        del self._flights[key]
+                    flight.done.set()
+
+            # Waiting stays cancellable by the waiter's own job
+            while not flight.done.wait(0.25):
+                if token is not None:
+                    token.raise_if_cancelled()
+            failed = flight.error is not None or flight.result is None
+            if failed and (isinstance(flight.error, JobCancelled) or not flight.retry):
+                # The leader's job was stopped, or its first attempt failed: re-enter and share one new call
+                retry = retry or not isinstance(flight.error, JobCancelled)
+                continue
+            with self._lock:
+                self._stats["coalesced"] += 1
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+    def stats(self):
+        """Calls made and calls saved by joining one already in flight."""
+        with self._lock:
+            return dict(self._stats)
+
+
+# Shared by every SummaryClient in the process, so concurrent jobs summarizing the same lecture make one call
+summary_flight = SingleFlight()
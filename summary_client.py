@@ -0,0 +1,320 @@
+import os
+import json
+import socket
+import hashlib
+import random
+import threading
+import requests
+from requests.adapters import HTTPAdapter, DEFAULT_POOLSIZE
+from contextlib import nullcontext
+from cancellation import CancellationToken, run_cancellable
+from singleflight import summary_flight, request_key
+
+SUMMARY_MODEL = "gpt-4o-mini"
+# Point at any OpenAI-compatible endpoint (e.g. the local mock in benchmarks/) with OPENAI_API_BASE
+OPENAI_API_BASE = os.environ.get("OPENAI_API_BASE", "https://api.openai.com/v1")
+OPENAI_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", 4))
+
+# Statuses worth retrying: rate limiting and transient server-side failures
+RETRYABLE_STATUSES = {408, 409, 429, 500, 502, 503, 504}
+
+SUMMARY_SYSTEM_PROMPT = "You are an expert educational content specialist with deep expertise in knowledge synthesis, information architecture, and technical communication. Your specialty is transforming complex educational content into beautifully structured, comprehensive summaries optimized for Notion. You excel at identifying core concepts, establishing clear hierarchical relationships between ideas, highlighting key terminology with proper definitions, and creating visually engaging layouts that enhance learning retention. You incorporate learning psychology principles by including memorable examples, analogies, and visual cues throughout your summaries. For technical content, you ensure precise explanations of processes and concepts. You maintain academic rigor while making complex topics accessible, and you're skilled at creating summaries that serve as both quick reference materials and comprehensive study guides."
+
+
+def chat_completions_url(api_base=None):
+    """Chat-completions endpoint under api_base (defaults to OPENAI_API_BASE)."""
+    return (api_base or OPENAI_API_BASE).rstrip("/") + "/chat/completions"
+
+
+# Everything before the lecture title is identical on every call and the per-lecture parts come last,
+# so providers with prompt caching can reuse the prefix. OpenAI only caches prefixes of 1024 tokens or
+# more, which this one (about 650) does not reach; the cached-token counters show what a provider reuses.
+SUMMARY_INSTRUCTIONS = """Create a visually appealing, well-structured summary of the lecture transcript below that will look great in Notion.
+
+    Follow these specific formatting guidelines for Notion:
+
+    1. Start with a large H1 header showing the exact lecture title given below the guidelines
+    2. Create a clear table of contents with H2 headers for main sections 
+    3. Use proper Markdown formatting that Notion supports:
+       - H1, H2, H3 headers for hierarchy (use # syntax)
+       - Bold text using **double asterisks** for important concepts
+       - Create clean bullet points and numbered lists where appropriate
+       - Use `code blocks` for any technical terms, commands, or syntax
+       - Create toggle lists for detailed explanations (use the > format)
+       - Use proper block quotes for important quotations (use > for this)
+       - Add horizontal dividers (---) between major sections
+       - Use emojis to highlight key areas (📌, 🔑, ⚠️, 💡, etc.)
+
+    4. Structure the content as follows:
+       - Brief overview (2-3 sentences)
+       - Key concepts with clear explanations
+       - Important definitions highlighted
+       - Step-by-step processes where applicable
+       - Visual hierarchy that makes the summary scannable
+       - A "Key Takeaways" section at the end
+
+    5. Make the summary visually engaging with:
+       - Consistent formatting
+       - Strategic use of whitespace
+       - Font variations (bold, italic) to guide the eye
+       - Emoji icons (sparingly) as visual markers
+
+    Create this summary specifically to look outstanding when imported into Notion. Prioritize clarity, visual structure, and professional appearance.
+
+    """
+
+
+def build_summary_messages(lecture_title, transcript_text):
+    """Chat messages for one summary: the static system prompt and instructions first, the lecture last."""
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": f"{SUMMARY_INSTRUCTIONS}The lecture title is: {lecture_title}.\n\n"
+                                    f"Transcript:\n{transcript_text}"}
+    ]
+
+
+# Prompt tokens sent and served from the provider's cache by every client in the process (shown in the app)
+_process_usage = {"prompt_tokens": 0, "cached_tokens": 0}
+_process_usage_lock = threading.Lock()
+
+
+def process_usage():
+    """Prompt and cached tokens of every summary request made by this process."""
+    with _process_usage_lock:
+        return dict(_process_usage)
+
+
+class _AbortableAdapter(HTTPAdapter):
+    """Transport adapter that can cut off the request a given thread has in flight.
+
+    The connection pools record which connection each thread checked out, so a
+    cancelled job's request is aborted by shutting down that socket, without
+    touching other jobs' requests on the same session.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._in_flight = {}
+        self._in_flight_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        adapter = self
+        pool_classes = {}
+        for scheme, pool_class in self.poolmanager.pool_classes_by_scheme.items():
+            class TrackingPool(pool_class):
+                def _get_conn(self, timeout=None):
+                    conn = super()._get_conn(timeout)
+                    with adapter._in_flight_lock:
+                        adapter._in_flight[threading.get_ident()] = conn
+                    return conn
+
+                def _put_conn(self, conn):
+                    with adapter._in_flight_lock:
+                        for thread_id, in_flight in list(adapter._in_flight.items()):
+                            if in_flight is conn:
+                                del adapter._in_flight[thread_id]
+                    super()._put_conn(conn)
+            pool_classes[scheme] = TrackingPool
+        self.poolmanager.pool_classes_by_scheme = pool_classes
+
+    def abort(self, thread_id):
+        """Shut down the socket of the request running in thread_id, if any."""
+        with self._in_flight_lock:
+            conn = self._in_flight.pop(thread_id, None)
+        sock = getattr(conn, "sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class SummaryClient:
+    """Chat-completions client used for lecture summaries.
+
+    Retries rate-limited (429) and transient 5xx responses with exponential
+    backoff, honouring ``Retry-After``, and keeps counters that the CLI, the app
+    and the load benchmark report. Safe to share between threads. Identical
+    requests already in flight in any client of the process (``flight``) are
+    joined instead of sent again.
+    """
+
+    def __init__(self, api_key, api_base=None, model=SUMMARY_MODEL, max_retries=OPENAI_MAX_RETRIES,
+                 timeout=180, backoff_base=1.0, backoff_max=30.0, tracer=None, session=None, flight=summary_flight,
+                 pool_maxsize=DEFAULT_POOLSIZE):
+        self.api_key = api_key
+        self.url = chat_completions_url(api_base)
+        self.model = model
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.tracer = tracer
+        self.session = session or requests.Session()
+        # Cancelling a job aborts its request in flight instead of leaving it to run to the timeout
+        self._adapter = _AbortableAdapter(pool_maxsize=pool_maxsize)
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+        self.flight = flight
+        self._key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+        self._stats = {"requests": 0, "succeeded": 0, "failed": 0, "retries": 0,
+                       "rate_limited": 0, "server_errors": 0, "connection_errors": 0, "coalesced": 0,
+                       "prompt_tokens": 0, "cached_tokens": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def stats(self):
+        """Snapshot of the request/retry counters."""
+        with self._lock:
+            return dict(self._stats)
+
+    def _record_usage(self, usage):
+        """Count prompt tokens and how many of them the provider served from its prompt cache."""
+        if not usage:
+            return
+        details = usage.get("prompt_tokens_details") or {}
+        prompt_tokens = usage.get("prompt_tokens") or 0
+        cached_tokens = details.get("cached_tokens") or 0
+        with self._lock:
+            self._stats["prompt_tokens"] += prompt_tokens
+            self._stats["cached_tokens"] += cached_tokens
+        with _process_usage_lock:
+            _process_usage["prompt_tokens"] += prompt_tokens
+            _process_usage["cached_tokens"] += cached_tokens
+
+    def _backoff(self, attempt, response=None):
+        """Seconds to wait before retry number ``attempt`` (Retry-After wins when present)."""
+        if response is not None:
+            try:
+                return min(self.backoff_max, float(response.headers.get("Retry-After")))
+            except (TypeError, ValueError):
+                pass
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)  # jitter keeps parallel workers from retrying in lockstep
+
+    def summarize(self, transcript_text, lecture_title, token=None, stream=False):
+        """Notion-friendly markdown summary of a transcript, or None if the request failed."""
+        messages = build_summary_messages(lecture_title, transcript_text)
+        return self.chat(messages, token=token, stream=stream, temperature=0.7, max_tokens=2500)
+
+    def chat(self, messages, token=None, stream=False, **options):
+        """Send one chat completion (with retries) and return the message content, or None."""
+        if self.flight is None:
+            return self._chat(messages, token, stream, **options)
+        # Endpoint, model, messages (so the transcript), parameters and the API key (hashed) identify a
+        # request, so one user's bad or over-quota key never fails another user's summary
+        key = request_key(self.url, self.model, messages, options, self._key_hash)
+        content, shared = self.flight.do(key, lambda: self._chat(messages, token, stream, **options), token)
+        if shared:
+            self._count("coalesced")
+        return content
+
+    def _chat(self, messages, token=None, stream=False, **options):
+        token = token or CancellationToken()
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+        data = {"model": self.model, "messages": messages}
+        data.update(options)
+        if stream:
+            data["stream"] = True
+            # The last chunk then carries the usage, including cached prompt tokens
+            data["stream_options"] = {"include_usage": True}
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self._count("retries")
+            self._count("requests")
+            response = None
+            try:
+                # The request runs in a helper thread; cancelling the job aborts its connection
+                call = {}
+                span = self.tracer.span("llm_request", model=self.model, attempt=attempt) if self.tracer else nullcontext()
+                with span:
+                    response = run_cancellable(self._post, token, headers, data, stream,
+                                               token.timeout_for(self.timeout), call,
+                                               abort=lambda: self._adapter.abort(call.get("thread")))
+
+                if response.status_code in RETRYABLE_STATUSES and attempt < self.max_retries:
+                    self._count("rate_limited" if response.status_code == 429 else "server_errors")
+                    delay = self._backoff(attempt, response)
+                    print(f"API returned {response.status_code}, retrying in {delay:.1f}s "
+                          f"(attempt {attempt + 1}/{self.max_retries})")
+                    token.sleep(delay)
+                    continue
+                response.raise_for_status()
+
+                if stream:
+                    unregister = token.on_cancel(response.close)
+                    try:
+                        content = self._read_stream(response)
+                    except Exception:
+                        token.raise_if_cancelled()
+                        raise
+                    finally:
+                        unregister()
+                    token.raise_if_cancelled()
+                else:
+                    result = response.json()
+                    self._record_usage(result.get("usage"))
+                    content = self._read_message(result)
+                if content is None:
+                    print("Unexpected API response format")
+                    self._count("failed")
+                else:
+                    self._count("succeeded")
+                return content
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._count("connection_errors")
+                if attempt < self.max_retries:
+                    delay = self._backoff(attempt)
+                    print(f"API request failed ({str(e)}), retrying in {delay:.1f}s")
+                    token.sleep(delay)
+                    continue
+                print(f"API request failed: {str(e)}")
+            except requests.exceptions.RequestException as e:
+                if response is not None and response.status_code == 429:
+                    self._count("rate_limited")
+                elif response is not None and response.status_code >= 500:
+                    self._count("server_errors")
+                print(f"API request failed: {str(e)}")
+                if response is not None:
+                    print(f"Response status: {response.status_code}")
+                    print(f"Response body: {response.text}")
+            self._count("failed")
+            return None
+        return None
+
+    def _post(self, headers, data, stream, timeout, call):
+        call["thread"] = threading.get_ident()
+        return self.session.post(self.url, headers=headers, data=json.dumps(data), timeout=timeout, stream=stream)
+
+    @staticmethod
+    def _read_message(result):
+        if "choices" in result and len(result["choices"]) > 0:
+            return result["choices"][0]["message"]["content"]
+        return None
+
+    def _read_stream(self, response):
+        """Concatenate the content deltas of a server-sent-events completion stream."""
+        parts = []
+        for line in response.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue
+            payload = line[len("data:"):].strip()
+            if payload == "[DONE]":
+                break
+            try:
+                chunk = json.loads(payload)
+            except ValueError:
+                continue
+            self._record_usage(chunk.get("usage"))
+            choices = chunk.get("choices") or []
+            if choices:
+                parts.append(choices[0].get("delta", {}).get("content") or "")
+        return "".join(parts) if parts else None
@@ -0,0 +1,59 @@
+import os
+import json
+import multiprocessing
+from artifact_store import ArtifactStore
+
+
+def store_many(root, worker, count):
+    store = ArtifactStore(root)
+    for i in range(count):
+        transcript = store.store_file(os.path.join(root, "course"), f"{worker}-{i}.txt", f"{worker} {i}")
+        store.put_summary(transcript, f"notes {worker} {i}")
+
+
+def test_identical_text_is_stored_once_and_linked(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    first = store.store_file(str(tmp_path / "course-a"), "Intro.txt", "same transcript")
+    second = store.store_file(str(tmp_path / "course-b"), "Welcome.txt", "same transcript")
+    assert first == second == ArtifactStore.hash_text("same transcript")
+    blob = store.blob_path(first)
+    assert os.path.exists(blob)
+    with open(tmp_path / "course-b" / "Welcome.txt", encoding="utf-8") as f:
+        assert f.read() == "same transcript"
+    with open(tmp_path / "course-a" / "manifest.json", encoding="utf-8") as f:
+        assert json.load(f)["files"]["Intro.txt"] == {"sha256": first, "kind": "transcript"}
+
+
+def test_rewriting_a_file_never_modifies_the_shared_blob(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    digest = store.store_file(str(tmp_path / "course"), "a.txt", "original")
+    store.store_file(str(tmp_path / "course"), "a.txt", "changed")
+    assert store.get(digest) == "original"
+    with open(tmp_path / "course" / "a.txt", encoding="utf-8") as f:
+        assert f.read() == "changed"
+
+
+def test_summaries_are_reused_per_model_and_title(tmp_path):
+    store = ArtifactStore(str(tmp_path))
+    transcript = store.put("transcript text")
+    variant = ArtifactStore.summary_variant("gpt-4o", "Lecture 1")
+    store.put_summary(transcript, "# Notes", variant)
+    assert ArtifactStore(str(tmp_path)).get_summary(transcript, variant) == "# Notes"
+    # Notes are headed with the title, so another lecture with the same transcript gets its own
+    assert store.get_summary(transcript, ArtifactStore.summary_variant("gpt-4o", "Lecture 2")) is None
+    assert store.get_summary(transcript, ArtifactStore.summary_variant("gpt-4.1", "Lecture 1")) is None
+    assert store.get("0" * 64) is None
+
+
+def test_processes_sharing_a_store_never_lose_manifest_or_index_entries(tmp_path):
+    root = str(tmp_path)
+    workers = [multiprocessing.Process(target=store_many, args=(root, worker, 40)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+    with open(tmp_path / "course" / "manifest.json", encoding="utf-8") as f:
+        assert len(json.load(f)["files"]) == 160
+    with open(ArtifactStore(root).summary_index_path, encoding="utf-8") as f:
+        assert len(json.load(f)) == 160
+    assert not [name for name in os.listdir(tmp_path / "course") if name.endswith(".tmp")]
@@ -0,0 +1,86 @@
+import time
+import multiprocessing
+from batch_runner import BatchQueue
+
+
+def claim_all(path, worker, claimed):
+    queue = BatchQueue(path)
+    while True:
+        course = queue.claim(worker, lease=60)
+        if course is None:
+            return
+        claimed.put(course["id"])
+
+
+def test_adding_the_same_course_twice_queues_it_once(tmp_path):
+    queue = BatchQueue(str(tmp_path / "batch.sqlite3"))
+    assert queue.add("https://www.udemy.com/course/x/", {"max_videos": 0})
+    assert not queue.add("https://www.udemy.com/course/x?ref=1", {"max_videos": 0})
+    assert queue.add("https://www.udemy.com/course/x/", {"max_videos": 5})
+    assert queue.counts()["pending"] == 2
+
+
+def test_workers_in_separate_processes_never_claim_the_same_course(tmp_path):
+    path = str(tmp_path / "batch.sqlite3")
+    queue = BatchQueue(path)
+    for i in range(40):
+        queue.add(f"https://www.udemy.com/course/c{i}/")
+
+    claimed = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=claim_all, args=(path, f"w{i}", claimed)) for i in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(30)
+    ids = [claimed.get(timeout=5) for _ in range(40)]
+    assert sorted(ids) == sorted(set(ids)) and len(ids) == 40
+    assert queue.counts()["running"] == 40
+
+
+def test_expired_lease_is_reclaimed_and_the_old_worker_loses_it(tmp_path):
+    queue = BatchQueue(str(tmp_path / "batch.sqlite3"))
+    queue.add("https://www.udemy.com/course/x/")
+    course = queue.claim("dead-worker", lease=0.1)
+    assert queue.reclaim_expired() == 0
+    time.sleep(0.2)
+    assert queue.reclaim_expired() == 1
+
+    retaken = queue.claim("live-worker", lease=60)
+    assert retaken["id"] == course["id"] and retaken["attempts"] == 2
+    # The worker that stalled can neither renew nor overwrite the outcome
+    assert not queue.heartbeat(course["id"], "dead-worker", 60)
+    assert not queue.finish(course["id"], "failed", worker="dead-worker")
+    assert queue.heartbeat(course["id"], "live-worker", 60)
+    assert queue.finish(course["id"], "done", lectures=3, worker="live-worker")
+    assert queue.counts() == {"pending": 0, "running": 0, "done": 1, "failed": 0, "lectures": 3}
+
+
+def test_heartbeat_keeps_a_lease_alive(tmp_path):
+    queue = BatchQueue(str(tmp_path / "batch.sqlite3"))
+    queue.add("https://www.udemy.com/course/x/")
+    course = queue.claim("worker", lease=0.3)
+    for _ in range(3):
+        time.sleep(0.15)
+        assert queue.heartbeat(course["id"], "worker", 0.3)
+        assert queue.reclaim_expired() == 0
+
+
+def test_course_that_keeps_killing_workers_is_failed(tmp_path):
+    queue = BatchQueue(str(tmp_path / "batch.sqlite3"))
+    queue.add("https://www.udemy.com/course/x/")
+    for attempt in range(2):
+        queue.claim(f"worker-{attempt}", lease=0.05)
+        time.sleep(0.1)
+        queue.reclaim_expired(max_attempts=2)
+    failed = queue.courses("failed")
+    assert len(failed) == 1 and "Lease expired 2 times" in failed[0]["error"]
+    assert queue.claim("worker-3", lease=60) is None
+
+
+def test_claims_without_a_lease_expire_once_stale(tmp_path):
+    queue = BatchQueue(str(tmp_path / "batch.sqlite3"))
+    queue.add("https://www.udemy.com/course/x/")
+    queue.claim("old-runner")
+    assert queue.reclaim_expired(stale_after=60) == 0
+    time.sleep(0.1)
+    assert queue.reclaim_expired(stale_after=0.05) == 1
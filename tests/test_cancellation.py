@@ -0,0 +1,107 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from cancellation import CancellationToken, JobCancelled, DeadlineExceeded, run_cancellable
+from summary_client import SummaryClient
+
+
+class SlowChatServer:
+    """Chat-completions endpoint that never answers until stopped; records dropped connections."""
+
+    def __init__(self):
+        self.disconnected = threading.Event()
+        self.release = threading.Event()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                while not server.release.wait(0.05):
+                    # A cut-off client shows up as EOF or a reset on the connection
+                    self.connection.settimeout(0.01)
+                    try:
+                        closed = self.connection.recv(1) == b""
+                    except TimeoutError:
+                        continue
+                    except OSError:
+                        closed = True
+                    if closed:
+                        server.disconnected.set()
+                        return
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+
+    def stop(self):
+        self.release.set()
+        self.httpd.shutdown()
+
+
+def test_cancel_runs_callbacks_once_and_raises_at_cancellation_points():
+    token = CancellationToken()
+    calls = []
+    token.on_cancel(lambda: calls.append("first"))
+    unregister = token.on_cancel(lambda: calls.append("removed"))
+    unregister()
+    token.cancel("Stop")
+    token.cancel("Again")
+    assert calls == ["first"] and token.reason == "Stop"
+    with pytest.raises(JobCancelled):
+        token.raise_if_cancelled()
+    # Registering after cancellation runs the callback right away
+    token.on_cancel(lambda: calls.append("late"))
+    assert calls == ["first", "late"]
+
+
+def test_deadline_and_child_tokens():
+    parent = CancellationToken(timeout=0.2)
+    child = parent.child(timeout=5)
+    assert 0 < child.remaining() <= 0.2
+    assert child.timeout_for(30) <= 0.2
+    start = time.monotonic()
+    with pytest.raises(DeadlineExceeded):
+        child.sleep(5)
+    assert time.monotonic() - start < 1
+    assert child.cancelled and parent.cancelled
+    parent.close()
+
+    parent = CancellationToken()
+    child = parent.child()
+    child.cancel()
+    assert not parent.cancelled
+
+
+def test_run_cancellable_releases_the_caller_and_aborts_the_call():
+    token = CancellationToken()
+    aborted = threading.Event()
+    threading.Timer(0.1, token.cancel).start()
+    start = time.monotonic()
+    with pytest.raises(JobCancelled):
+        run_cancellable(time.sleep, token, 5, abort=aborted.set)
+    assert time.monotonic() - start < 1
+    assert aborted.is_set()
+
+    assert run_cancellable(lambda a, b=0: a + b, CancellationToken(), 1, b=2) == 3
+    with pytest.raises(ValueError):
+        run_cancellable(int, CancellationToken(), "not a number")
+
+
+def test_cancelling_a_summary_aborts_its_request_in_flight():
+    server = SlowChatServer()
+    try:
+        client = SummaryClient("sk-test", api_base=server.base_url, max_retries=0, timeout=30, flight=None)
+        token = CancellationToken()
+        threading.Timer(0.3, token.cancel).start()
+        start = time.monotonic()
+        with pytest.raises(JobCancelled):
+            client.summarize("some transcript", "Lecture", token=token)
+        assert time.monotonic() - start < 2
+        # The connection itself was cut, not just abandoned until its timeout
+        assert server.disconnected.wait(3)
+    finally:
+        server.stop()
@@ -0,0 +1,44 @@
+import pytest
+from curriculum import classify_item, lecture_page, parse_duration, summarize_curriculum, SKIPPED_TYPES
+
+
+@pytest.mark.parametrize("text, seconds", [
+    ("5min", 300), ("1hr 5min", 3900), ("12:34", 754), ("1:02:03", 3723), ("Resources", None), ("", None),
+])
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == seconds
+
+
+@pytest.mark.parametrize("item, item_type", [
+    ({"icon": "#icon-video", "meta": "5min"}, "video"),
+    ({"icon": "#icon-play"}, "video"),
+    ({"icon": "#icon-article"}, "article"),
+    ({"icon": "#icon-quiz"}, "quiz"),
+    ({"icon": "#icon-code"}, "exercise"),
+    ({"icon": "#icon-file-download"}, "resource"),
+    # Icon names match whole tokens only
+    ({"icon": "#icon-label"}, "unknown"),
+    ({"icon": "#icon-display"}, "unknown"),
+    ({"icon": "#icon-video", "href": "https://www.udemy.com/course/x/learn/quiz/123"}, "quiz"),
+    ({"title": "12. Practice Test 2: Final"}, "quiz"),
+    ({"title": "Coding Exercise 3: Loops"}, "exercise"),
+    ({"title": "Quiz night recap"}, "unknown"),
+])
+def test_classify_item(item, item_type):
+    assert classify_item(item)["type"] == item_type
+
+
+def test_lecture_page_uses_the_current_item_and_falls_back_to_the_page():
+    items = [{"icon": "#icon-video", "meta": "10min"},
+             {"icon": "#icon-quiz", "current": True},
+             {"icon": "#icon-video", "meta": "1:00"}]
+    page = lecture_page(items, {"video": True}, "")
+    assert page["type"] == "quiz" and page["type"] in SKIPPED_TYPES
+    assert page["current"]["type"] == "quiz"
+
+    page = lecture_page([{"icon": "", "current": True, "meta": "3min"}], {"article": True}, "First line\n\n Second ")
+    assert page["type"] == "article" and page["duration"] == 180
+    assert page["article_lines"] == ["First line", "Second"]
+
+    counts, video_seconds = summarize_curriculum(lecture_page(items, {}, "")["items"])
+    assert counts == {"video": 2, "quiz": 1} and video_seconds == 660
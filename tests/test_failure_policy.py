@@ -0,0 +1,73 @@
+import glob
+import json
+import time
+import pytest
+from failure_policy import DeadLetterQueue, FailurePolicy, load_config
+
+
+def test_default_policy_retries_then_skips_and_aborts_on_login():
+    policy = FailurePolicy()
+    assert [policy.decide("lecture_error", attempt) for attempt in (1, 2, 3)] == ["retry", "retry", "skip"]
+    assert policy.decide("login", 1) == "abort"
+    assert policy.decide("unknown", 1) == "skip"
+
+
+def test_policy_from_spec_and_backoff_bounds():
+    policy = FailurePolicy.from_spec("retry", 1, {"login": "skip"}, backoff=2, backoff_max=5)
+    assert policy.decide("navigation", 1) == "retry"
+    assert policy.decide("navigation", 2) == "skip"
+    assert policy.decide("login", 1) == "skip"
+    assert 1.6 <= policy.delay("navigation", 1) <= 2.4
+    assert policy.delay("navigation", 10) <= 6
+    with pytest.raises(ValueError):
+        FailurePolicy({"nonsense": "skip"})
+    with pytest.raises(ValueError):
+        FailurePolicy({"login": "explode"})
+
+
+def test_load_config_accepts_dashed_keys(tmp_path):
+    path = tmp_path / "run.json"
+    path.write_text(json.dumps({"max-videos": 3, "on_failure": "skip"}))
+    assert load_config(str(path)) == {"max_videos": 3, "on_failure": "skip"}
+
+
+def test_reading_the_dead_letter_file_does_not_consume_it(tmp_path):
+    queue = DeadLetterQueue(str(tmp_path / "dead_letter.jsonl"))
+    assert queue.urls() == []
+    queue.add("https://u/learn/lecture/1", "lecture_error", "boom")
+    queue.add("https://u/learn/lecture/2", "no_transcript", "empty")
+    queue.add("https://u/learn/lecture/1", "lecture_timeout", "slow")
+
+    assert queue.urls() == ["https://u/learn/lecture/1", "https://u/learn/lecture/2"]
+    # A retry run that never got to log in leaves every entry queued
+    assert queue.urls() == ["https://u/learn/lecture/1", "https://u/learn/lecture/2"]
+    assert len(queue.entries()) == 3
+
+
+def test_removing_taken_lectures_keeps_the_rest_and_a_backup(tmp_path):
+    path = str(tmp_path / "dead_letter.jsonl")
+    queue = DeadLetterQueue(path)
+    for lecture in (1, 2, 3):
+        queue.add(f"https://u/learn/lecture/{lecture}", "lecture_error", "boom")
+
+    queue.remove(["https://u/learn/lecture/1", "https://u/learn/lecture/3"])
+    assert queue.urls() == ["https://u/learn/lecture/2"]
+    backups = glob.glob(f"{path}.*.bak")
+    assert len(backups) == 1
+    assert len(DeadLetterQueue(backups[0]).entries()) == 3
+
+    # Lectures failing again during the retry go back into the live file
+    queue.add("https://u/learn/lecture/1", "lecture_error", "again")
+    assert queue.urls() == ["https://u/learn/lecture/2", "https://u/learn/lecture/1"]
+    queue.remove(["https://u/learn/lecture/9"])
+    assert len(glob.glob(f"{path}.*.bak")) == 1
+    # Courses retried right after each other each leave their own backup
+    time.sleep(0.01)
+    queue.remove(["https://u/learn/lecture/2"])
+    assert len(glob.glob(f"{path}.*.bak")) == 2
+
+
+def test_unparsable_lines_are_skipped(tmp_path):
+    path = tmp_path / "dead_letter.jsonl"
+    path.write_text('{"url": "https://u/learn/lecture/1"}\nnot json\n')
+    assert DeadLetterQueue(str(path)).urls() == ["https://u/learn/lecture/1"]
@@ -0,0 +1,101 @@
+import json
+import time
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+import pytest
+
+# job_api runs the browser pipeline, which needs selenium to import
+pytest.importorskip("selenium")
+import job_api  # noqa: E402
+from job_api import JobApiHandler, is_loopback, serve  # noqa: E402
+from job_manager import JobManager  # noqa: E402
+from job_registry import JobRegistry  # noqa: E402
+
+
+def runner(job):
+    zip_file = tempfile.SpooledTemporaryFile()
+    zip_file.write(b"PK-notes")
+    job.put(("status", "extracting"))
+    job.put(("success", {"course_title": "Course", "transcripts": [{"title": "Intro"}], "zip_file": zip_file}))
+    job.put(("done", None))
+    # The worker saves the artifact only after the runner returns
+    time.sleep(0.2)
+
+
+@pytest.fixture
+def api(tmp_path):
+    registry = JobRegistry(str(tmp_path))
+    manager = JobManager(runner, max_workers=1, registry=registry)
+    handler = type("TestJobApiHandler", (JobApiHandler,), {"manager": manager, "registry": registry})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def call(url, method="GET", body=None, headers=None):
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    request = urllib.request.Request(url, data=data, method=method, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+
+
+def read_events(url):
+    """(event, data) pairs of an SSE stream, until the server closes it."""
+    events = []
+    with urllib.request.urlopen(url, timeout=10) as response:
+        event = None
+        for line in response:
+            line = line.decode("utf-8").rstrip("\n")
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                events.append((event, json.loads(line[len("data: "):])))
+    return events
+
+
+def test_artifact_is_downloadable_as_soon_as_the_stream_ends(api):
+    status, body = call(f"{api}/jobs", "POST", {"course_url": "https://www.udemy.com/course/x/",
+                                                "ibm_email": "ada@ibm.com", "ibm_password": "pw"})
+    assert status == 202
+    job = json.loads(body)
+
+    events = read_events(f"{api}{job['events']}")
+    assert [event for event, _ in events][-2:] == ["success", "done"]
+    artifact = dict(events)["success"]["artifact"]
+    # No 409: the stream only ends once the artifact is on disk
+    assert call(f"{api}{artifact}") == (200, b"PK-notes")
+    assert json.loads(call(f"{api}/jobs/{job['id']}")[1])["status"] == "succeeded"
+
+
+def test_same_course_is_only_shared_with_the_same_credentials(api):
+    request = {"course_url": "https://www.udemy.com/course/x/", "ibm_email": "ada@ibm.com", "ibm_password": "pw"}
+    first = json.loads(call(f"{api}/jobs", "POST", request)[1])
+    read_events(f"{api}{first['events']}")
+    again = json.loads(call(f"{api}/jobs", "POST", request)[1])
+    intruder = json.loads(call(f"{api}/jobs", "POST", dict(request, ibm_password="guess"))[1])
+    assert again["id"] == first["id"]
+    assert intruder["id"] != first["id"]
+
+
+def test_bearer_token_is_required_when_set(api, monkeypatch):
+    monkeypatch.setattr(job_api, "API_TOKEN", "s3cret")
+    assert call(f"{api}/health")[0] == 401
+    assert call(f"{api}/health", headers={"Authorization": "Bearer wrong"})[0] == 401
+    assert call(f"{api}/health", headers={"Authorization": "Bearer s3cret"})[0] == 200
+
+
+def test_refuses_to_listen_beyond_loopback_without_a_token(monkeypatch):
+    monkeypatch.setattr(job_api, "API_TOKEN", None)
+    assert is_loopback("127.0.0.1") and is_loopback("::1") and is_loopback("localhost")
+    assert not is_loopback("0.0.0.0")
+    with pytest.raises(ValueError):
+        serve("0.0.0.0", 0)
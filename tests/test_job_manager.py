@@ -0,0 +1,157 @@
+import os
+import time
+import tempfile
+import threading
+import pytest
+from job_manager import JobManager, JobEvents, JobRejected
+from job_registry import JobRegistry
+
+
+def zip_result(data=b"PK-archive"):
+    zip_file = tempfile.SpooledTemporaryFile()
+    zip_file.write(data)
+    zip_file.seek(0)
+    return {"course_title": "Course", "transcripts": [{"title": "Intro"}], "zip_file": zip_file}
+
+
+def follow(job, timeout=5):
+    """Read a job's events until "done", recording the job's status when each event was seen."""
+    seen = []
+    cursor = 0
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job.events.wait(cursor, 0.5)
+        events, cursor = job.events.read(cursor)
+        for message in events:
+            seen.append((message[0], job.status))
+            if message[0] == "done":
+                return seen
+    raise AssertionError(f"job never finished, saw {seen}")
+
+
+def test_job_events_cursor_and_bounded_window():
+    events = JobEvents(max_events=3)
+    for i in range(5):
+        events.put(("status", i))
+    # A subscriber that fell behind skips to the oldest retained event
+    messages, cursor = events.read(0)
+    assert [content for _, content in messages] == [2, 3, 4]
+    assert cursor == 5
+    assert events.read(cursor) == ([], 5)
+    assert not events.wait(cursor, timeout=0.05)
+
+
+def test_outcome_is_published_after_the_artifact_is_saved(tmp_path):
+    registry = JobRegistry(str(tmp_path))
+
+    def runner(job):
+        job.put(("status", "working"))
+        job.put(("success", zip_result()))
+        # The pipeline signals the end itself, well before the worker has saved anything
+        job.put(("done", None))
+        time.sleep(0.2)
+
+    manager = JobManager(runner, max_workers=1, registry=registry)
+    job = manager.submit({"course_url": "https://www.udemy.com/course/x/"}, key="k")
+    seen = follow(job)
+    artifact_on_disk = os.path.exists(os.path.join(str(tmp_path), job.id, "artifact.zip"))
+
+    assert [event for event, _ in seen][-2:] == ["success", "done"]
+    # Anyone following the stream to "success"/"done" can download the artifact right away
+    assert dict(seen)["success"] == "succeeded"
+    assert dict(seen)["done"] == "succeeded"
+    assert artifact_on_disk
+    assert [event for event, _ in seen].count("done") == 1
+    assert registry.load_job(job.id)[0]["status"] == "succeeded"
+
+
+def test_failed_runner_gets_error_then_a_single_done():
+    def runner(job):
+        job.put(("success", zip_result()))
+        raise RuntimeError("browser crashed")
+
+    manager = JobManager(runner, max_workers=1)
+    job = manager.submit({"course_url": "u"})
+    seen = follow(job)
+    events = [event for event, _ in seen]
+    # A failed job never advertises its partial result
+    assert "success" not in events
+    assert events[-2:] == ["error", "done"]
+    assert job.status == "failed"
+    assert job.secrets == {}
+
+
+def test_identical_requests_join_the_running_job():
+    release = threading.Event()
+    calls = []
+
+    def runner(job):
+        calls.append(job.id)
+        release.wait(5)
+        job.put(("success", zip_result()))
+
+    manager = JobManager(runner, max_workers=2)
+    first = manager.submit({"course_url": "u"}, key="k")
+    second = manager.submit({"course_url": "u"}, key="k")
+    other = manager.submit({"course_url": "u"}, key="other")
+    assert second is first and other is not first
+    assert first.subscribers == 2
+    release.set()
+    follow(first)
+    follow(other)
+    assert len(calls) == 2
+
+
+def test_queue_limit_rejects_and_cancelling_a_queued_job():
+    release = threading.Event()
+    manager = JobManager(lambda job: release.wait(5), max_workers=1, max_queued=1)
+    running = manager.submit({"n": 1})
+    time.sleep(0.1)
+    queued = manager.submit({"n": 2})
+    with pytest.raises(JobRejected):
+        manager.submit({"n": 3})
+    assert manager.queue_position(queued) == 1
+    assert manager.cancel(queued.id)
+    assert queued.status == "failed"
+    assert [event for event, _ in follow(queued)][-2:] == ["error", "done"]
+    release.set()
+    follow(running)
+
+
+def test_finished_result_is_reused_and_loaded_outside_the_lock(tmp_path):
+    registry = JobRegistry(str(tmp_path))
+    first_manager = JobManager(lambda job: job.put(("success", zip_result(b"cached"))), registry=registry)
+    finished = first_manager.submit({"course_url": "u"}, key="k")
+    follow(finished)
+
+    # A slow artifact load in one submit must not block polls and other submits
+    loading = threading.Event()
+    release = threading.Event()
+    load_job = registry.load_job
+
+    def slow_load_job(job_id):
+        loading.set()
+        release.wait(5)
+        return load_job(job_id)
+
+    registry.load_job = slow_load_job
+    manager = JobManager(lambda job: None, registry=registry)
+    restored = {}
+
+    def submit():
+        restored["job"] = manager.submit({"course_url": "u"}, key="k")
+
+    submitter = threading.Thread(target=submit)
+    submitter.start()
+    assert loading.wait(5)
+    poll = threading.Thread(target=manager.stats)
+    poll.start()
+    poll.join(1)
+    assert not poll.is_alive()
+    release.set()
+    submitter.join(5)
+
+    job = restored["job"]
+    assert job.id == finished.id and job.status == "succeeded"
+    assert job.result["zip_file"].read() == b"cached"
+    assert manager.get(finished.id) is job
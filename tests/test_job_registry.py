@@ -0,0 +1,68 @@
+import io
+import multiprocessing
+from job_registry import JobRegistry, make_job_key, normalize_course_url
+from session_store import credential_id
+
+
+class FakeJob:
+    def __init__(self, job_id, key, status="queued", result=None):
+        self.id = job_id
+        self.key = key
+        self.params = {"course_url": "https://www.udemy.com/course/x/"}
+        self.status = status
+        self.error = None
+        self.result = result
+        self.created_at = self.started_at = self.finished_at = None
+
+
+def save_many(root, worker, count):
+    registry = JobRegistry(root)
+    for i in range(count):
+        registry.save_job(FakeJob(f"{worker}-{i}", f"key-{worker}-{i}"))
+
+
+def test_equivalent_course_urls_share_a_key():
+    assert normalize_course_url(" HTTPS://WWW.Udemy.com/course/x/?couponCode=A#intro ") == \
+        "https://www.udemy.com/course/x"
+    account = credential_id("ada@ibm.com", "pw")
+    assert make_job_key("https://www.udemy.com/course/x/", account, max_videos=0, summarize=True) == \
+        make_job_key("https://www.udemy.com/course/x?ref=1", account, summarize=True, max_videos=0)
+
+
+def test_jobs_are_only_shared_with_the_same_credentials():
+    url = "https://www.udemy.com/course/x/"
+    key = make_job_key(url, credential_id("ada@ibm.com", "pw"), max_videos=0)
+    assert key == make_job_key(url, credential_id("ADA@ibm.com", "pw"), max_videos=0)
+    assert key != make_job_key(url, credential_id("ada@ibm.com", "wrong"), max_videos=0)
+    assert key != make_job_key(url, credential_id("bob@ibm.com", "pw"), max_videos=0)
+    assert key != make_job_key(url, credential_id("ada@ibm.com", "pw"), max_videos=5)
+
+
+def test_latest_job_per_key_and_result_round_trip(tmp_path):
+    registry = JobRegistry(str(tmp_path))
+    registry.save_job(FakeJob("a1", "k"))
+    finished = FakeJob("b2", "k", status="succeeded",
+                       result={"course_title": "Course", "transcripts": [], "zip_file": io.BytesIO(b"zip")})
+    registry.save_result(finished)
+    registry.save_job(finished)
+
+    assert registry.latest_id_for_key("k") == "b2"
+    record, result = registry.latest_for_key("k")
+    assert record["status"] == "succeeded"
+    assert result["course_title"] == "Course" and result["zip_file"].read() == b"zip"
+    # Unfinished jobs never come back with a result; unknown ids and path tricks find nothing
+    assert registry.load_job("a1")[1] is None
+    assert registry.load_job("../../etc") == (None, None)
+    assert registry.latest_for_key("missing") == (None, None)
+
+
+def test_processes_sharing_a_registry_never_lose_index_entries(tmp_path):
+    root = str(tmp_path)
+    workers = [multiprocessing.Process(target=save_many, args=(root, worker, 50)) for worker in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+    registry = JobRegistry(root)
+    assert all(registry.latest_id_for_key(f"key-{worker}-{i}") == f"{worker}-{i}"
+               for worker in range(4) for i in range(50))
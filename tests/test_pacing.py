@@ -0,0 +1,68 @@
+import time
+import threading
+import pytest
+from cancellation import CancellationToken, JobCancelled
+from pacing import Pacer, classify_page, PACING_SUCCESSES_PER_SLOT
+
+
+def test_classify_page():
+    assert classify_page({"title": "Just a moment..."}) == "challenge"
+    assert classify_page({"url": "https://www.udemy.com/cdn-cgi/challenge-platform/x"}) == "challenge"
+    assert classify_page({"status": 429, "title": "Lecture"}) == "throttled"
+    assert classify_page({"title": "Access denied"}) == "throttled"
+    assert classify_page({"title": "Intro | Udemy", "status": 200}) == "ok"
+    assert classify_page({}) == "ok"
+
+
+def test_back_pressure_is_multiplicative_and_recovery_additive():
+    pacer = Pacer(min_delay=0.5, max_delay=8, initial_delay=1, step=0.25, max_concurrency=4)
+    pacer.observe("throttled")
+    assert (pacer.delay, pacer.concurrency) == (2, 2)
+    pacer.observe("challenge")
+    assert (pacer.delay, pacer.concurrency) == (4, 1)
+    for _ in range(3):
+        pacer.observe("challenge")
+    assert pacer.delay == 8 and pacer.concurrency == 1
+
+    pacer.observe("ok", latency=1.0)
+    assert pacer.delay == 7.75
+    for _ in range(PACING_SUCCESSES_PER_SLOT):
+        pacer.observe("ok", latency=1.0)
+    assert pacer.concurrency == 2
+    for _ in range(200):
+        pacer.observe("ok", latency=1.0)
+    assert pacer.delay == 0.5 and pacer.concurrency == 4
+
+
+def test_slow_navigations_hold_the_pace():
+    pacer = Pacer(min_delay=0.5, initial_delay=2, step=0.25)
+    pacer.observe("ok", latency=1.0)
+    delay = pacer.delay
+    pacer.observe("ok", latency=20.0)
+    assert pacer.delay == delay
+    assert pacer.stats()["slow"] == 1
+
+
+def test_a_high_error_rate_backs_off():
+    pacer = Pacer(initial_delay=1, min_delay=0.5, max_concurrency=4)
+    for _ in range(3):
+        pacer.observe("ok")
+    pacer.observe("error")
+    assert pacer.concurrency == 4
+    pacer.observe("error")
+    assert pacer.concurrency == 2 and pacer.stats()["error"] == 2
+
+
+def test_slots_limit_concurrency_and_stay_cancellable():
+    pacer = Pacer(max_concurrency=1)
+    with pacer.slot():
+        token = CancellationToken()
+        threading.Timer(0.1, token.cancel).start()
+        start = time.monotonic()
+        with pytest.raises(JobCancelled):
+            with pacer.slot(token):
+                pass
+        assert time.monotonic() - start < 2.5
+    with pacer.slot():
+        assert pacer._active == 1
+    assert pacer._active == 0
@@ -0,0 +1,100 @@
+import os
+import time
+import stat
+import pytest
+from session_store import SessionStore, credential_id, ensure_logged_in, session_expiry
+
+pytest.importorskip("cryptography")
+
+
+def state(expiry=None):
+    cookie = {"name": "access_token", "value": "secret", "domain": ".udemy.com", "path": "/"}
+    if expiry:
+        cookie["expiry"] = expiry
+    return {"cookies": [cookie], "local_storage": {}, "origin": "https://www.udemy.com"}
+
+
+class FakeDriver:
+    """Stands in for a Selenium driver: a page is logged in once cookies were injected."""
+
+    def __init__(self):
+        self.current_url = "https://www.udemy.com/"
+        self.cookies = []
+
+    def get(self, url):
+        self.current_url = url
+
+    def add_cookie(self, cookie):
+        self.cookies.append(cookie)
+
+    def get_cookies(self):
+        return [dict(cookie) for cookie in self.cookies] or state()["cookies"]
+
+    def execute_script(self, script, *args):
+        return {}
+
+
+def test_credential_id_depends_on_the_password_not_the_email_case():
+    assert credential_id("Ada@IBM.com ", "pw") == credential_id("ada@ibm.com", "pw")
+    assert credential_id("ada@ibm.com", "pw") != credential_id("ada@ibm.com", "other")
+    assert credential_id("ada@ibm.com", "pw") != credential_id("bob@ibm.com", "pw")
+    assert "ada" not in credential_id("ada@ibm.com", "pw")
+
+
+def test_sessions_are_encrypted_and_private(tmp_path):
+    store = SessionStore(root=str(tmp_path))
+    account = credential_id("ada@ibm.com", "pw")
+    assert store.save(account, state())
+    path = store._path(account)
+    with open(path, "rb") as f:
+        assert b"secret" not in f.read()
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+    assert store.load(account)["cookies"][0]["value"] == "secret"
+    # Another store with the same key file reads it; one with another key cannot
+    assert SessionStore(root=str(tmp_path)).load(account) is not None
+    from cryptography.fernet import Fernet
+    assert SessionStore(root=str(tmp_path), key=Fernet.generate_key()).load(account) is None
+
+
+def test_expired_sessions_are_dropped(tmp_path):
+    store = SessionStore(root=str(tmp_path))
+    assert session_expiry(state(expiry=123)) == 123
+    # Auth cookies about to expire make the saved session useless
+    store.save("acct", state(expiry=int(time.time()) + 30))
+    assert store.load("acct") is None
+    assert not os.path.exists(store._path("acct"))
+
+    store = SessionStore(root=str(tmp_path), max_age=0)
+    store.save("acct", state())
+    time.sleep(1.1)
+    assert store.load("acct") is None
+
+
+def test_wrong_password_never_reuses_a_saved_login(tmp_path, monkeypatch):
+    monkeypatch.setattr("session_store.probe_logged_in", lambda driver, url: bool(driver.cookies))
+    store = SessionStore(root=str(tmp_path))
+    logins = []
+
+    def login(result):
+        def run():
+            logins.append(result)
+            return result
+        return run
+
+    owner = credential_id("ada@ibm.com", "right")
+    assert ensure_logged_in(FakeDriver(), "https://www.udemy.com/course/x/", login(True), store, owner,
+                            status=lambda message: None)
+    assert logins == [True]
+
+    # Same email, wrong password: the saved session is not found and the real login runs (and fails)
+    intruder = credential_id("ada@ibm.com", "wrong")
+    assert not ensure_logged_in(FakeDriver(), "https://www.udemy.com/course/x/", login(False), store, intruder,
+                                status=lambda message: None)
+    assert logins == [True, False]
+
+    # The owner reuses the saved session without logging in again
+    driver = FakeDriver()
+    assert ensure_logged_in(driver, "https://www.udemy.com/course/x/", login(True), store, owner,
+                            status=lambda message: None)
+    assert logins == [True, False]
+    assert driver.cookies[0]["value"] == "secret"
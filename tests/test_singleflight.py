@@ -0,0 +1,122 @@
+import time
+import threading
+import pytest
+from cancellation import CancellationToken, JobCancelled
+from singleflight import SingleFlight, request_key
+
+
+def run_concurrently(flight, fn, callers, key="k"):
+    """Call flight.do(key, fn) from several threads, started just after each other."""
+    results = []
+    lock = threading.Lock()
+
+    def call():
+        outcome = flight.do(key, fn)
+        with lock:
+            results.append(outcome)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join(5)
+    return results
+
+
+def slow_calls(outcomes, delay=0.2):
+    """fn returning outcomes[i] on its i-th call, and the list of calls made."""
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(delay)
+        return outcomes[min(len(calls), len(outcomes)) - 1]
+
+    return fn, calls
+
+
+def test_request_key_is_stable_and_order_independent():
+    assert request_key("a", {"x": 1, "y": 2}) == request_key("a", {"y": 2, "x": 1})
+    assert request_key("a", {"x": 1}) != request_key("a", {"x": 2})
+
+
+def test_concurrent_identical_calls_share_one_call():
+    flight = SingleFlight()
+    fn, calls = slow_calls(["notes"])
+    results = run_concurrently(flight, fn, 5)
+    assert len(calls) == 1
+    assert sorted(results) == [("notes", False)] + [("notes", True)] * 4
+    assert flight.stats() == {"calls": 1, "coalesced": 4}
+    assert flight.in_flight() == 0
+
+
+def test_failed_leader_is_retried_once_for_all_waiters():
+    flight = SingleFlight()
+    fn, calls = slow_calls([None, "notes"])
+    results = run_concurrently(flight, fn, 6)
+    assert len(calls) == 2
+    assert results.count(("notes", True)) == 4
+    assert ("notes", False) in results and (None, False) in results
+
+
+def test_failed_retry_is_shared_instead_of_retried_by_every_waiter():
+    flight = SingleFlight()
+    fn, calls = slow_calls([None])
+    results = run_concurrently(flight, fn, 6)
+    assert len(calls) == 2
+    assert len(results) == 6 and all(result is None for result, _ in results)
+
+
+def test_cancelled_leader_does_not_fail_its_waiters():
+    flight = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.2)
+        if len(calls) == 1:
+            raise JobCancelled("leader's job was stopped")
+        return "notes"
+
+    outcomes = []
+
+    def leader():
+        try:
+            flight.do("k", fn)
+        except JobCancelled:
+            outcomes.append("cancelled")
+
+    threads = [threading.Thread(target=leader)]
+    threads += [threading.Thread(target=lambda: outcomes.append(flight.do("k", fn))) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.02)
+    for thread in threads:
+        thread.join(5)
+    assert len(calls) == 2
+    assert sorted(map(str, outcomes)) == sorted(["cancelled", "('notes', False)", "('notes', True)",
+                                                 "('notes', True)"])
+
+
+def test_waiter_can_be_cancelled_while_waiting():
+    flight = SingleFlight()
+    release = threading.Event()
+    leader = threading.Thread(target=lambda: flight.do("k", lambda: release.wait(5) and "notes"))
+    leader.start()
+    time.sleep(0.05)
+    token = CancellationToken()
+    threading.Timer(0.1, token.cancel).start()
+    start = time.monotonic()
+    with pytest.raises(JobCancelled):
+        flight.do("k", lambda: "own call", token)
+    assert time.monotonic() - start < 2
+    release.set()
+    leader.join(5)
+
+
+def test_different_keys_do_not_share():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    assert flight.stats()["calls"] == 2
@@ -0,0 +1,22 @@
+from transcript_collector import transcript_completeness, MIN_WORDS_PER_MINUTE
+
+
+def words(count):
+    return [" ".join(["word"] * 10)] * (count // 10)
+
+
+def test_short_or_unknown_lectures_are_not_judged():
+    assert transcript_completeness(["hi"], None) == (True, "")
+    assert transcript_completeness(["hi"], 60) == (True, "")
+
+
+def test_too_few_words_for_the_duration_is_truncated():
+    minutes = 10
+    complete, reason = transcript_completeness(words(int(minutes * MIN_WORDS_PER_MINUTE / 2)), minutes * 60)
+    assert not complete and "10 min" in reason
+    assert transcript_completeness(words(int(minutes * MIN_WORDS_PER_MINUTE) + 10), minutes * 60) == (True, "")
+
+
+def test_a_timed_out_collection_is_never_complete():
+    complete, reason = transcript_completeness(words(5000), 600, timed_out=True)
+    assert not complete and "timed out" in reason
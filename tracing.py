@@ -0,0 +1,183 @@
+import os
+import json
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Phases instrumented across the CLI and the Streamlit pipeline, in pipeline order
+PHASES = (
+    "browser_start",
+    "login",
+    "first_lecture_navigation",
+    "transcript_panel_open",
+    "cue_extraction",
+    "next_lecture_navigation",
+    "transcript_panel_probe",
+    "llm_request",
+    "file_write",
+)
+# Interface the Prometheus endpoint binds to; loopback unless a scraper elsewhere needs it
+METRICS_HOST = os.environ.get("UDEMY_METRICS_HOST", "127.0.0.1")
+
+
+class Tracer:
+    """Records timed spans per pipeline phase and aggregates them into metrics.
+
+    A job-level tracer can forward its aggregates to a process-wide ``parent``
+    tracer, which is what the Prometheus endpoint exposes.
+    """
+
+    def __init__(self, parent=None, max_spans=20000):
+        self.parent = parent
+        self.lecture_id = None  # attached to every span started while it is set
+        self._spans = deque(maxlen=max_spans)
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    @contextmanager
+    def span(self, name, lecture_id=None, **attrs):
+        """Time the enclosed block as one span of phase ``name``."""
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.record(name, start, time.perf_counter() - start, status,
+                        lecture_id if lecture_id is not None else self.lecture_id, attrs)
+
+    def record(self, name, start, duration, status="ok", lecture_id=None, attrs=None):
+        """Add a finished span (used directly when start/stop are not lexically scoped)."""
+        span = {
+            "name": name,
+            "start": start - self._origin,
+            "duration": duration,
+            "status": status,
+            "lecture_id": lecture_id,
+            "thread": threading.current_thread().name
+        }
+        if attrs:
+            span["attrs"] = attrs
+        with self._lock:
+            self._spans.append(span)
+            self._aggregate(name, duration, status)
+        if self.parent is not None:
+            self.parent._add_to_stats(name, duration, status)
+
+    def _aggregate(self, name, duration, status):
+        stats = self._stats.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0, "errors": 0})
+        stats["count"] += 1
+        stats["sum"] += duration
+        stats["max"] = max(stats["max"], duration)
+        if status != "ok":
+            stats["errors"] += 1
+
+    def _add_to_stats(self, name, duration, status):
+        with self._lock:
+            self._aggregate(name, duration, status)
+
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def breakdown(self):
+        """Per-phase totals, ordered by pipeline phase, with each phase's share of traced time."""
+        with self._lock:
+            stats = {name: dict(values) for name, values in self._stats.items()}
+        total = sum(values["sum"] for values in stats.values()) or 1.0
+        ordered = [name for name in PHASES if name in stats] + sorted(n for n in stats if n not in PHASES)
+        rows = []
+        for name in ordered:
+            values = stats[name]
+            rows.append({
+                "phase": name,
+                "count": values["count"],
+                "total_s": round(values["sum"], 3),
+                "mean_s": round(values["sum"] / values["count"], 3),
+                "max_s": round(values["max"], 3),
+                "errors": values["errors"],
+                "share_pct": round(100.0 * values["sum"] / total, 1)
+            })
+        return rows
+
+    def format_breakdown(self):
+        """Plain-text breakdown table for CLI output."""
+        lines = [f"{'phase':<26}{'count':>7}{'total s':>11}{'mean s':>10}{'max s':>10}{'share':>8}"]
+        for row in self.breakdown():
+            lines.append(f"{row['phase']:<26}{row['count']:>7}{row['total_s']:>11.2f}{row['mean_s']:>10.2f}"
+                         f"{row['max_s']:>10.2f}{row['share_pct']:>7.1f}%")
+        return "\n".join(lines)
+
+    def export_json(self, path):
+        """Write spans in Chrome trace-event format (opens in chrome://tracing or Perfetto)."""
+        events = []
+        for span in self.spans():
+            args = {"lecture_id": span["lecture_id"], "status": span["status"]}
+            args.update(span.get("attrs", {}))
+            events.append({
+                "name": span["name"],
+                "ph": "X",
+                "ts": int(span["start"] * 1e6),
+                "dur": int(span["duration"] * 1e6),
+                "pid": os.getpid(),
+                "tid": span["thread"],
+                "args": args
+            })
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "breakdown": self.breakdown()}, f, indent=1)
+        return path
+
+    def prometheus_text(self):
+        """Aggregated metrics in the Prometheus text exposition format."""
+        with self._lock:
+            stats = {name: dict(values) for name, values in self._stats.items()}
+        lines = [
+            "# HELP udemy_phase_duration_seconds Time spent per pipeline phase.",
+            "# TYPE udemy_phase_duration_seconds summary"
+        ]
+        for name, values in sorted(stats.items()):
+            lines.append(f'udemy_phase_duration_seconds_count{{phase="{name}"}} {values["count"]}')
+            lines.append(f'udemy_phase_duration_seconds_sum{{phase="{name}"}} {values["sum"]:.6f}')
+        lines.append("# HELP udemy_phase_duration_seconds_max Longest single span per phase.")
+        lines.append("# TYPE udemy_phase_duration_seconds_max gauge")
+        for name, values in sorted(stats.items()):
+            lines.append(f'udemy_phase_duration_seconds_max{{phase="{name}"}} {values["max"]:.6f}')
+        lines.append("# HELP udemy_phase_errors_total Spans that ended with an exception.")
+        lines.append("# TYPE udemy_phase_errors_total counter")
+        for name, values in sorted(stats.items()):
+            lines.append(f'udemy_phase_errors_total{{phase="{name}"}} {values["errors"]}')
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide tracer aggregating every job, exposed on the metrics endpoint
+process_tracer = Tracer()
+
+
+def start_metrics_server(tracer=process_tracer, port=9108, host=METRICS_HOST):
+    """Serve ``tracer.prometheus_text()`` on http://host:port/metrics from a daemon thread."""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = tracer.prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    print(f"Prometheus metrics available at http://{host}:{port}/metrics")
+    return server
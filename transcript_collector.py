@@ -0,0 +1,106 @@
+import os
+from browser_driver import as_browser_driver, TRANSCRIPT_PANEL_SELECTORS, CUE_SELECTORS
+
+# Longest the in-page collector may scroll; must stay under the driver's script timeout (Selenium: 30s)
+COLLECT_TIMEOUT = float(os.environ.get("UDEMY_COLLECT_TIMEOUT", 20))
+# Quiet time after a scroll step before the collector decides no more cues are coming
+COLLECT_SETTLE_MS = int(os.environ.get("UDEMY_COLLECT_SETTLE_MS", 250))
+# Even slow speakers say more than this many words a minute; fewer means cues are missing.
+# Shorter lectures are often mostly music or a demo, so they are not checked.
+MIN_WORDS_PER_MINUTE = float(os.environ.get("UDEMY_MIN_WORDS_PER_MINUTE", 40))
+MIN_CHECKED_DURATION = 120
+
+# Scrolls the transcript panel top to bottom while a MutationObserver picks up every cue the
+# (possibly virtualized) list renders. Cues are keyed by their index/time attribute, or else by
+# their offset inside the scrolled content, which stays fixed when rows are recycled.
+COLLECT_SCRIPT = """
+const [panelSelectors, cueSelectors, timeoutMs, settleMs] = arg;
+return new Promise(resolve => {
+    let panel = null;
+    for (const selector of panelSelectors) {
+        panel = document.querySelector(selector);
+        if (panel) break;
+    }
+    if (!panel) { resolve({found: false, cues: [], timed_out: false, steps: 0}); return; }
+    const scrollable = el => el.scrollHeight > el.clientHeight + 4
+        && /(auto|scroll)/.test(getComputedStyle(el).overflowY);
+    let scroller = panel;
+    while (scroller && !scrollable(scroller)) scroller = scroller.parentElement;
+    if (!scroller || scroller === document.body || scroller === document.documentElement) {
+        scroller = Array.from(panel.querySelectorAll('*')).find(scrollable) || panel;
+    }
+    const cueSelector = cueSelectors.find(s => scroller.querySelector(s)) || cueSelectors[0];
+    const seen = new Map();
+    const keyOf = el => {
+        const row = el.closest('[data-index], [data-cue-index], [data-time], [data-start]') || el;
+        for (const name of ['data-index', 'data-cue-index', 'data-time', 'data-start']) {
+            const value = row.getAttribute(name);
+            if (value !== null && value !== '' && !isNaN(value)) return Number(value);
+        }
+        return Math.round(el.getBoundingClientRect().top - scroller.getBoundingClientRect().top + scroller.scrollTop);
+    };
+    let lastChange = Date.now();
+    const collect = () => {
+        for (const el of scroller.querySelectorAll(cueSelector)) {
+            const text = el.innerText.trim();
+            if (!text) continue;
+            const key = keyOf(el);
+            if (!seen.has(key)) { seen.set(key, text); lastChange = Date.now(); }
+        }
+    };
+    const observer = new MutationObserver(collect);
+    observer.observe(scroller, {childList: true, subtree: true, characterData: true});
+    const start = Date.now();
+    const originalTop = scroller.scrollTop;
+    let steps = 0;
+    const finish = timedOut => {
+        observer.disconnect();
+        collect();
+        scroller.scrollTop = originalTop;
+        const cues = Array.from(seen.entries()).sort((a, b) => a[0] - b[0]).map(entry => entry[1]);
+        resolve({found: true, cues: cues, timed_out: timedOut, steps: steps});
+    };
+    scroller.scrollTop = 0;
+    collect();
+    const step = () => {
+        collect();
+        if (Date.now() - start > timeoutMs) { finish(true); return; }
+        const atBottom = scroller.scrollTop + scroller.clientHeight >= scroller.scrollHeight - 2;
+        if (atBottom && Date.now() - lastChange >= settleMs) { finish(false); return; }
+        if (!atBottom) {
+            scroller.scrollTop += Math.max(50, scroller.clientHeight * 0.8);
+            steps += 1;
+        }
+        setTimeout(step, settleMs / 2);
+    };
+    setTimeout(step, settleMs / 2);
+});
+"""
+
+
+def collect_transcript(driver, timeout=COLLECT_TIMEOUT, settle_ms=COLLECT_SETTLE_MS):
+    """Every cue of the open transcript panel in one script call.
+
+    Returns ``{"found", "cues", "timed_out", "steps"}``; ``found`` is False when no panel is open.
+    """
+    result = as_browser_driver(driver).evaluate(
+        COLLECT_SCRIPT, [TRANSCRIPT_PANEL_SELECTORS, CUE_SELECTORS, int(timeout * 1000), settle_ms]) or {}
+    return {
+        "found": bool(result.get("found")),
+        "cues": [cue for cue in result.get("cues") or [] if cue],
+        "timed_out": bool(result.get("timed_out")),
+        "steps": result.get("steps") or 0,
+    }
+
+
+def transcript_completeness(lines, duration, timed_out=False):
+    """(complete, reason) for a transcript of a lecture lasting duration seconds (None if unknown)."""
+    if timed_out:
+        return False, "the panel was still loading cues when collection timed out"
+    if not duration or duration < MIN_CHECKED_DURATION:
+        return True, ""
+    words = sum(len(line.split()) for line in lines)
+    expected = duration / 60 * MIN_WORDS_PER_MINUTE
+    if words < expected:
+        return False, f"{words} words for a {duration / 60:.0f} min lecture (expected at least {expected:.0f})"
+    return True, ""
@@ -1,707 +1,134 @@
 import streamlit as st
 import os
-import time
-import base64
-import zipfile
-import io
-import threading
-import queue
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-# Assuming this module exists and is compatible - may need to be adapted too
-from ibm_udemy_transcript_scraper import UdemyTranscriptExtractor, validate_api_key
-
-
-def create_zip_file(files_data):
-    """Create a zip file from memory data instead of from disk"""
-    memory_file = io.BytesIO()
-    with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for file_path, file_content in files_data.items():
-            zipf.writestr(file_path, file_content)
-    memory_file.seek(0)
-    return memory_file
-
-
-def get_download_link(file_content, filename, text):
-    """Generate a download link for the file"""
-    b64 = base64.b64encode(file_content.getvalue()).decode()
-    href = f'<a href="data:application/zip;base64,{b64}" download="{filename}" class="download-button">{text}</a>'
-    return href
-
-
-def init_cloud_browser():
-    """Initialize a browser compatible with Streamlit Cloud"""
-    options = Options()
-    
-    # Required for headless browser in cloud environment
-    options.add_argument("--headless=new")  # Using newer headless mode
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--disable-extensions")
-    options.add_argument("--window-size=1920,1080")  # Larger window size for better visibility
-    
-    # Anti-detection settings
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option("useAutomationExtension", False)
-    
-    # Realistic user agent
-    options.add_argument("user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-    
-    try:
-        # First try: Use ChromeDriverManager with specific version
-        try:
-            driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-            return driver
-        except Exception as e:
-            print(f"First attempt failed: {str(e)}")
-            
-        # Second try: Use direct Chrome binary path (common in cloud environments)
-        try:
-            options.binary_location = "/usr/bin/google-chrome"  # Common path in cloud environments
-            driver = webdriver.Chrome(options=options)
-            return driver
-        except Exception as e:
-            print(f"Second attempt failed: {str(e)}")
-            
-        # Third try: Use Playwright as fallback
-        try:
-            from playwright.sync_api import sync_playwright
-            playwright = sync_playwright().start()
-            browser = playwright.chromium.launch(headless=True)
-            context = browser.new_context()
-            page = context.new_page()
-            return page
-        except Exception as e:
-            print(f"Third attempt failed: {str(e)}")
-            
-        raise Exception("All browser initialization attempts failed")
-        
-    except Exception as e:
-        print(f"Browser initialization error: {str(e)}")
-        raise Exception(f"Failed to initialize browser: {str(e)}")
-
-
-def init_visible_browser():
-    """Initialize a visible browser for debugging and manual interaction"""
-    options = Options()
-    
-    # Basic settings for visible browser
-    options.add_argument("--window-size=1920,1080")
-    options.add_argument("--disable-extensions")
-    
-    # Anti-detection settings
-    options.add_argument("--disable-blink-features=AutomationControlled")
-    options.add_experimental_option("excludeSwitches", ["enable-automation"])
-    options.add_experimental_option("useAutomationExtension", False)
-    
-    # Realistic user agent
-    options.add_argument(
-        "user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-    
-    try:
-        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=options)
-    except Exception as e:
-        st.error(f"Failed to initialize visible Chrome: {str(e)}")
-        raise Exception("Failed to initialize visible browser")
-    
-    return driver
-
-
-def handle_login(driver, course_url, udemy_email, udemy_password, status_queue):
-    """Handle the Udemy login process specifically selecting the second login option"""
-    try:
-        # Navigate to course URL first
-        driver.get(course_url)
-        status_queue.put(("status", "Navigated to course page. Looking for login elements..."))
-        time.sleep(3)
-        
-        # Look for login button or element
-        try:
-            login_btn = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, "//a[contains(@class, 'login') or contains(@data-purpose, 'header-login')]"))
-            )
-            login_btn.click()
-            status_queue.put(("status", "Clicked on login button."))
-            time.sleep(2)
-        except Exception as e:
-            status_queue.put(("status", f"Login button not found, might already be on login page: {str(e)}"))
-            
-        # Find and click on the second login option
-        try:
-            # Wait for login options to be visible
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'auth-method')]"))
-            )
-            
-            # Get all login options
-            login_options = driver.find_elements(By.XPATH, "//div[contains(@class, 'auth-method')] | //form[contains(@class, 'login-form')] | //button[contains(@class, 'auth-button')]")
-            
-            if len(login_options) > 1:
-                # Click the second option
-                login_options[1].click()
-                status_queue.put(("status", "Selected second login option."))
-            else:
-                # If we can't find auth method containers, try finding individual login buttons
-                login_buttons = driver.find_elements(By.XPATH, "//button[contains(@class, 'auth') or contains(text(), 'Log') or contains(text(), 'Sign')]")
-                if len(login_buttons) > 1:
-                    login_buttons[1].click()
-                    status_queue.put(("status", "Selected second login button."))
-                else:
-                    status_queue.put(("status", "Could not find multiple login options. Proceeding with available login form."))
-            
-            time.sleep(2)
-        except Exception as e:
-            status_queue.put(("status", f"Error selecting second login option: {str(e)}. Proceeding with available login form."))
-        
-        # Find and fill the email/username field
-        try:
-            # Try several possible field selectors
-            selectors = [
-                (By.NAME, "email"),
-                (By.ID, "email"),
-                (By.NAME, "username"),
-                (By.ID, "username"),
-                (By.ID, "user"),
-                (By.XPATH, "//input[@type='email']"),
-                (By.XPATH, "//input[@placeholder='Email' or @placeholder='Username' or @placeholder='Email or username']"),
-                (By.XPATH, "//input[contains(@class, 'email') or contains(@class, 'username')]")
-            ]
-            
-            email_field = None
-            for selector_type, selector_value in selectors:
-                try:
-                    email_field = WebDriverWait(driver, 3).until(
-                        EC.presence_of_element_located((selector_type, selector_value))
-                    )
-                    if email_field:
-                        break
-                except:
-                    continue
-            
-            if email_field:
-                email_field.clear()
-                email_field.send_keys(udemy_email)
-                status_queue.put(("status", "Entered email/username."))
-            else:
-                status_queue.put(("status", "Could not find email/username field."))
-                return False
-        except Exception as e:
-            status_queue.put(("status", f"Error entering email/username: {str(e)}"))
-            return False
-        
-        # Find and fill the password field
-        try:
-            # Try several possible field selectors for password
-            password_selectors = [
-                (By.NAME, "password"),
-                (By.ID, "password"),
-                (By.XPATH, "//input[@type='password']"),
-                (By.XPATH, "//input[@placeholder='Password']"),
-                (By.XPATH, "//input[contains(@class, 'password')]")
-            ]
-            
-            password_field = None
-            for selector_type, selector_value in password_selectors:
-                try:
-                    password_field = WebDriverWait(driver, 3).until(
-                        EC.presence_of_element_located((selector_type, selector_value))
-                    )
-                    if password_field:
-                        break
-                except:
-                    continue
-            
-            if password_field:
-                password_field.clear()
-                password_field.send_keys(udemy_password)
-                status_queue.put(("status", "Entered password."))
-            else:
-                status_queue.put(("status", "Could not find password field."))
-                return False
-        except Exception as e:
-            status_queue.put(("status", f"Error entering password: {str(e)}"))
-            return False
-        
-        # Find and click the submit button
-        try:
-            # Try several possible button selectors
-            button_selectors = [
-                (By.XPATH, "//button[@type='submit']"),
-                (By.XPATH, "//button[contains(text(), 'Log in') or contains(text(), 'Sign in') or contains(text(), 'Login')]"),
-                (By.XPATH, "//input[@type='submit']"),
-                (By.XPATH, "//button[contains(@class, 'login') or contains(@class, 'submit')]")
-            ]
-            
-            submit_button = None
-            for selector_type, selector_value in button_selectors:
-                try:
-                    submit_button = WebDriverWait(driver, 3).until(
-                        EC.element_to_be_clickable((selector_type, selector_value))
-                    )
-                    if submit_button:
-                        break
-                except:
-                    continue
-            
-            if submit_button:
-                submit_button.click()
-                status_queue.put(("status", "Clicked submit button. Waiting for login to complete..."))
-                time.sleep(8)  # Give enough time for login to complete
-            else:
-                status_queue.put(("status", "Could not find submit button."))
-                return False
-        except Exception as e:
-            status_queue.put(("status", f"Error clicking submit button: {str(e)}"))
-            return False
-        
-        # Check if login was successful by looking for user profile elements or course content
-        try:
-            # Wait for either course content or profile elements to be present
-            WebDriverWait(driver, 10).until(
-                EC.any_of(
-                    EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'course-content')]")),
-                    EC.presence_of_element_located((By.XPATH, "//a[contains(@class, 'user-profile')]")),
-                    EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'sidebar')]"))
-                )
-            )
-            status_queue.put(("status", "Login successful! Detected course elements."))
-            
-            # Navigate back to course URL to ensure we're on the right page
-            driver.get(course_url)
-            status_queue.put(("status", "Navigated back to course page after login."))
-            time.sleep(5)
-            
-            return True
-        except Exception as e:
-            status_queue.put(("status", f"Could not verify successful login: {str(e)}"))
-            return False
-            
-    except Exception as e:
-        status_queue.put(("status", f"Login process failed: {str(e)}"))
-        return False
-
-
-def navigate_to_first_lecture(driver, status_queue):
-    """Navigate to the first lecture of the course"""
-    try:
-        # Try to find and click "Start Course" or "Continue" button
-        button_selectors = [
-            (By.XPATH, "//button[contains(text(), 'Start') or contains(@data-purpose, 'start-course')]"),
-            (By.XPATH, "//a[contains(text(), 'Start') or contains(@data-purpose, 'start-course')]"),
-            (By.XPATH, "//button[contains(text(), 'Continue') or contains(@data-purpose, 'continue-course')]"),
-            (By.XPATH, "//a[contains(text(), 'Continue') or contains(@data-purpose, 'continue-course')]"),
-            (By.XPATH, "//button[contains(@class, 'start') or contains(@class, 'course-cta')]"),
-            (By.XPATH, "//a[contains(@class, 'start') or contains(@class, 'course-cta')]")
-        ]
-        
-        start_button = None
-        for selector_type, selector_value in button_selectors:
-            try:
-                start_button = WebDriverWait(driver, 3).until(
-                    EC.element_to_be_clickable((selector_type, selector_value))
-                )
-                if start_button:
-                    break
-            except:
-                continue
-        
-        if start_button:
-            start_button.click()
-            status_queue.put(("status", "Clicked on start/continue course button."))
-            time.sleep(5)
-            return True
-        
-        # If no button found, try to find and click on the first lecture directly
-        lecture_selectors = [
-            (By.XPATH, "//a[contains(@class, 'lecture') and contains(@class, 'item')]"),
-            (By.XPATH, "//div[contains(@class, 'lecture-item')]//a"),
-            (By.XPATH, "//div[contains(@class, 'curriculum-item')]//a"),
-            (By.XPATH, "//li[contains(@class, 'curriculum-item')]//a")
-        ]
-        
-        first_lecture = None
-        for selector_type, selector_value in lecture_selectors:
-            try:
-                lectures = driver.find_elements(selector_type, selector_value)
-                if lectures and len(lectures) > 0:
-                    first_lecture = lectures[0]
-                    break
-            except:
-                continue
-        
-        if first_lecture:
-            first_lecture.click()
-            status_queue.put(("status", "Clicked on first lecture directly."))
-            time.sleep(5)
-            return True
-        
-        status_queue.put(("status", "Could not find navigation elements to first lecture. May already be in lecture view."))
-        
-        # Check if we're already in a lecture view
-        try:
-            # Look for typical lecture page elements
-            WebDriverWait(driver, 5).until(
-                EC.any_of(
-                    EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'video-player')]")),
-                    EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'lecture-view')]")),
-                    EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'curriculum-navigation')]"))
-                )
-            )
-            status_queue.put(("status", "Already in lecture view."))
-            return True
-        except:
-            status_queue.put(("status", "Not in lecture view and couldn't navigate to first lecture."))
-            return False
-            
-    except Exception as e:
-        status_queue.put(("status", f"Error navigating to first lecture: {str(e)}"))
-        return False
-
-
-def modified_extract_all_transcripts(extractor, course_url, max_videos, status_queue):
-    """A modified version of extract_all_transcripts that stores data in memory rather than files"""
-    try:
-        # Store the initial URL
-        initial_url = extractor.driver.current_url
-
-        status_queue.put(("status", "Finding and enabling transcript panel..."))
-        if extractor.find_and_enable_transcript():
-            status_queue.put(("status", "Successfully opened transcript panel"))
-        else:
-            status_queue.put(("status", "Could not open transcript panel automatically. Please open it manually."))
-            time.sleep(10)
-
-        # Get course title
-        course_title = extractor.get_course_title()
-        if not course_title or course_title == f"udemy_course_{int(time.time())}":
-            status_queue.put(("status", "Couldn't detect course title automatically. Using default title."))
-            course_title = "udemy_course_" + str(int(time.time()))
-
-        status_queue.put(("status", f"Course title: {course_title}"))
-
-        video_count = 0
-        transcripts = []  # Store transcripts in memory
-
-        while max_videos == 0 or video_count < max_videos:
-            current_url = extractor.driver.current_url
-            status_queue.put(("status", f"Processing video at URL: {current_url}"))
-
-            # Get lecture information
-            lecture_info = extractor.get_detailed_lecture_info()
-            full_title = lecture_info["full_title"]
-
-            if not full_title or full_title.strip() == "":
-                status_queue.put(("status", "Failed to get a valid lecture title. Using fallback title."))
-                lecture_id = extractor.driver.current_url.split("/")[-1]
-                full_title = f"Lecture_{lecture_id}"
-
-            formatted_title = full_title
-
-            if formatted_title in extractor.processed_lectures:
-                status_queue.put(("status", f"Already processed lecture: {formatted_title}. Moving to next video..."))
-                if not extractor.navigate_to_next_video():
-                    status_queue.put(("status", "No more videos to process. Extraction complete."))
-                    break
-                time.sleep(3)
-                continue
-
-            status_queue.put(("progress", {
-                "current": video_count + 1,
-                "max": max_videos if max_videos > 0 else "unknown",
-                "title": formatted_title
-            }))
-
-            transcript_text = extractor.extract_transcript_text()
-
-            if transcript_text:
-                safe_title = extractor.sanitize_filename(formatted_title)
-                transcript_content = "\n".join(transcript_text)
-
-                # Store transcript in memory
-                transcripts.append({
-                    'title': safe_title,
-                    'content': transcript_content,
-                    'lecture_info': lecture_info
-                })
-
-                status_queue.put(("status", f"✅ Successfully extracted: {formatted_title}"))
-
-                if extractor.api_key:
-                    try:
-                        status_queue.put(("status", f"Generating high-end notes for: {formatted_title}"))
-                        summary = extractor.generate_notion_friendly_summary(
-                            transcript_content,
-                            formatted_title,
-                            lecture_info.get("number", "")
-                        )
-
-                        if summary:
-                            # Store summary in memory
-                            transcripts[-1]['summary'] = summary
-                            status_queue.put(("status", f"✅ Successfully summarized: {formatted_title}"))
-                        else:
-                            status_queue.put(("status", f"❌ Failed to generate notes for: {formatted_title}"))
-                    except Exception as e:
-                        status_queue.put(("status", f"❌ Error generating notes: {str(e)}"))
-
-                extractor.processed_lectures.add(formatted_title)
-                extractor.processed_urls.add(current_url)
-                video_count += 1
-            else:
-                status_queue.put(("status", f"❌ No transcript found for {formatted_title}"))
-
-            if max_videos > 0 and video_count >= max_videos:
-                status_queue.put(("status", f"✅ Completed processing {video_count} videos as requested."))
-                break
-
-            if max_videos == 0 or video_count < max_videos:
-                if not extractor.navigate_to_next_video():
-                    status_queue.put(("status", "No more videos to process. Extraction complete."))
-                    break
-                time.sleep(3)
-
-        status_queue.put(("status", f"✅ Completed processing {video_count} videos."))
-        return course_title, True, transcripts
-
-    except Exception as e:
-        status_queue.put(("status", f"❌ Error during extraction: {str(e)}"))
-        import traceback
-        traceback.print_exc()
-        status_queue.put(("status", f"Error details: {str(e)}"))
-        return None, False, []
-
-
-def handle_ibm_login(driver, course_url, ibm_email, ibm_password, status_queue):
-    """Handle the IBM w3id login process for Udemy for Business"""
-    try:
-        # Check if we're using Playwright
-        is_playwright = hasattr(driver, 'goto')
-        
-        # Navigate to course URL first
-        if is_playwright:
-            driver.goto(course_url)
-        else:
-            driver.get(course_url)
-        status_queue.put(("status", "Navigated to course page. Looking for login elements..."))
-        time.sleep(3)
-        
-        # Look for login button or element
-        try:
-            if is_playwright:
-                # Playwright selectors
-                login_btn = driver.wait_for_selector("a[class*='login'], a[data-purpose*='header-login']", timeout=10000)
-                login_btn.click()
-            else:
-                # Selenium selectors
-                login_btn = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable(
-                        (By.XPATH, "//a[contains(@class, 'login') or contains(@data-purpose, 'header-login')]"))
-                )
-                login_btn.click()
-            status_queue.put(("status", "Clicked on login button."))
-            time.sleep(2)
-        except Exception as e:
-            status_queue.put(("status", f"Login button not found, might already be on login page: {str(e)}"))
-        
-        # Handle the IBM Security Verify screen - select "w3id Credentials" option
-        try:
-            if is_playwright:
-                # Wait for the w3id Credentials button
-                w3id_button = driver.wait_for_selector("#credsDiv", timeout=15000)
-                w3id_button.click()
-            else:
-                # Wait for the w3id Credentials button
-                w3id_button = WebDriverWait(driver, 15).until(
-                    EC.presence_of_element_located((By.ID, "credsDiv"))
-                )
-                w3id_button.click()
-            
-            status_queue.put(("status", "Selected w3id Credentials option"))
-            time.sleep(5)
-            
-        except Exception as e:
-            status_queue.put(("status", f"Error selecting w3id option: {str(e)}. Attempting to continue..."))
-        
-        # Now handle the username/password form
-        try:
-            if is_playwright:
-                # Fill email field
-                email_field = driver.wait_for_selector("#user-name-input", timeout=15000)
-                email_field.fill(ibm_email)
-                
-                # Fill password field
-                password_field = driver.wait_for_selector("#password-input", timeout=10000)
-                password_field.fill(ibm_password)
-                
-                # Click sign in button
-                submit_button = driver.wait_for_selector("#login-button", timeout=10000)
-                submit_button.click()
-            else:
-                # Fill email field
-                email_field = WebDriverWait(driver, 15).until(
-                    EC.presence_of_element_located((By.ID, "user-name-input"))
-                )
-                email_field.clear()
-                email_field.send_keys(ibm_email)
-                
-                # Fill password field
-                password_field = WebDriverWait(driver, 10).until(
-                    EC.presence_of_element_located((By.ID, "password-input"))
-                )
-                password_field.clear()
-                password_field.send_keys(ibm_password)
-                
-                # Click sign in button
-                submit_button = WebDriverWait(driver, 10).until(
-                    EC.element_to_be_clickable((By.ID, "login-button"))
-                )
-                submit_button.click()
-            
-            status_queue.put(("status", "Submitted login credentials. Waiting for login to complete..."))
-            time.sleep(10)  # Give enough time for login and potential redirects
-            
-        except Exception as e:
-            status_queue.put(("status", f"Error with username/password form: {str(e)}"))
-            return False
-        
-        # Check if login was successful
-        try:
-            if is_playwright:
-                # Wait for course elements
-                driver.wait_for_selector("div[class*='course-content'], a[class*='user-profile'], div[class*='sidebar']", timeout=15000)
-            else:
-                # Wait for course elements
-                WebDriverWait(driver, 15).until(
-                    EC.any_of(
-                        EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'course-content')]")),
-                        EC.presence_of_element_located((By.XPATH, "//a[contains(@class, 'user-profile')]")),
-                        EC.presence_of_element_located((By.XPATH, "//div[contains(@class, 'sidebar')]"))
-                    )
-                )
-            
-            status_queue.put(("status", "IBM login successful! Detected course elements."))
-            
-            # Navigate back to course URL to ensure we're on the right page
-            if is_playwright:
-                driver.goto(course_url)
-            else:
-                driver.get(course_url)
-            status_queue.put(("status", "Navigated back to course page after login."))
-            time.sleep(5)
-            
-            return True
-        except Exception as e:
-            status_queue.put(("status", f"Could not verify successful IBM login: {str(e)}"))
-            return False
-            
-    except Exception as e:
-        status_queue.put(("status", f"IBM login process failed: {str(e)}"))
-        return False
-
-
-def extraction_thread(driver, course_url, max_videos, api_key, status_queue, ibm_email, ibm_password):
-    """Run extraction in a separate thread with IBM login handling"""
-    try:
-        status_queue.put(("status", "Starting IBM w3id login process..."))
-        
-        # Check if we're using Playwright
-        is_playwright = hasattr(driver, 'goto')  # Playwright page has goto method
-        
-        if is_playwright:
-            # Handle Playwright navigation
-            driver.goto(course_url)
-            status_queue.put(("status", "Navigated to course page using Playwright"))
-        else:
-            # Handle Selenium navigation
-            driver.get(course_url)
-            status_queue.put(("status", "Navigated to course page using Selenium"))
-        
-        # Handle IBM login
-        login_success = handle_ibm_login(driver, course_url, ibm_email, ibm_password, status_queue)
-        
-        if not login_success:
-            status_queue.put(("error", "IBM login process failed. Please check your credentials and try again."))
-            return
-        
-        status_queue.put(("status", "Login successful. Navigating to first lecture..."))
-        
-        # Navigate to first lecture
-        navigation_success = navigate_to_first_lecture(driver, status_queue)
-        
-        if not navigation_success:
-            status_queue.put(("error", "Failed to navigate to first lecture. Please check the course URL and try again."))
-            return
-        
-        status_queue.put(("status", "Successfully navigated to first lecture. Initializing extractor..."))
-        
-        # Initialize extractor with the existing driver
-        extractor = UdemyTranscriptExtractor(headless=True, summarize=True, api_key=api_key)
-        extractor.driver = driver  # Use the pre-initialized driver
-
-        status_queue.put(("status", "Extractor initialized. Beginning extraction process..."))
-
-        # Call modified extraction function
-        course_title, success, transcripts = modified_extract_all_transcripts(extractor, course_url, max_videos, status_queue)
-
-        if success and transcripts:
-            status_queue.put(("status", f"Successfully extracted {len(transcripts)} transcripts."))
-            
-            # Process data in memory
-            files_data = prepare_files_data(course_title, transcripts)
-
-            # Create zip file with memory data
-            zip_file = create_zip_file(files_data)
-
-            status_queue.put(("success", {
-                "course_title": course_title,
-                "transcripts": transcripts,
-                "zip_file": zip_file,
-                "files_data": files_data
-            }))
-        else:
-            status_queue.put(("error", "Extraction failed. No transcripts were extracted."))
-    except Exception as e:
-        import traceback
-        error_details = traceback.format_exc()
-        status_queue.put(("error", f"Error during extraction: {str(e)}\n\nError details:\n{error_details}"))
-    finally:
-        # Close the browser
+import html
+from collections import deque
+from job_manager import JobManager, JobRejected
+from job_registry import JobRegistry, make_job_key, read_zip_file
+from cancellation import DEFAULT_JOB_TIMEOUT
+from tracing import process_tracer, start_metrics_server
+from session_store import credential_id
+from summary_client import process_usage
+from singleflight import summary_flight
+# The browser/extraction pipeline is shared with the headless job API
+from extraction_pipeline import run_extraction_job, get_browser_pool
+
+
+# Only the most recent status lines are kept and rendered
+STATUS_HISTORY_LIMIT = 200
+# Upper bound on job events applied per fragment tick
+QUEUE_DRAIN_BATCH = 200
+
+
+def new_status_log(initial=None):
+    """Create a bounded ring buffer for status messages"""
+    return deque(initial or [], maxlen=STATUS_HISTORY_LIMIT)
+
+
+def apply_job_events(events):
+    """Apply a batch of job events to session state.
+
+    Returns True when the job reached a terminal state and the whole page needs to rerun.
+    """
+    finished = False
+    for message in events:
+        if isinstance(message, tuple):
+            msg_type, content = message
+
+            if msg_type == "status":
+                st.session_state.status_messages.append(content)
+
+            elif msg_type == "progress":
+                st.session_state.progress = content
+
+            elif msg_type == "success":
+                st.session_state.extraction_complete = True
+                st.session_state.download_data = content
+                st.session_state.status_messages.append("✅ Notes generation completed successfully!")
+                finished = True
+
+            elif msg_type == "error":
+                st.session_state.error_message = content
+                st.session_state.extraction_complete = True
+                st.session_state.status_messages.append(f"❌ Error: {content}")
+                finished = True
+
+        else:  # Legacy message format
+            st.session_state.status_messages.append(str(message))
+
+    return finished
+
+
+@st.cache_resource
+def get_job_manager():
+    """Process-wide job manager shared by every Streamlit session"""
+    get_browser_pool()  # start warming browsers before the first job arrives
+    metrics_port = int(os.environ.get("UDEMY_METRICS_PORT", "9108"))
+    if metrics_port:
         try:
-            if is_playwright:
-                driver.close()
-                driver.context.browser.close()
-            else:
-                driver.quit()
-            status_queue.put(("status", "Browser closed."))
-        except Exception as e:
-            status_queue.put(("status", f"Error closing browser: {str(e)}"))
-        # Signal that the thread is done
-        status_queue.put(("done", None))
-
+            start_metrics_server(process_tracer, metrics_port)
+        except OSError as e:
+            print(f"Could not start metrics endpoint on port {metrics_port}: {str(e)}")
+
+    return JobManager(
+        run_extraction_job,
+        job_timeout=DEFAULT_JOB_TIMEOUT,
+        max_workers=int(os.environ.get("EXTRACTION_WORKERS", "2")),
+        max_queued=int(os.environ.get("EXTRACTION_MAX_QUEUED", "20")),
+        registry=JobRegistry()
+    )
 
-def prepare_files_data(course_title, transcripts):
-    """Prepare files data in memory instead of saving to disk"""
-    files_data = {}
 
-    for transcript in transcripts:
-        # Store transcript
-        transcript_file = f"{course_title}/{transcript['title']}.txt"
-        files_data[transcript_file] = transcript['content']
+def render_phase_breakdown(job):
+    """Show where the job has spent its time so far"""
+    breakdown = job.tracer.breakdown()
+    if breakdown:
+        with st.expander("⏱️ Time per phase"):
+            st.dataframe(breakdown, hide_index=True, use_container_width=True)
+
+
+@st.fragment(run_every=1)
+def render_progress():
+    """Incrementally refresh progress and logs without rerunning the whole app"""
+    manager = get_job_manager()
+    job = manager.get(st.session_state.job_id)
+    if job is None:
+        st.session_state.error_message = "The extraction job is no longer available. Please start again."
+        st.session_state.extraction_complete = True
+        st.rerun()
+
+    # Read the next batch of events this session has not seen yet
+    events, st.session_state.event_cursor = job.events.read(st.session_state.event_cursor, QUEUE_DRAIN_BATCH)
+    if apply_job_events(events):
+        # Terminal state: rerun the full page to show the results/error section
+        st.rerun()
+
+    if job.status == "queued":
+        position = manager.queue_position(job)
+        st.info(f"⏳ All browser workers are busy. Your job is number {position} in the queue.")
+
+    render_phase_breakdown(job)
+
+    # Create a progress bar
+    progress = st.session_state.progress
+    if progress["max"] and progress["max"] != "unknown":
+        progress_pct = min(100, int(progress["current"] / progress["max"] * 100))
+        progress_html = f"""
+        <div class="progress-bar">
+            <div class="progress-bar-inner" style="width: {progress_pct}%">
+                {progress["current"]}/{progress["max"]} ({progress_pct}%)
+            </div>
+        </div>
+        """
+        st.markdown(progress_html, unsafe_allow_html=True)
+    elif progress["current"] > 0:
+        st.write(f"Processed {progress['current']} videos")
 
-        # Store summary if available
-        if 'summary' in transcript:
-            summary_file = f"{course_title}/summaries/{transcript['title']}_summary.md"
-            files_data[summary_file] = transcript['summary']
+    if progress["title"]:
+        st.caption(f"Current: {progress['title']}")
 
-    return files_data
+    # Render the status log as a single element instead of one widget per message
+    log_html = "<br>".join(html.escape(str(msg)) for msg in st.session_state.status_messages)
+    st.markdown(f'<div class="status-box">{log_html}</div>', unsafe_allow_html=True)
 
 
 def main():
@@ -717,12 +144,12 @@ def main():
         st.session_state.extraction_started = False
     if 'extraction_complete' not in st.session_state:
         st.session_state.extraction_complete = False
-    if 'driver' not in st.session_state:
-        st.session_state.driver = None
-    if 'status_queue' not in st.session_state:
-        st.session_state.status_queue = queue.Queue()
+    if 'job_id' not in st.session_state:
+        st.session_state.job_id = None
+    if 'event_cursor' not in st.session_state:
+        st.session_state.event_cursor = 0
     if 'status_messages' not in st.session_state:
-        st.session_state.status_messages = []
+        st.session_state.status_messages = new_status_log()
     if 'download_data' not in st.session_state:
         st.session_state.download_data = None
     if 'progress' not in st.session_state:
@@ -730,6 +157,17 @@ def main():
     if 'error_message' not in st.session_state:
         st.session_state.error_message = None
 
+    # Reattach to the job referenced in the URL after a page reload
+    if st.session_state.job_id is None and "job" in st.query_params:
+        if get_job_manager().get(st.query_params["job"]) is not None:
+            st.session_state.job_id = st.query_params["job"]
+            st.session_state.event_cursor = 0
+            st.session_state.extraction_started = True
+            st.session_state.extraction_complete = False
+            st.session_state.status_messages = new_status_log(["Reattached to job..."])
+        else:
+            del st.query_params["job"]
+
     # Add advanced settings in sidebar
     with st.sidebar:
         st.title("Advanced Settings")
@@ -738,6 +176,15 @@ def main():
         manual_verification = st.checkbox("Enable manual verification", value=False,
                                         help="Allow manual interaction with the browser during login")
 
+        pool_stats = get_job_manager().stats()
+        usage = process_usage()
+        cached_share = usage["cached_tokens"] / usage["prompt_tokens"] if usage["prompt_tokens"] else 0
+        st.caption(f"Browser workers busy: {pool_stats['running']}/{pool_stats['max_workers']} · "
+                   f"Jobs waiting: {pool_stats['queued']}/{pool_stats['max_queued']} · "
+                   f"Summary calls saved by sharing: {summary_flight.stats()['coalesced']} · "
+                   f"Prompt tokens from the provider's cache: {usage['cached_tokens']:,}/"
+                   f"{usage['prompt_tokens']:,} ({cached_share:.0%})")
+
     # Add custom CSS to make the app look more professional
     st.markdown("""
     <style>
@@ -913,100 +360,42 @@ def main():
             st.session_state.extraction_started = True
             st.session_state.extraction_complete = False
             st.session_state.error_message = None
-            st.session_state.status_messages = ["Starting extraction process..."]
+            st.session_state.status_messages = new_status_log(["Starting extraction process..."])
+            st.session_state.job_id = None
+            st.session_state.event_cursor = 0
             st.rerun()
 
     # Start extraction process
     if st.session_state.extraction_started and not st.session_state.extraction_complete:
-        # Display status messages
         st.markdown("### Progress")
-        
-        # Create a progress bar
-        if st.session_state.progress["max"] and st.session_state.progress["max"] != "unknown":
-            progress_pct = min(100, int(st.session_state.progress["current"] / st.session_state.progress["max"] * 100))
-            progress_html = f"""
-            <div class="progress-bar">
-                <div class="progress-bar-inner" style="width: {progress_pct}%">
-                    {st.session_state.progress["current"]}/{st.session_state.progress["max"]} ({progress_pct}%)
-                </div>
-            </div>
-            """
-            st.markdown(progress_html, unsafe_allow_html=True)
-        elif st.session_state.progress["current"] > 0:
-            st.write(f"Processed {st.session_state.progress['current']} videos")
-            
-        if st.session_state.progress["title"]:
-            st.caption(f"Current: {st.session_state.progress['title']}")
-        
-        # Display status messages in a scrollable box
-        st.markdown('<div class="status-box">', unsafe_allow_html=True)
-        for msg in st.session_state.status_messages:
-            st.write(msg)
-        st.markdown('</div>', unsafe_allow_html=True)
-        
-        # Start extraction thread if not already started
-        if not hasattr(st.session_state, 'thread') or st.session_state.thread is None:
-            # Initialize browser
-            if not st.session_state.driver:
-                try:
-                    st.session_state.status_messages.append("Initializing browser...")
-                    if headless_mode:
-                        st.session_state.driver = init_cloud_browser()
-                    else:
-                        st.session_state.driver = init_visible_browser()
-                    st.session_state.status_messages.append("Browser initialized successfully.")
-                except Exception as e:
-                    st.session_state.status_messages.append(f"Browser initialization failed: {str(e)}")
-                    st.session_state.error_message = f"Failed to initialize browser: {str(e)}"
-                    st.session_state.extraction_complete = True
-                    st.rerun()
 
-            # Start the extraction thread with IBM credentials
-            st.session_state.thread = threading.Thread(
-                target=extraction_thread,
-                args=(st.session_state.driver, course_url, max_videos, api_key, st.session_state.status_queue, ibm_email, ibm_password)
-            )
-            st.session_state.thread.daemon = True
-            st.session_state.thread.start()
-        
-        # Check for and process messages from the thread
-        messages_processed = False
-        while not st.session_state.status_queue.empty():
-            message = st.session_state.status_queue.get_nowait()
-            messages_processed = True
-            
-            if isinstance(message, tuple):
-                msg_type, content = message
-                
-                if msg_type == "status":
-                    st.session_state.status_messages.append(content)
-                
-                elif msg_type == "progress":
-                    st.session_state.progress = content
-                
-                elif msg_type == "success":
-                    st.session_state.extraction_complete = True
-                    st.session_state.download_data = content
-                    st.session_state.status_messages.append("✅ Notes generation completed successfully!")
-                
-                elif msg_type == "error":
-                    st.session_state.error_message = content
-                    st.session_state.extraction_complete = True
-                    st.session_state.status_messages.append(f"❌ Error: {content}")
-                
-                elif msg_type == "done":
-                    # Thread is done
-                    st.session_state.thread = None
-            
-            else:  # Legacy message format
-                st.session_state.status_messages.append(str(message))
-        
-        if messages_processed:
-            st.rerun()
-        else:
-            # If no messages were processed, sleep and rerun
-            time.sleep(1)
+        # Submit the job to the shared worker pool if not already submitted
+        if st.session_state.job_id is None:
+            try:
+                # Identical requests with the same credentials share one job: join it if running, reuse it if done
+                job = get_job_manager().submit(
+                    {"course_url": course_url, "max_videos": max_videos, "headless": headless_mode},
+                    secrets={"api_key": api_key, "ibm_email": ibm_email, "ibm_password": ibm_password},
+                    key=make_job_key(course_url, account=credential_id(ibm_email, ibm_password), max_videos=max_videos,
+                                     summarize=bool(api_key))
+                )
+                st.session_state.job_id = job.id
+                st.query_params["job"] = job.id
+            except JobRejected as e:
+                st.session_state.error_message = str(e)
+                st.session_state.extraction_complete = True
+                st.rerun()
+
+        if st.button("⏹ Cancel", key="cancel_job", help="Stop this job and release its browser"):
+            # The job is only stopped once every session following it has cancelled
+            get_job_manager().cancel(st.session_state.job_id)
+            for key in list(st.session_state.keys()):
+                del st.session_state[key]
+            st.query_params.clear()
             st.rerun()
+
+        # Progress and logs refresh themselves every second inside the fragment
+        render_progress()
     
     # Show download section when extraction is complete
     if st.session_state.extraction_complete and st.session_state.download_data and not st.session_state.error_message:
@@ -1018,24 +407,32 @@ def main():
         with col1:
             course_title = st.session_state.download_data["course_title"]
             transcript_count = len(st.session_state.download_data["transcripts"])
-            summary_count = sum(1 for t in st.session_state.download_data["transcripts"] if 'summary' in t)
+            summary_count = sum(1 for t in st.session_state.download_data["transcripts"]
+                                if t.get('has_summary') or 'summary' in t)
             
             st.markdown(f"**Course**: {course_title}")
             st.markdown(f"**Processed Lectures**: {transcript_count}")
             st.markdown(f"**Generated Notes**: {summary_count}")
+
+            finished_job = get_job_manager().get(st.session_state.job_id)
+            if finished_job is not None:
+                render_phase_breakdown(finished_job)
         
         with col2:
             # Display download button with improved styling
             zip_file = st.session_state.download_data["zip_file"]
-            st.markdown(get_download_link(zip_file, f"{course_title}_notes.zip", "📥 Download Notes"),
-                        unsafe_allow_html=True)
+            st.download_button("📥 Download Notes", data=read_zip_file(zip_file),
+                               file_name=f"{course_title}_notes.zip", mime="application/zip",
+                               use_container_width=True)
             
             # Option to restart the process with improved button
             if st.button("🔄 Process Another Course", type="primary", use_container_width=True,
                          key="process_another", help="Start over with a new course"):
                 # Reset everything
+                get_job_manager().cancel(st.session_state.job_id)
                 for key in list(st.session_state.keys()):
                     del st.session_state[key]
+                st.query_params.clear()
                 st.rerun()
 
 if __name__ == "__main__":